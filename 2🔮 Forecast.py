@@ -1,31 +1,116 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 
+from analytics import perf
+from analytics.bars import INTERVALS
+from analytics.cache import cached
+from analytics.charts import cached_figure, downsample, zoom, zoom_slider
+from analytics.evaluation import walk_forward
+from analytics.forecast import forecast_many, simple_moving_average_forecast
+from analytics.store import get_store, load_history, load_many
+
 st.set_page_config(page_title="🔮 Price Forecast", layout="wide")
-st.title("🔮 Price Forecast (SMA-based)")
+st.title("🔮 Price Forecast")
+perf.page("Forecast")
+
+mode = st.radio("Mode", ["Forecast", "Walk-Forward Evaluation"], horizontal=True)
+
+# Mean absolute percentage error per method, one bar group per horizon
+def evaluation_chart(summary):
+    fig = go.Figure()
+    for method in summary.index.get_level_values("Method").unique():
+        rows = summary.loc[method]
+        fig.add_trace(go.Bar(x=[f"{h} bars" for h in rows.index], y=rows["MAPE"], name=method))
+    fig.update_layout(
+        title="Walk-Forward MAPE by Horizon",
+        xaxis_title="Horizon",
+        yaxis_title="MAPE",
+        yaxis=dict(tickformat=".1%"),
+        barmode="group",
+        template="plotly_white"
+    )
+    return fig
+
+# Walk-forward: every method rerun at each past bar of every selected asset
+# and scored against the closes that followed
+if mode == "Walk-Forward Evaluation":
+    if not st.session_state.get("selected_assets"):
+        st.warning("⚠ Please select assets from the Dashboard first.")
+        st.stop()
+    METHODS = {
+        "SMA (last value)": "sma",
+        "Naive (last close)": "naive",
+        "Holt Exponential Smoothing": "holt",
+        "AR on Log Returns": "ar",
+        "Linear Trend": "linear",
+    }
+    col1, col2 = st.columns(2)
+    period = col1.selectbox("📆 Historical Data Period", ["6mo", "1y", "2y", "5y", "max"], index=3)
+    interval = col2.selectbox("⏱️ Bar Interval", ["1d", "1h", "5m", "1m"])
+    methods = st.multiselect("🧮 Methods", list(METHODS), default=list(METHODS))
+    horizons = st.multiselect("🔮 Horizons (bars)", [1, 5, 10, 14, 30, 60], default=[1, 5, 14])
+    col1, col2 = st.columns(2)
+    min_train = col1.slider("Minimum Training Bars", 30, 500, 60)
+    every = col2.slider("Evaluate Every N Bars", 1, 20, 1)
+    if not methods or not horizons:
+        st.stop()
+
+    tickers = tuple(st.session_state.selected_assets)
+    frames, errors = perf.timed(category="data")(load_many)(tickers, period, columns=["Close"], interval=interval)
+    for ticker, error in errors.items():
+        st.error(f"Error loading data for {ticker}: {error}")
+    closes = {t: f["Close"] for t, f in frames.items() if len(f) > 2}
+    versions = tuple(get_store(interval).loaded_version(t) for t in closes)
+    options = (period, interval, tuple(METHODS[m] for m in methods), tuple(horizons), min_train, every)
+    with perf.span("walk-forward", rows=sum(len(c) for c in closes.values())):
+        summary, per_ticker = cached((tuple(closes), versions, "walk_forward", options), lambda: walk_forward(
+            closes, [METHODS[m] for m in methods], horizons, min_train=min_train, step=every))
+    if summary["Forecasts"].sum() == 0:
+        st.warning("⚠ Not enough history for any origin; lower the minimum training bars or pick a longer period.")
+        st.stop()
+
+    labels = {v: k for k, v in METHODS.items()}
+    summary = summary.rename(index=labels, level="Method")
+    fig = cached_figure(("walk-forward", summary), lambda: evaluation_chart(summary))
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown("### Accuracy by Method and Horizon")
+    st.dataframe(summary.style.format({"MAE": "{:.4f}", "MAPE": "{:.2%}", "Hit Rate": "{:.1%}", "Forecasts": "{:,}"}))
+    st.caption("Hit Rate is the share of forecasts that called the direction of the move correctly, "
+               "counting only origins where both the forecast and the price moved; the flat naive "
+               "forecast calls no direction. MAE is in price units and pooled across assets.")
+    with st.expander("Per-Asset Results"):
+        st.dataframe(per_ticker.rename(index=labels, level="Method").style.format(
+            {"MAE": "{:.4f}", "MAPE": "{:.2%}", "Hit Rate": "{:.1%}", "Forecasts": "{:,}"}))
+    perf.panel()
+    st.stop()
 
 # Select time range and forecast horizon
-period = st.selectbox("📆 Historical Data Period", ["1mo", "3mo", "6mo", "1y", "2y"], index=3)
-forecast_days = st.slider("🔮 Forecast Horizon (days)", 5, 60, 14)
+period = st.selectbox("📆 Historical Data Period", ["5d", "1mo", "3mo", "6mo", "1y", "2y"], index=4)
+interval = st.selectbox("⏱️ Bar Interval", ["1d", "1h", "5m", "1m"])
+step = pd.Timedelta(seconds=INTERVALS[interval])
+horizon = f"{{}} Days" if interval == "1d" else f"{{}} × {interval} Bars"
+forecast_days = st.slider("🔮 Forecast Horizon (days)" if interval == "1d" else "🔮 Forecast Horizon (bars)", 5, 60, 14)
+MODELS = {
+    "SMA (last value)": None,
+    "Holt Exponential Smoothing": "holt",
+    "AR on Log Returns": "ar",
+    "Linear Trend": "linear",
+}
+model_name = st.selectbox("🧮 Forecast Model", list(MODELS))
 
 # Load historical close price
-@st.cache_data
-def load_data(ticker, period):
-    df = yf.Ticker(ticker).history(period=period)
-    df.index = df.index.tz_localize(None)
-    return df["Close"]
-
-# Simple forecast using last SMA value
-def simple_moving_average_forecast(close, forecast_days=14, window=5):
-    last_date = close.index[-1]
-    sma = close.rolling(window=window).mean().dropna()
-    last_sma = sma.iloc[-1]
-    future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=forecast_days)
-    forecast = pd.Series(last_sma, index=future_dates)
-    return forecast
+@perf.timed(category="data")
+def load_data(ticker, period, interval):
+    return load_history(ticker, period, columns=["Close"], interval=interval)["Close"]
+
+# Forecast from the shared engine; fitted parameters are cached across reruns
+@perf.timed(cache=True)
+def model_forecast(close, ticker, forecast_days, model):
+    values = forecast_many({ticker: close}, forecast_days, model)[ticker]
+    future_dates = pd.date_range(start=close.index[-1] + step, periods=forecast_days, freq=step)
+    return pd.Series(values.to_numpy(), index=future_dates)
 
 # Asset selection
 if "selected_assets" not in st.session_state or not st.session_state.selected_assets:
@@ -34,34 +119,46 @@ if "selected_assets" not in st.session_state or not st.session_state.selected_as
 
 ticker = st.selectbox("Select Asset to Forecast", st.session_state.selected_assets)
 
-close = load_data(ticker, period)
+close = load_data(ticker, period, interval)
 if close.empty:
     st.warning(f"No data found for {ticker}")
     st.stop()
 
 # Forecast
-forecast = simple_moving_average_forecast(close, forecast_days=forecast_days)
+if MODELS[model_name] is None:
+    forecast = perf.timed()(simple_moving_average_forecast)(close, forecast_days=forecast_days, step=step)
+else:
+    forecast = model_forecast(close, ticker, forecast_days, MODELS[model_name])
 
 # Plot with Plotly
-fig = go.Figure()
+def forecast_chart(history, forecast):
+    fig = go.Figure()
 
-# Historical prices
-fig.add_trace(go.Scatter(x=close.index, y=close, mode='lines', name='Historical Price'))
+    # Historical prices, downsampled to screen resolution
+    history = downsample(history)
+    fig.add_trace(go.Scatter(x=history.index, y=history, mode='lines', name='Historical Price'))
 
-# Forecasted prices
-fig.add_trace(go.Scatter(x=forecast.index, y=forecast, mode='lines+markers', name='Forecast (SMA)',
-                         line=dict(dash='dot', color='orange')))
+    # Forecasted prices
+    fig.add_trace(go.Scatter(x=forecast.index, y=forecast, mode='lines+markers', name=f'Forecast ({model_name})',
+                             line=dict(dash='dot', color='orange')))
 
-fig.update_layout(
-    title=f"{ticker} Price Forecast ({forecast_days} Days)",
-    xaxis_title="Date",
-    yaxis_title="Price",
-    template="plotly_white",
-    legend=dict(x=0, y=1)
-)
+    fig.update_layout(
+        title=f"{ticker} Price Forecast ({horizon.format(forecast_days)})",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        template="plotly_white",
+        legend=dict(x=0, y=1)
+    )
+    return fig
 
+start, end = zoom_slider(close.index, key="forecast_zoom")
+history = zoom(close, start, end)
+fig = cached_figure(("forecast", ticker, interval, model_name, forecast_days, history, forecast),
+                    lambda: forecast_chart(history, forecast))
 st.plotly_chart(fig, use_container_width=True)
 
 # Forecast Summary
-st.markdown(f"### Forecast Summary for {forecast_days} Days")
-st.success(f"📅 Projected Price: **${forecast.iloc[-1]:.2f}** (based on last SMA value)")
+st.markdown(f"### Forecast Summary for {horizon.format(forecast_days)}")
+st.success(f"📅 Projected Price: **${forecast.iloc[-1]:.2f}** (based on {model_name})")
+
+perf.panel()
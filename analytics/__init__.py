@@ -0,0 +1 @@
+"""Shared data and compute helpers used by the Streamlit pages."""
@@ -0,0 +1,160 @@
+"""Long/flat signal backtests: moving-average crossovers evaluated over whole
+parameter grids, and any signal matrix over many tickers at once."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SHORT_WINDOWS = range(5, 51)
+LONG_WINDOWS = range(30, 201)
+METRICS = ["Final Return", "Sharpe", "Max Drawdown"]
+
+
+# Single-pair backtest on an OHLCV frame: long while the short MA is above
+# the long MA, entered on the next bar. Returns the frame with the signal and
+# equity columns added, plus the buy and sell signal rows.
+def backtest_ma_strategy(data, short_window, long_window):
+    # Copy, upcasting compact float32 intraday prices so equity compounds in float64
+    data = data.astype({'Close': 'float64'})
+    data['Short_MA'] = data['Close'].rolling(window=short_window).mean()
+    data['Long_MA'] = data['Close'].rolling(window=long_window).mean()
+    return backtest_signal(data, data['Short_MA'] > data['Long_MA'])
+
+
+# Backtest of any long/flat rule on an OHLCV frame: long on the bars where
+# `signal` is true (or 1), entered on the next bar, no costs. Same output as
+# backtest_ma_strategy.
+def backtest_signal(data, signal):
+    data = data.astype({'Close': 'float64'})
+    data['Signal'] = np.asarray(signal, dtype=float).astype(int)
+    data['Position'] = data['Signal'].diff()
+    data['Strategy_Returns'] = data['Close'].pct_change() * data['Signal'].shift(1)
+    data['Strategy'] = (1 + data['Strategy_Returns']).cumprod()
+    data['BuyHold'] = (1 + data['Close'].pct_change()).cumprod()
+
+    buy_signals = data[data['Position'] == 1]
+    sell_signals = data[data['Position'] == -1]
+    return data, buy_signals, sell_signals
+
+
+# Headline figures of a backtest_ma_strategy result
+def backtest_summary(result, periods_per_year=252):
+    returns = result['Strategy_Returns'].dropna()
+    std = returns.std()
+    equity = result['Strategy'].dropna()
+    buy_hold = result['BuyHold'].dropna()
+    return {
+        "Final Return": equity.iloc[-1] - 1 if len(equity) else np.nan,
+        "Buy & Hold": buy_hold.iloc[-1] - 1 if len(buy_hold) else np.nan,
+        "Sharpe": returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan,
+        "Max Drawdown": (equity / equity.cummax() - 1).min(),
+        "Trades": int((result['Position'] == 1).sum()),
+    }
+
+
+# backtest_signal for every column of a (bar x ticker) close matrix at once.
+# `signal` is a 0/1 matrix of the same shape. Returns a dict of matrices
+# named like backtest_signal's columns.
+def backtest_signals(close, signal):
+    close = close.astype(float)
+    signal = signal.astype(float)
+    returns = close.pct_change(fill_method=None)
+    strategy_returns = returns * signal.shift(1)
+    return {
+        "Signal": signal,
+        "Position": signal.diff(),
+        "Strategy_Returns": strategy_returns,
+        "Strategy": (1 + strategy_returns).cumprod(),
+        "BuyHold": (1 + returns).cumprod(),
+    }
+
+
+# backtest_summary per column of a backtest_signals result, as a DataFrame
+# indexed by ticker
+def signals_summary(result, periods_per_year=252):
+    returns, equity = result["Strategy_Returns"], result["Strategy"]
+    std = returns.std()
+    last = equity.ffill().iloc[-1] if len(equity) else pd.Series(np.nan, index=equity.columns)
+    buy_hold = result["BuyHold"].ffill().iloc[-1] if len(equity) else last
+    return pd.DataFrame({
+        "Final Return": last - 1,
+        "Buy & Hold": buy_hold - 1,
+        "Sharpe": (returns.mean() / std * np.sqrt(periods_per_year)).where(std > 0),
+        "Max Drawdown": (equity / equity.cummax() - 1).min(),
+        "Trades": (result["Position"] == 1).sum(),
+    })
+
+
+# Rolling means for every window from a single cumulative-sum pass.
+# Row i holds the mean over windows[i]; the first windows[i] - 1 bars are NaN.
+def rolling_means(close, windows):
+    values = np.asarray(close, dtype=float)
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    means = np.full((len(windows), len(values)), np.nan)
+    for i, window in enumerate(windows):
+        if window <= len(values):
+            means[i, window - 1:] = (csum[window:] - csum[:-window]) / window
+    return means
+
+
+# Sweep every (short, long) pair with the same rules as the single-pair
+# backtest: long while short MA > long MA, entered on the next bar, no costs.
+# Returns a dict of (short x long) DataFrames, one per metric in METRICS;
+# pairs with short >= long are NaN.
+def sweep_ma(close, short_windows=SHORT_WINDOWS, long_windows=LONG_WINDOWS, periods_per_year=252):
+    close = np.asarray(close, dtype=float)
+    short_windows, long_windows = list(short_windows), list(long_windows)
+    results = {m: np.full((len(short_windows), len(long_windows)), np.nan) for m in METRICS}
+    if len(close) < 2:
+        return _frames(results, short_windows, long_windows)
+
+    short_ma = rolling_means(close, short_windows)
+    long_ma = rolling_means(close, long_windows)
+    returns = close[1:] / close[:-1] - 1
+    longs = np.asarray(long_windows)
+
+    for i, short in enumerate(short_windows):
+        # (long x time) positions for this short window, all long windows at once
+        signal = short_ma[i] > long_ma
+        strategy = returns * signal[:, :-1]
+        equity = np.cumprod(1 + strategy, axis=1)
+        drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+        std = strategy.std(axis=1, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 0, strategy.mean(axis=1) / std * np.sqrt(periods_per_year), np.nan)
+
+        valid = longs > short
+        results["Final Return"][i, valid] = equity[valid, -1] - 1
+        results["Sharpe"][i, valid] = sharpe[valid]
+        results["Max Drawdown"][i, valid] = drawdown[valid].min(axis=1)
+    return _frames(results, short_windows, long_windows)
+
+
+def _frames(results, short_windows, long_windows):
+    index = pd.Index(short_windows, name="Short MA")
+    columns = pd.Index(long_windows, name="Long MA")
+    return {m: pd.DataFrame(v, index=index, columns=columns) for m, v in results.items()}
+
+
+def _sweep_job(args):
+    return sweep_ma(*args)
+
+
+# Sweep several tickers, one per worker process
+def sweep_many(closes, short_windows=SHORT_WINDOWS, long_windows=LONG_WINDOWS, periods_per_year=252, max_workers=None):
+    tickers = list(closes)
+    jobs = [(np.asarray(closes[t], dtype=float), list(short_windows), list(long_windows), periods_per_year) for t in tickers]
+    if len(jobs) <= 1:
+        return {t: _sweep_job(job) for t, job in zip(tickers, jobs)}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(tickers, pool.map(_sweep_job, jobs)))
+
+
+# Best (short, long) pair by `metric`; drawdowns are negative, so larger is better for all three
+def best_pair(sweep, metric="Sharpe"):
+    table = sweep[metric]
+    if table.isna().all().all():
+        return None
+    short, long = table.stack().idxmax()
+    return int(short), int(long), {m: float(sweep[m].at[short, long]) for m in METRICS}
@@ -0,0 +1,62 @@
+"""Compact intraday bars and on-demand resampling.
+
+A year of 1-minute bars is about 525k rows per ticker, so intraday frames
+are kept compact: float32 prices, float64 volume and the int64 epoch
+timestamps of a DatetimeIndex. That is 24 bytes per bar instead of 48.
+Only the finest interval is stored. Coarser bars are built from it when
+asked for, with one vectorized pass over bucket boundaries.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bar length in seconds
+INTERVALS = {"1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600, "1d": 86400}
+INTRADAY = [i for i in INTERVALS if i != "1d"]
+BASE_INTERVAL = "1m"
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+
+def is_intraday(interval):
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval: {interval!r}")
+    return interval != "1d"
+
+
+# float32 prices, float64 volume, other columns dropped
+def compact(frame):
+    columns = {c: frame[c].to_numpy(dtype=np.float32) for c in PRICE_COLUMNS if c in frame}
+    if "Volume" in frame:
+        columns["Volume"] = frame["Volume"].to_numpy(dtype=np.float64)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def nbytes(frame):
+    return int(frame.memory_usage(index=True, deep=False).sum())
+
+
+# Aggregate bars into `interval` buckets aligned to the epoch (so hourly
+# buckets start on the hour): first Open, max High, min Low, last Close,
+# summed Volume. Empty buckets are left out, as in the provider's own data.
+def resample(frame, interval):
+    seconds = INTERVALS[interval]
+    if frame.empty:
+        return frame
+    ts = frame.index.as_unit("s").asi8
+    buckets = ts - ts % seconds
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+    ends = np.concatenate([starts[1:], [len(ts)]]) - 1
+    columns = {}
+    if "Open" in frame:
+        columns["Open"] = frame["Open"].to_numpy()[starts]
+    if "High" in frame:
+        columns["High"] = np.maximum.reduceat(frame["High"].to_numpy(), starts)
+    if "Low" in frame:
+        columns["Low"] = np.minimum.reduceat(frame["Low"].to_numpy(), starts)
+    if "Close" in frame:
+        columns["Close"] = frame["Close"].to_numpy()[ends]
+    if "Volume" in frame:
+        columns["Volume"] = np.add.reduceat(frame["Volume"].to_numpy(), starts)
+    index = pd.DatetimeIndex(buckets[starts].astype("datetime64[s]"), name=frame.index.name).as_unit(frame.index.unit)
+    return pd.DataFrame(columns, index=index)
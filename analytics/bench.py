@@ -0,0 +1,275 @@
+"""Benchmarks for the analytics functions over synthetic OHLCV data.
+
+    python -m analytics.bench --save baseline.json
+    python -m analytics.bench --compare baseline.json --threshold 0.25
+
+Series are generated deterministically (a seeded random walk), so the same
+case always sees the same data. Each case is timed best-of-``repeat`` and
+then run once more under tracemalloc for its peak allocation (NumPy and
+pandas buffers included). Results are written as JSON together with the
+Python/NumPy/pandas versions. ``--compare`` reruns the cases found in a
+baseline file and exits non-zero if any got slower than the threshold
+allows, e.g. after a pandas upgrade.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_ma_strategy
+from .correlation import correlation_analysis
+from .evaluation import walk_forward
+from .exits import exit_sweep
+from .indicators import compute_ma, compute_macd, compute_rsi, latest_indicators
+from .optimizer import FrontierEngine, estimate
+from .portfolio import backtest_portfolio, equal_weights, ma_signals
+from .ranges import get_potential_range
+from .risk import calculate_max_drawdown, calculate_volatility
+from .screener import score_asset, score_frame
+from .signals import signal_backtest
+
+# (rows, tickers) grids. Cases above `max_cells` rows x tickers are skipped.
+SIZES = {
+    "quick": {"rows": [1_000, 10_000], "tickers": [1, 10]},
+    "full": {"rows": [1_000, 100_000, 1_000_000, 10_000_000], "tickers": [1, 10, 100, 1000]},
+}
+MAX_CELLS = 20_000_000
+THRESHOLD = 0.25
+MIN_DELTA = 0.001
+
+
+# Driftless log-normal random walk starting at 100. Per-bar volatility is
+# scaled down for long series so that the walk's total spread stays that of
+# about 10k bars at `vol` and prices never overflow.
+def _random_walk(rng, rows, tickers=None, vol=0.02):
+    vol = vol * min(1.0, np.sqrt(10_000 / rows))
+    shape = rows if tickers is None else (rows, tickers)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0, vol, shape), axis=0)), vol
+
+
+# Daily bars up to 50k rows, minute bars beyond (daily dates would run past
+# the Timestamp range)
+def _dates(rows):
+    return pd.date_range("2000-01-01", periods=rows, freq="D" if rows <= 50_000 else "min", name="Date")
+
+
+# Deterministic OHLCV frame: a random walk for Close, with Open, High, Low
+# and Volume derived from it
+def synthetic_ohlcv(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close, vol = _random_walk(rng, rows)
+    open_ = np.concatenate([[100.0], close[:-1]])
+    spread = np.abs(rng.normal(0, vol / 2, rows))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + spread),
+        "Low": np.minimum(open_, close) * (1 - spread),
+        "Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, rows).astype(float),
+    }, index=_dates(rows))
+
+
+# Deterministic (rows x tickers) close matrix
+def synthetic_closes(rows, tickers, seed=0):
+    close, _ = _random_walk(np.random.default_rng(seed), rows, tickers)
+    return pd.DataFrame(close, index=_dates(rows), columns=[f"T{i:04d}" for i in range(tickers)])
+
+
+# Each case maps (rows, tickers) to a zero-argument callable; data is built
+# outside the timed call. Per-series functions only run with one ticker;
+# the indicator functions also run on the whole matrix at once.
+def _single(fn):
+    def setup(rows, tickers):
+        if tickers != 1:
+            return None
+        data = synthetic_ohlcv(rows)
+        return lambda: fn(data)
+    return setup
+
+
+def _matrix(fn):
+    def setup(rows, tickers):
+        closes = synthetic_closes(rows, tickers)
+        return lambda: fn(closes)
+    return setup
+
+
+def _score_asset(rows, tickers):
+    latest = latest_indicators(synthetic_closes(rows, tickers), short_window=20, long_window=100)
+    forecasts = dict.fromkeys(latest.index, "up")
+    return lambda: [score_asset(latest.loc[t], forecasts[t]) for t in latest.index]
+
+
+def _score_frame(rows, tickers):
+    latest = latest_indicators(synthetic_closes(rows, tickers), short_window=20, long_window=100)
+    forecasts = dict.fromkeys(latest.index, "up")
+    return lambda: score_frame(latest, forecasts)
+
+
+def _backtest_portfolio(rows, tickers):
+    closes = synthetic_closes(rows, tickers)
+    weights = equal_weights(ma_signals(closes, 20, 100))
+    return lambda: backtest_portfolio(closes, weights, rebalance="signal")
+
+
+# Cold solve: a fresh engine each call, so nothing is served from its cache
+def _efficient_frontier(rows, tickers):
+    if tickers < 2:
+        return None
+    mu, cov, _ = estimate(synthetic_closes(rows, tickers).pct_change())
+    return lambda: FrontierEngine().optimize("bench", mu, cov)
+
+
+CASES = {
+    "compute_rsi": _matrix(compute_rsi),
+    "compute_macd": _matrix(compute_macd),
+    "compute_ma": _matrix(compute_ma),
+    "backtest_ma_strategy": _single(lambda d: backtest_ma_strategy(d, 20, 100)),
+    "backtest_portfolio": _backtest_portfolio,
+    "get_potential_range": _single(lambda d: get_potential_range(d["Close"], 7, 0.95)),
+    "calculate_volatility": _single(lambda d: calculate_volatility(d["Close"])),
+    "calculate_max_drawdown": _single(lambda d: calculate_max_drawdown(d["Close"])),
+    "efficient_frontier": _efficient_frontier,
+    "walk_forward": _matrix(lambda c: walk_forward(c, workers=1)),
+    "correlation_analysis": _matrix(lambda c: correlation_analysis(c.pct_change(), keep_matrix=False)),
+    "signal_backtest": _matrix(lambda c: signal_backtest(c, "score")),
+    # 36 exit settings per ticker
+    "exit_sweep": _matrix(lambda c: exit_sweep(c, 20, 100, (0, 0.05, 0.1), (0, 0.1), (0, 0.1, 0.2), (0, 60))),
+    "score_asset": _score_asset,
+    "score_frame": _score_frame,
+}
+
+
+def case_id(name, rows, tickers):
+    return f"{name}[rows={rows},tickers={tickers}]"
+
+
+def parse_case_id(key):
+    name, params = key[:-1].split("[")
+    values = dict(p.split("=") for p in params.split(","))
+    return name, int(values["rows"]), int(values["tickers"])
+
+
+# Best-of-`repeat` wall time after one warm-up call; fast cases keep
+# repeating until `min_time` has passed, slow ones stop after `max_time`.
+def measure(fn, repeat=5, min_time=0.2, max_time=10.0):
+    fn()
+    times = []
+    started = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        if elapsed > max_time or len(times) >= 1000:
+            break
+        if len(times) >= repeat and elapsed >= min_time:
+            break
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "median_seconds": float(np.median(times)), "runs": len(times), "peak_bytes": peak}
+
+
+# Every (case, rows, tickers) combination of a size profile, optionally
+# filtered by substring
+def plan(sizes="quick", only=None, max_cells=MAX_CELLS):
+    grid = SIZES[sizes]
+    return [(name, rows, tickers)
+            for name in CASES if not only or any(o in name for o in only)
+            for rows in grid["rows"] for tickers in grid["tickers"]
+            if rows * tickers <= max_cells]
+
+
+def run(cases, repeat=5, log=None):
+    results = {}
+    for name, rows, tickers in cases:
+        fn = CASES[name](rows, tickers)
+        if fn is None:
+            continue
+        key = case_id(name, rows, tickers)
+        results[key] = {"rows": rows, "tickers": tickers, **measure(fn, repeat)}
+        del fn
+        gc.collect()
+        if log:
+            log(f"{key:60s} {results[key]['seconds'] * 1e3:10.2f} ms {results[key]['peak_bytes'] / 2**20:9.1f} MiB")
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+# Cases whose best time grew by more than `threshold` (0.25 = 25%) against
+# the baseline. Sub-millisecond cases are mostly timer and interpreter noise,
+# so a slowdown must also exceed `min_delta` seconds to count.
+# Returns {case: (baseline seconds, current seconds, ratio)}.
+def regressions(baseline, current, threshold=THRESHOLD, min_delta=MIN_DELTA):
+    slower = {}
+    for key, result in current.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]["seconds"]
+        ratio = result["seconds"] / before
+        if ratio > 1 + threshold and result["seconds"] - before > min_delta:
+            slower[key] = (before, result["seconds"], ratio)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m analytics.bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="quick", choices=list(SIZES))
+    parser.add_argument("--only", nargs="+", help="run cases whose name contains any of these")
+    parser.add_argument("--max-cells", type=int, default=MAX_CELLS, help="skip cases above rows x tickers")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file; rerun its cases and check for regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        cases = [parse_case_id(k) for k in baseline["results"] if parse_case_id(k)[0] in CASES]
+        if args.only:
+            cases = [c for c in cases if any(o in c[0] for o in args.only)]
+    else:
+        cases = plan(args.sizes, args.only, args.max_cells)
+
+    results = run(cases, args.repeat, log=print)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"saved {len(results)} results to {args.save}")
+    if baseline is None:
+        return 0
+
+    slower = regressions(baseline["results"], results, args.threshold)
+    if baseline.get("environment") != environment():
+        print(f"note: baseline recorded on {baseline.get('environment')}")
+    for key, (before, after, ratio) in slower.items():
+        print(f"REGRESSION {key}: {before * 1e3:.2f} ms -> {after * 1e3:.2f} ms ({ratio:.2f}x)")
+    print(f"{len(slower)} of {len(results)} cases slower than {1 + args.threshold:.2f}x baseline")
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Memory-bounded cache for results derived from stored price data.
+
+Indicators, returns, drawdowns and backtests computed by one page are kept
+for every other page and session in the process. Entries are keyed by
+``(ticker, data version, name, params)``, or for results over several
+assets ``(tickers, versions, name, params)`` with one version per ticker:
+the store gives each ticker's frame a new version whenever new bars arrive,
+so results computed on older data are never served again and are dropped
+straight away, including every multi-asset entry that used the ticker.
+
+The cache holds at most ``max_bytes`` of array data (``ANALYTICS_CACHE_MB``,
+256 MiB by default) and evicts the least recently used entries beyond
+that. Values are handed out without copying: NumPy arrays are made
+read-only, and pandas objects are returned as shallow copies, which under
+copy-on-write share the cached buffers but copy them on the first write.
+Concurrent misses on one key run the computation once; the other callers
+wait for it (see ``analytics.singleflight``).
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import perf
+from .singleflight import SingleFlight
+
+MAX_BYTES = int(float(os.environ.get("ANALYTICS_CACHE_MB", 256)) * 2**20)
+
+
+# Bytes held by a cached value. Indexes are not counted: derived series
+# share the index of the stored frame they were computed from.
+def sizeof(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=False, deep=False))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=False, deep=False).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            _freeze(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    return value
+
+
+def _share(value):
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_share(v) for v in value)
+    if isinstance(value, list):
+        return [_share(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _share(v) for k, v in value.items()}
+    return value
+
+
+# Whether an entry key was computed from `ticker` (at `version`, if given)
+def _uses(key, ticker, version=None):
+    tickers, versions = key[0], key[1]
+    if isinstance(tickers, tuple):
+        return any(t == ticker and (version is None or v == version) for t, v in zip(tickers, versions))
+    return tickers == ticker and (version is None or versions == version)
+
+
+class DerivedCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached value for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _share(entry[0])
+
+    # Store `value` under `key`. A value larger than the whole budget is
+    # not kept.
+    def put(self, key, value):
+        return _share(self._put(key, value))
+
+    def _put(self, key, value):
+        value = _freeze(value)
+        size = sizeof(value)
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted
+                    self.evictions += 1
+        return value
+
+    # Cached value for `key`, or compute() stored under it. Every caller
+    # gets its own shallow copy of the one computed value.
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is not None:
+            return value
+        return _share(self._flights.do(key, self._compute, key, compute))
+
+    def _compute(self, key, compute):
+        # Another computation of this key may have finished since get() missed
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            self.misses += 1
+        return self._put(key, compute())
+
+    # get_or_compute for several tickers at once. `keys` maps each ticker to
+    # its key; compute_many(missing tickers) returns {ticker: value} for the
+    # misses. Concurrent calls with the same missing keys compute once.
+    def get_or_compute_many(self, keys, compute_many):
+        found = {t: self.get(k) for t, k in keys.items()}
+        missing = [t for t, v in found.items() if v is None]
+        if missing:
+            batch = ("batch",) + tuple(keys[t] for t in missing)
+            computed = self._flights.do(batch, self._compute_many, keys, missing, compute_many)
+            found.update({t: _share(v) for t, v in computed.items()})
+        return {t: v for t, v in found.items() if v is not None}
+
+    def _compute_many(self, keys, missing, compute_many):
+        with self._lock:
+            self.misses += len(missing)
+        results = compute_many(missing)
+        return {t: self._put(keys[t], results[t]) for t in missing if t in results}
+
+    # Drop the entries computed from a ticker's data, single- or multi-asset,
+    # only those computed on `version` if given
+    def invalidate(self, ticker, version=None):
+        with self._lock:
+            for key in [k for k in self._entries if _uses(k, ticker, version)]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+derived_cache = DerivedCache()
+
+
+# Look up or compute one derived result, recorded as a cache hit or miss span
+def cached(key, compute):
+    def run():
+        perf.miss()
+        return compute()
+
+    with perf.span(f"derived {key[2]}", cache="hit"):
+        return derived_cache.get_or_compute(key, run)
+
+
+# cached() for a batch of tickers; see DerivedCache.get_or_compute_many
+def cached_many(keys, compute_many):
+    def run(missing):
+        perf.miss()
+        return compute_many(missing)
+
+    name = next(iter(keys.values()))[2] if keys else ""
+    with perf.span(f"derived {name}", cache="hit", rows=len(keys)):
+        return derived_cache.get_or_compute_many(keys, run)
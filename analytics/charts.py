@@ -0,0 +1,203 @@
+"""Chart helpers: downsampling to screen resolution and a rendered-figure cache.
+
+A chart is never wider than a few thousand pixels, so drawing more points
+than that only costs time. ``downsample`` reduces a series with LTTB
+(largest-triangle-three-buckets, keeps the visual shape) or min-max (keeps
+every spike) before it is plotted; ``zoom_slider`` lets a page slice the full
+resolution data to a date range first, so zooming in shows every bar again.
+
+``cached_figure`` keeps built Plotly figures and rendered Matplotlib PNGs
+keyed by a hash of their input data and parameters, so a rerun triggered by
+an unrelated widget does not redraw unchanged charts.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import perf
+from .singleflight import SingleFlight
+
+TARGET_POINTS = 1200
+
+
+def _as_float(x):
+    if isinstance(x, pd.Index) and isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(float)
+    return np.asarray(x, dtype=float)
+
+
+# Indices of the points LTTB keeps; the first and last points are always kept
+def lttb_indices(x, y, n_out):
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    # Bucket means from prefix sums, used as the third triangle vertex
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            next_end = edges[i + 2]
+            count = next_end - end
+            avg_x = (cx[next_end] - cx[end]) / count
+            avg_y = (cy[next_end] - cy[end]) / count
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+# Indices of the minimum and maximum of each of n_out / 2 equal buckets
+def minmax_indices(y, n_out):
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(buckets, size)
+    valid = ~np.isnan(blocks).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    lo = np.nanargmin(blocks[valid], axis=1) + offsets
+    hi = np.nanargmax(blocks[valid], axis=1) + offsets
+    return np.unique(np.concatenate([[0, n - 1], lo, hi]))
+
+
+# Reduce a Series (or each column of a DataFrame) to about `n_out` points.
+# NaNs (e.g. the warm-up of a moving average) are dropped first. For a
+# DataFrame the union of every column's kept rows is returned.
+def downsample(data, n_out=TARGET_POINTS, method="lttb"):
+    if isinstance(data, pd.DataFrame):
+        keep = set()
+        for column in data.columns:
+            series = data[column].dropna()
+            keep.update(series.index[_indices(series, n_out, method)])
+        return data.loc[data.index.isin(keep)]
+    series = data.dropna()
+    if len(series) <= n_out:
+        return series
+    return series.iloc[_indices(series, n_out, method)]
+
+
+def _indices(series, n_out, method):
+    if method == "lttb":
+        x = series.index if isinstance(series.index, pd.DatetimeIndex) else np.arange(len(series))
+        return lttb_indices(x, series.to_numpy(dtype=float), n_out)
+    if method == "minmax":
+        return minmax_indices(series.to_numpy(dtype=float), n_out)
+    raise ValueError(f"Unknown downsampling method: {method!r}")
+
+
+def _update(digest, part):
+    if isinstance(part, (pd.Series, pd.DataFrame)):
+        digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        if isinstance(part, pd.DataFrame):
+            digest.update(repr(list(part.columns)).encode())
+    elif isinstance(part, np.ndarray):
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, (list, tuple)):
+        for item in part:
+            _update(digest, item)
+    else:
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+
+
+def data_key(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+class FigureCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    # Concurrent builds of one key run once; the other callers wait for it
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        return self._flights.do(key, self._build, key, build)
+
+    def _build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+_figures = FigureCache()
+
+
+# Build (or reuse) a figure for `parts`, which should include every input
+# the builder reads - data and display parameters alike. Matplotlib figures
+# are rendered to PNG bytes (for st.image) and closed; Plotly figures are
+# returned as built.
+def cached_figure(parts, build):
+    def render():
+        perf.miss()
+        fig = build()
+        if hasattr(fig, "savefig"):
+            return render_png(fig)
+        return fig
+
+    with perf.span(f"render {parts[0]}", "render", cache="hit"):
+        return _figures.get_or_build(data_key(*parts), render)
+
+
+def render_png(fig, dpi=100):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+# Date-range slider for a chart. Returns (start, end) timestamps; slicing the
+# full-resolution data to this range before downsampling is what lets a
+# zoomed chart show every bar.
+def zoom_slider(index, key, label="🔍 Zoom Range"):
+    import streamlit as st
+
+    if len(index) < 2:
+        return None, None
+    first, last = index[0].to_pydatetime(), index[-1].to_pydatetime()
+    start, end = st.slider(label, min_value=first, max_value=last, value=(first, last), key=key)
+    return pd.Timestamp(start), pd.Timestamp(end)
+
+
+def zoom(data, start, end):
+    if start is None:
+        return data
+    return data.loc[(data.index >= start) & (data.index <= end)]
@@ -0,0 +1,154 @@
+"""Batch runner for the analytics without a UI process.
+
+    python -m analytics score backtest risk range --universe sp500.csv \
+        --period 1y --out results --format parquet --workers 8
+
+Data for every ticker is loaded once, with one batched store refresh, in
+the parent process. The tickers are then split into chunks that worker
+processes compute independently, and each task's rows are written to
+``<out>/<task>.<format>``. Nothing here imports Streamlit, Plotly or
+Matplotlib.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .backtest import backtest_ma_strategy, backtest_summary
+from .ranges import get_potential_range
+from .risk import aligned_returns, risk_summary
+from .screener import read_universe, score_closes
+from .store import PERIODS, load_many
+
+TASKS = ["score", "backtest", "risk", "range"]
+FORMATS = ["parquet", "csv"]
+
+log = logging.getLogger("analytics.cli")
+
+
+def _score(frames, options):
+    closes = {t: f["Close"] for t, f in frames.items()}
+    return score_closes(closes, options["days_forward"]).set_index("Ticker")
+
+
+def _backtest(frames, options):
+    rows = {}
+    for ticker, data in frames.items():
+        result, _, _ = backtest_ma_strategy(data, options["short_window"], options["long_window"])
+        rows[ticker] = backtest_summary(result)
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def _risk(frames, options):
+    returns = aligned_returns({t: f["Close"] for t, f in frames.items()})
+    return risk_summary(returns, options["confidence"])
+
+
+def _range(frames, options):
+    rows = {}
+    for ticker, data in frames.items():
+        close = data["Close"].dropna()
+        lower, upper, vol = get_potential_range(close, options["days_forward"], options["confidence"])
+        rows[ticker] = {"Last Price": close.iloc[-1], "Lower Bound": lower, "Upper Bound": upper, "Volatility": vol}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+RUNNERS = {"score": _score, "backtest": _backtest, "risk": _risk, "range": _range}
+
+
+def _run_chunk(args):
+    tasks, frames, options = args
+    return {task: RUNNERS[task](frames, options) for task in tasks}
+
+
+def _chunks(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# Run `tasks` for every ticker. Returns ({task: DataFrame indexed by ticker},
+# {ticker: error}) for tickers that could not be loaded.
+def run(tickers, tasks=TASKS, period="1y", workers=None, chunk_size=50, **options):
+    options = {"days_forward": 7, "confidence": 0.95, "short_window": 20, "long_window": 100, **options}
+    frames, errors = load_many(tickers, period, wait=True)
+    frames = {t: f for t, f in frames.items() if len(f["Close"].dropna()) > 2}
+    jobs = [(tasks, {t: frames[t] for t in chunk}, options) for chunk in _chunks(frames, chunk_size)]
+    if workers == 1 or len(jobs) <= 1:
+        parts = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    results = {}
+    for task in tasks:
+        tables = [p[task] for p in parts if not p[task].empty]
+        table = pd.concat(tables) if tables else pd.DataFrame()
+        table.index.name = "Ticker"
+        results[task] = table
+    return results, errors
+
+
+def write(results, out, fmt="parquet"):
+    os.makedirs(out, exist_ok=True)
+    paths = []
+    for task, table in results.items():
+        path = os.path.join(out, f"{task}.{fmt}")
+        if fmt == "parquet":
+            table.to_parquet(path)
+        else:
+            table.to_csv(path)
+        paths.append(path)
+    return paths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m analytics", description=__doc__.split("\n\n")[0])
+    parser.add_argument("tasks", nargs="*", metavar="task",
+                        help=f"tasks to run: {', '.join(TASKS)} (default: all)")
+    parser.add_argument("--tickers", nargs="+", default=[], help="ticker symbols")
+    parser.add_argument("--universe", help="universe file (CSV with a Symbol column, or one ticker per line)")
+    parser.add_argument("--period", default="1y", choices=list(PERIODS))
+    parser.add_argument("--days-forward", type=int, default=7, help="forecast / range horizon in bars")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--short-window", type=int, default=20)
+    parser.add_argument("--long-window", type=int, default=100)
+    parser.add_argument("--out", default="results", help="output directory")
+    parser.add_argument("--format", default="parquet", choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=50, help="tickers per worker job")
+    args = parser.parse_args(argv)
+    args.tasks = list(dict.fromkeys(args.tasks)) or TASKS
+    unknown = [t for t in args.tasks if t not in TASKS]
+    if unknown:
+        parser.error(f"unknown task(s): {', '.join(unknown)}")
+    if not args.tickers and not args.universe:
+        parser.error("pass --tickers and/or --universe")
+    return args
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    tickers = list(args.tickers)
+    if args.universe:
+        tickers += read_universe(args.universe)
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+
+    started = time.perf_counter()
+    results, errors = run(tickers, args.tasks, args.period, args.workers, args.chunk_size,
+                          days_forward=args.days_forward, confidence=args.confidence,
+                          short_window=args.short_window, long_window=args.long_window)
+    for ticker, error in errors.items():
+        log.warning("skipped %s: %s", ticker, error)
+    for path in write(results, args.out, args.format):
+        log.info("wrote %s", path)
+    log.info("%d tickers, %d tasks in %.1fs", len(tickers), len(args.tasks), time.perf_counter() - started)
+    return 1 if len(errors) == len(tickers) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Pairwise and rolling correlation over large asset universes.
+
+Correlations are pairwise-complete (each pair over the bars both assets
+have) and are computed block by block: a pair of column blocks costs a few
+matrix products of (bars x block) arrays, so working memory is set by
+``block_size`` rather than by the number of pairs. ``correlation_analysis``
+makes one pass over the blocks and keeps the k most and least correlated
+pairs as it goes; the full matrix is only assembled when asked for.
+
+Returns come from ``calendar_returns``, which puts 24/7 crypto and
+exchange-hours equities on one calendar: the dates on which most of the
+listed assets traded. An asset's close is carried to the next such date, so a
+crypto weekend lands in Monday's return instead of being compared with
+equity bars that do not exist.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .risk import _window_sums
+
+BLOCK_SIZE = 512
+MIN_PERIODS = 20
+
+
+# Returns on the calendar of dates where more than `min_share` of the assets
+# listed at the time (between their first and last close) have a close.
+# Each asset's last close is carried forward onto the calendar; bars before
+# listing and after delisting stay NaN.
+def calendar_returns(closes, min_share=0.5):
+    prices = pd.DataFrame({t: s.dropna() for t, s in closes.items() if len(s.dropna())}).sort_index()
+    if prices.empty:
+        return prices
+    present = prices.notna().to_numpy()
+    listed = np.maximum.accumulate(present, axis=0) & np.maximum.accumulate(present[::-1], axis=0)[::-1]
+    share = present.sum(axis=1) / np.maximum(listed.sum(axis=1), 1)
+    filled = prices.ffill().where(listed)
+    return filled[share > min_share].pct_change(fill_method=None).iloc[1:]
+
+
+# Column blocks of an (bars x assets) array, demeaned per column with NaN as 0
+def _prepare(returns):
+    values = returns.to_numpy(dtype=float)
+    mask = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        mean = np.nanmean(np.where(mask.any(axis=0), values, 0.0), axis=0)
+    x = np.where(mask, values - mean, 0.0)
+    return x, mask.astype(float)
+
+
+# Pairwise-complete correlations between column blocks a and b, NaN where
+# the pair shares fewer than `min_periods` bars or one side is constant
+def _block_corr(xa, ma, xb, mb, min_periods):
+    n = ma.T @ mb
+    sx, sy = xa.T @ mb, ma.T @ xb
+    sxx, syy = (xa * xa).T @ mb, ma.T @ (xb * xb)
+    sxy = xa.T @ xb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var = (sxx - sx * sx / n) * (syy - sy * sy / n)
+        corr = cov / np.sqrt(var)
+    return np.where((n >= min_periods) & (var > 0), np.clip(corr, -1, 1), np.nan)
+
+
+# Every pair of column blocks (i0, j0) with j0 >= i0, with its correlations
+def correlation_blocks(returns, block_size=BLOCK_SIZE, min_periods=MIN_PERIODS):
+    x, mask = _prepare(returns)
+    n_assets = x.shape[1]
+    for i0 in range(0, n_assets, block_size):
+        i1 = min(i0 + block_size, n_assets)
+        for j0 in range(i0, n_assets, block_size):
+            j1 = min(j0 + block_size, n_assets)
+            yield i0, j0, _block_corr(x[:, i0:i1], mask[:, i0:i1], x[:, j0:j1], mask[:, j0:j1], min_periods)
+
+
+# Merge a block's pairs into the running top k (largest if sign=1, smallest
+# if sign=-1). `best` is (values, rows, cols) of the pairs kept so far.
+def _merge_top(best, values, rows, cols, k, sign):
+    values = np.concatenate([best[0], values])
+    rows = np.concatenate([best[1], rows])
+    cols = np.concatenate([best[2], cols])
+    if len(values) > k:
+        keep = np.argpartition(-sign * values, k - 1)[:k]
+        values, rows, cols = values[keep], rows[keep], cols[keep]
+    return values, rows, cols
+
+
+def _pairs_frame(best, columns, sign):
+    values, rows, cols = best
+    order = np.argsort(-sign * values, kind="stable")
+    return pd.DataFrame({
+        "Asset A": columns[rows[order]],
+        "Asset B": columns[cols[order]],
+        "Correlation": values[order],
+    })
+
+
+# One pass over the correlation blocks. Returns (matrix, most, least):
+# matrix is the full (asset x asset) float32 correlation DataFrame, or None
+# unless keep_matrix; most/least are the k highest and lowest correlated
+# pairs. Memory beyond the matrix is one block pair plus 2k pairs.
+def correlation_analysis(returns, k=20, keep_matrix=True, block_size=BLOCK_SIZE, min_periods=MIN_PERIODS):
+    columns = returns.columns
+    n_assets = len(columns)
+    matrix = np.full((n_assets, n_assets), np.nan, dtype=np.float32) if keep_matrix else None
+    empty = (np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    most, least = empty, empty
+    for i0, j0, block in correlation_blocks(returns, block_size, min_periods):
+        b_rows, b_cols = block.shape
+        if matrix is not None:
+            matrix[i0:i0 + b_rows, j0:j0 + b_cols] = block
+            matrix[j0:j0 + b_cols, i0:i0 + b_rows] = block.T
+        # Each pair once: the upper triangle of diagonal blocks
+        valid = ~np.isnan(block)
+        if i0 == j0:
+            valid &= np.triu(np.ones(block.shape, dtype=bool), 1)
+        r, c = np.nonzero(valid)
+        values = block[r, c]
+        if len(values) > k:
+            keep = np.concatenate([np.argpartition(-values, k - 1)[:k], np.argpartition(values, k - 1)[:k]])
+            r, c, values = r[keep], c[keep], values[keep]
+        most = _merge_top(most, values, r + i0, c + j0, k, 1)
+        least = _merge_top(least, values, r + i0, c + j0, k, -1)
+    if matrix is not None:
+        # Self-correlations come out as 1 up to rounding; assets with too few bars stay NaN
+        diagonal = np.diagonal(matrix)
+        np.fill_diagonal(matrix, np.where(np.isnan(diagonal), np.nan, 1.0))
+        matrix = pd.DataFrame(matrix, index=columns, columns=columns)
+    return matrix, _pairs_frame(most, columns, 1), _pairs_frame(least, columns, -1)
+
+
+# Column order that places correlated assets next to each other: average-
+# linkage hierarchical clustering on the distance sqrt((1 - corr) / 2).
+# Without SciPy, assets are ordered along the matrix's leading eigenvector.
+def cluster_order(corr):
+    values = np.nan_to_num(np.asarray(corr, dtype=float), nan=0.0)
+    np.fill_diagonal(values, 1.0)
+    if len(values) < 3:
+        return list(corr.columns)
+    try:
+        from scipy.cluster.hierarchy import leaves_list, linkage
+        from scipy.spatial.distance import squareform
+    except ImportError:
+        _, vectors = np.linalg.eigh(values)
+        return list(corr.columns[np.argsort(vectors[:, -1])])
+    distance = np.sqrt(np.clip((1 - values) / 2, 0, 1))
+    np.fill_diagonal(distance, 0.0)
+    tree = linkage(squareform(distance, checks=False), method="average")
+    return list(corr.columns[leaves_list(tree)])
+
+
+# Rolling correlation of every column with `target` over `window` bars,
+# pairwise-complete within each window, from cumulative sums (O(bars x
+# assets)). Windows with fewer than `min_periods` joint bars are NaN.
+def rolling_correlation(returns, target, window, min_periods=None):
+    min_periods = min_periods or max(2, window // 2)
+    index, columns = returns.index, returns.columns
+    out = np.full((len(index), len(columns)), np.nan)
+    if len(index) >= window:
+        values = returns.to_numpy(dtype=float)
+        y_all = returns[target].to_numpy(dtype=float)[:, None]
+        joint = ~np.isnan(values) & ~np.isnan(y_all)
+        x = np.where(joint, values, 0.0)
+        y = np.where(joint, y_all, 0.0)
+        n = _window_sums(joint.astype(float), window)
+        sx, sy = _window_sums(x, window), _window_sums(y, window)
+        sxx, syy, sxy = _window_sums(x * x, window), _window_sums(y * y, window), _window_sums(x * y, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sy / n
+            var = (sxx - sx * sx / n) * (syy - sy * sy / n)
+            corr = np.clip(cov / np.sqrt(var), -1, 1)
+        out[window - 1:] = np.where((n >= min_periods) & (var > 0), corr, np.nan)
+    return pd.DataFrame(out, index=index, columns=columns).drop(columns=target)
+
+
+# Block-average a square matrix down to at most `size` rows and columns
+# for display, keeping its order. Labels are each block's first asset.
+def coarsen(matrix, size=200):
+    n = len(matrix)
+    if n <= size:
+        return matrix
+    edges = np.linspace(0, n, size + 1).astype(int)
+    values = np.nan_to_num(matrix.to_numpy(dtype=float), nan=0.0)
+    rows = np.add.reduceat(values, edges[:-1], axis=0)
+    blocks = np.add.reduceat(rows, edges[:-1], axis=1)
+    counts = np.diff(edges)
+    labels = matrix.index[edges[:-1]]
+    return pd.DataFrame(blocks / np.outer(counts, counts), index=labels, columns=labels)
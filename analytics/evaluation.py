@@ -0,0 +1,202 @@
+"""Walk-forward (rolling-origin) evaluation of the forecast methods.
+
+Each method is rerun at every historical origin using only the bars up to
+and including that origin, and its forecasts h bars ahead are scored against
+the closes that followed. Rather than refitting from scratch per origin, each
+method carries running statistics through the series in one pass:
+
+    sma     rolling mean of the last ``window`` closes from one cumulative sum
+    naive   the last close
+    linear  expanding least-squares trend from cumulative sums of t, y, t*t, t*y
+    ar      expanding AR(p) from cumulative lagged cross-products, with all
+            origins solved in one batched call
+    holt    one filter pass whose level and trend at each origin give its
+            forecast; alpha/beta are chosen by the usual grid search on the
+            bars before the ticker's first origin, not refitted per origin
+
+linear and ar match what ``ForecastEngine`` would fit on the same bars; sma
+matches ``simple_moving_average_forecast``. Work is split into (ticker,
+block of origins) jobs that run in a process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .forecast import holt_filter, holt_fit
+
+METHODS = ["sma", "naive", "holt", "ar", "linear"]
+HORIZONS = [1, 5, 14]
+MIN_TRAIN = 60
+ORIGIN_BLOCK = 2000
+# Below this many origins in total, starting worker processes costs more
+# than it saves
+PARALLEL_MIN_ORIGINS = 20_000
+
+
+def _sma(x, origins, horizon, window=5, **_):
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    mean = (c[origins + 1] - c[origins + 1 - window]) / window
+    return np.repeat(mean[:, None], horizon, axis=1)
+
+
+def _naive(x, origins, horizon, **_):
+    return np.repeat(x[origins][:, None], horizon, axis=1)
+
+
+# Least-squares line through log prices 0..o for every origin o
+def _linear(x, origins, horizon, **_):
+    y = np.log(x)
+    t = np.arange(len(y), dtype=float)
+    n = origins + 1.0
+    st, sy = np.cumsum(t)[origins], np.cumsum(y)[origins]
+    stt, sty = np.cumsum(t * t)[origins], np.cumsum(t * y)[origins]
+    var = stt - st * st / n
+    slope = np.where(var > 0, (sty - st * sy / n) / np.where(var > 0, var, 1), 0.0)
+    intercept = sy / n - slope * st / n
+    steps = origins[:, None] + np.arange(1, horizon + 1)[None, :]
+    return np.exp(intercept[:, None] + slope[:, None] * steps)
+
+
+# AR(p) on log returns fitted on returns 0..o-1 for every origin o. Row j of
+# the design is [1, r[j-1], ..., r[j-p]] for target r[j]; the normal
+# equations at each origin are the sums up to before the block plus a
+# cumulative sum over the block, so memory is per block, not per series.
+def _ar(x, origins, horizon, ar_order=5, ridge=1e-8, **_):
+    p = ar_order
+    y = np.log(x)
+    r = np.diff(y)
+    design = np.column_stack([np.ones(len(r) - p)] + [r[p - k - 1:len(r) - k - 1] for k in range(p)])
+    target = r[p:]
+    # Rows used at origin o: targets j = p..o-1, i.e. design rows [0, o - p)
+    used = np.clip(origins - p, 0, len(design))
+    first, last = used.min(), used.max()
+    base_xtx = design[:first].T @ design[:first]
+    base_xty = design[:first].T @ target[:first]
+    block = design[first:last]
+    xtx = np.concatenate([np.zeros((1, p + 1, p + 1)), np.cumsum(block[:, :, None] * block[:, None, :], axis=0)])
+    xty = np.concatenate([np.zeros((1, p + 1)), np.cumsum(block * target[first:last, None], axis=0)])
+    xtx = base_xtx + xtx[used - first] + ridge * np.eye(p + 1)
+    xty = base_xty + xty[used - first]
+    params = np.zeros((len(origins), p + 1))
+    enough = used > 3 * (p + 1)
+    if enough.any():
+        params[enough] = np.linalg.solve(xtx[enough], xty[enough][:, :, None])[:, :, 0]
+
+    # Iterate the fitted recursions forward, every origin at once
+    lags = origins[:, None] - 1 - np.arange(p)[None, :]
+    recent = np.where(lags >= 0, r[np.maximum(lags, 0)], 0.0)
+    level = y[origins]
+    out = np.empty((len(origins), horizon))
+    for h in range(horizon):
+        step = params[:, 0] + (params[:, 1:] * recent).sum(axis=1)
+        level = level + step
+        out[:, h] = level
+        recent = np.concatenate([step[:, None], recent[:, :-1]], axis=1)
+    return np.exp(out)
+
+
+# Holt on log prices with alpha/beta from the bars up to `train_end`; the
+# level and trend after each bar come from one filter pass
+def _holt(x, origins, horizon, train_end=None, **_):
+    y = np.log(x)
+    train_end = origins[0] if train_end is None else train_end
+    params, _ = holt_fit(y[:train_end + 1, None])
+    levels, trends = holt_filter(y[:origins[-1] + 1, None], params)
+    levels, trends = levels[:, 0], trends[:, 0]
+    steps = np.arange(1, horizon + 1)[None, :]
+    return np.exp(levels[origins][:, None] + steps * trends[origins][:, None])
+
+
+FORECASTERS = {"sma": _sma, "naive": _naive, "holt": _holt, "ar": _ar, "linear": _linear}
+
+
+# Origins evaluated for a series of n bars: every `step`-th bar from the one
+# that completes `min_train` bars, with at least one bar after it
+def origins_for(n, min_train=MIN_TRAIN, step=1, max_origins=None):
+    origins = np.arange(min_train - 1, n - 1, step)
+    if max_origins is not None:
+        origins = origins[-max_origins:]
+    return origins
+
+
+# Error sums for one series and a block of origins: a (method x horizon x 5)
+# array of absolute error, absolute percentage error, direction hits, origins
+# where both the forecast and the price moved, and forecasts scored. A flat
+# forecast (naive) calls no direction, so it gets no hit rate.
+def _score_block(x, origins, horizons, methods, options):
+    n = len(x)
+    sums = np.zeros((len(methods), len(horizons), 5))
+    for m, method in enumerate(methods):
+        forecast = FORECASTERS[method](x, origins, max(horizons), **options)
+        for k, h in enumerate(horizons):
+            scored = origins + h < n
+            o = origins[scored]
+            if not len(o):
+                continue
+            actual, predicted, last = x[o + h], forecast[scored, h - 1], x[o]
+            error = np.abs(predicted - actual)
+            called = (actual != last) & (predicted != last)
+            hits = called & (np.sign(predicted - last) == np.sign(actual - last))
+            sums[m, k] = [error.sum(), (error / actual).sum(), hits.sum(), called.sum(), len(o)]
+    return sums
+
+
+def _job(args):
+    ticker, x, origins, horizons, methods, options = args
+    return ticker, _score_block(x, origins, horizons, methods, options)
+
+
+def _frame(sums, index):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "MAE": sums[..., 0] / sums[..., 4],
+            "MAPE": sums[..., 1] / sums[..., 4],
+            "Hit Rate": sums[..., 2] / sums[..., 3],
+            "Forecasts": sums[..., 4].astype(int),
+        }, index=index)
+
+
+# Walk-forward scores of `methods` at `horizons` over every ticker in
+# `closes`. Returns (summary indexed by Method/Horizon, pooled over all
+# tickers and origins; per-ticker table indexed by Ticker/Method/Horizon).
+# MAE is in price units, so the pooled value is dominated by high-priced
+# tickers; MAPE and Hit Rate compare across tickers.
+def walk_forward(closes, methods=METHODS, horizons=HORIZONS, min_train=MIN_TRAIN, step=1, max_origins=None,
+                 window=5, ar_order=5, workers=None, origin_block=ORIGIN_BLOCK):
+    unknown = [m for m in methods if m not in FORECASTERS]
+    if unknown:
+        raise ValueError(f"Unknown forecast methods: {unknown}")
+    methods, horizons = list(methods), sorted(set(int(h) for h in horizons))
+    min_train = max(min_train, window, 4 * (ar_order + 1) + 1)
+    jobs = []
+    for ticker, close in closes.items():
+        x = np.asarray(pd.Series(close).dropna(), dtype=float)
+        origins = origins_for(len(x), min_train, step, max_origins)
+        if not len(origins):
+            continue
+        # Blocks of one ticker's origins share its Holt parameters
+        options = {"window": window, "ar_order": ar_order, "train_end": int(origins[0])}
+        for start in range(0, len(origins), origin_block):
+            jobs.append((ticker, x, origins[start:start + origin_block], horizons, methods, options))
+
+    if workers == 1 or len(jobs) <= 1 or sum(len(job[2]) for job in jobs) < PARALLEL_MIN_ORIGINS:
+        parts = [_job(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    tickers = list(dict.fromkeys(t for t, _ in parts))
+    sums = np.zeros((len(tickers), len(methods), len(horizons), 5))
+    position = {t: i for i, t in enumerate(tickers)}
+    for ticker, block in parts:
+        sums[position[ticker]] += block
+
+    per_ticker = _frame(sums.reshape(-1, 5), pd.MultiIndex.from_product(
+        [tickers, methods, horizons], names=["Ticker", "Method", "Horizon"]))
+    summary = _frame(sums.sum(axis=0).reshape(-1, 5), pd.MultiIndex.from_product(
+        [methods, horizons], names=["Method", "Horizon"]))
+    return summary, per_ticker
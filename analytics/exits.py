@@ -0,0 +1,214 @@
+"""Path-dependent exits for long/flat backtests.
+
+Stop-losses, trailing stops, take-profits and holding limits depend on the
+path since entry, so unlike the plain crossover they cannot be written as
+one array expression over time. ``exit_positions`` steps through the bars
+once and carries every column's state (in position, entry price, peak,
+bars held) as arrays, so each bar costs a few whole-array operations
+however many columns there are. A column is one (ticker, parameter set)
+pair: ``exit_sweep`` evaluates every ticker under every combination of
+exit parameters in the same pass, in chunks of ``CHUNK_COLUMNS`` so memory
+stays bounded. ``exit_positions_loop`` is the plain per-bar loop with the
+same rules, kept as the reference the kernel is checked against.
+
+Rules, all on closes and acted on at the next bar like the crossover:
+
+* a position opens on a bar where the entry signal turns on;
+* it closes on the first later bar where the close is at or below entry
+  price x (1 - stop_loss), at or below the highest close since entry x
+  (1 - trailing_stop), at or above entry price x (1 + take_profit), after
+  max_hold bars, or where the signal turns off, checked in that order;
+* after an exit the signal must turn off and on again to re-enter.
+
+A rule set to None or 0 is off.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_signal
+from .indicators import compute_ma, stack_closes
+
+CHUNK_COLUMNS = 4096
+EXIT_REASONS = ["Stop Loss", "Trailing Stop", "Take Profit", "Max Holding", "Signal"]
+PARAMETERS = ["Stop Loss", "Trailing Stop", "Take Profit", "Max Holding"]
+
+
+# Per-column thresholds with the rules that are off made unreachable
+def _thresholds(n, stop_loss, trailing_stop, take_profit, max_hold):
+    def column(value, off):
+        value = np.broadcast_to(np.asarray(np.nan if value is None else value, dtype=float), (n,))
+        return np.where(np.isnan(value) | (value <= 0), off, value)
+
+    return (1 - column(stop_loss, 1.0), 1 - column(trailing_stop, 1.0),
+            1 + column(take_profit, np.inf), column(max_hold, np.inf))
+
+
+def _kernel(close, signal, stop, trail, target, hold):
+    n_bars, n = close.shape
+    position = np.zeros((n_bars, n))
+    reason = np.zeros((n_bars, n), dtype=np.int8)
+    held = np.zeros(n, dtype=bool)
+    previous = np.zeros(n, dtype=bool)
+    # Entry price is NaN until a column's first entry, so the tests below are false
+    entry, peak, bars = np.full(n, np.nan), np.zeros(n), np.zeros(n)
+    codes = np.arange(1, len(EXIT_REASONS) + 1, dtype=np.int8)
+    for t in range(n_bars):
+        price, on = close[t], signal[t]
+        bars += held
+        peak = np.where(held, np.fmax(peak, price), peak)
+        code = np.select([
+            held & (price <= entry * stop),
+            held & (price <= peak * trail),
+            held & (price >= entry * target),
+            held & (bars >= hold),
+            held & ~on,
+        ], codes, 0)
+        held &= code == 0
+        entering = ~held & on & ~previous & (code == 0)
+        entry = np.where(entering, price, entry)
+        peak = np.where(entering, price, peak)
+        bars = np.where(entering, 0.0, bars)
+        held |= entering
+        position[t], reason[t] = held, code
+        previous = on
+    return position, reason
+
+
+# Positions (1 long, 0 flat) for every column of a (bar x column) close
+# matrix and its entry signal, with the exit rules applied. Rule parameters
+# are scalars or one value per column. Returns (position, reason): reason is
+# 1 + the index into EXIT_REASONS on a bar where a position was closed, else
+# 0. 1-D inputs give 1-D outputs.
+def exit_positions(close, signal, stop_loss=None, trailing_stop=None, take_profit=None, max_hold=None,
+                   chunk_columns=CHUNK_COLUMNS):
+    close = np.asarray(close, dtype=float)
+    signal = np.asarray(signal, dtype=bool)
+    single = close.ndim == 1
+    if single:
+        close, signal = close[:, None], signal[:, None]
+    thresholds = _thresholds(close.shape[1], stop_loss, trailing_stop, take_profit, max_hold)
+    position = np.zeros(close.shape)
+    reason = np.zeros(close.shape, dtype=np.int8)
+    for start in range(0, close.shape[1], chunk_columns):
+        cols = slice(start, start + chunk_columns)
+        position[:, cols], reason[:, cols] = _kernel(close[:, cols], signal[:, cols], *(t[cols] for t in thresholds))
+    if single:
+        return position[:, 0], reason[:, 0]
+    return position, reason
+
+
+# Reference: the same rules as a plain loop over columns and bars
+def exit_positions_loop(close, signal, stop_loss=None, trailing_stop=None, take_profit=None, max_hold=None):
+    close = np.asarray(close, dtype=float)
+    signal = np.asarray(signal, dtype=bool)
+    single = close.ndim == 1
+    if single:
+        close, signal = close[:, None], signal[:, None]
+    stop, trail, target, hold = _thresholds(close.shape[1], stop_loss, trailing_stop, take_profit, max_hold)
+    position = np.zeros(close.shape)
+    reason = np.zeros(close.shape, dtype=np.int8)
+    for j in range(close.shape[1]):
+        held, previous = False, False
+        entry = peak = bars = 0
+        for t in range(close.shape[0]):
+            price, on = close[t, j], signal[t, j]
+            code = 0
+            if held:
+                bars += 1
+                peak = max(peak, price)
+                if price <= entry * stop[j]:
+                    code = 1
+                elif price <= peak * trail[j]:
+                    code = 2
+                elif price >= entry * target[j]:
+                    code = 3
+                elif bars >= hold[j]:
+                    code = 4
+                elif not on:
+                    code = 5
+                held = code == 0
+            elif on and not previous:
+                held, entry, peak, bars = True, price, price, 0
+            position[t, j], reason[t, j] = held, code
+            previous = on
+    if single:
+        return position[:, 0], reason[:, 0]
+    return position, reason
+
+
+# backtest_summary's figures for every column of a (bar x column) close
+# matrix held per `position`, as arrays; bars before a column's first close
+# add nothing
+def _summary(close, position, periods_per_year=252):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = close[1:] / close[:-1] - 1
+        strategy = returns * position[:-1]
+        valid = ~np.isnan(strategy)
+        count = valid.sum(axis=0)
+        strategy = np.where(valid, strategy, 0.0)
+        equity = np.cumprod(1 + strategy, axis=0)
+        mean = strategy.sum(axis=0) / count
+        std = np.sqrt(np.maximum(((strategy - mean) ** 2 * valid).sum(axis=0) / (count - 1), 0))
+        first = np.argmax(~np.isnan(close), axis=0)
+        columns = np.arange(close.shape[1])
+        return {
+            "Final Return": equity[-1] - 1 if len(equity) else np.full(close.shape[1], np.nan),
+            "Buy & Hold": close[-1] / close[first, columns] - 1,
+            "Sharpe": np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan),
+            "Max Drawdown": (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0, initial=0.0),
+            # As backtest_summary: an entry on the first bar has no diff, so no trade
+            "Trades": (np.diff(position, axis=0) == 1).sum(axis=0),
+        }
+
+
+# Exits taken per reason, per column of a reason matrix
+def exit_counts(reason):
+    reason = np.asarray(reason)
+    return {name: (reason == code).sum(axis=0) for code, name in enumerate(EXIT_REASONS, 1)}
+
+
+# backtest_ma_strategy with exit rules (stop_loss, trailing_stop,
+# take_profit, max_hold keywords): the same result frame and signal rows,
+# plus the exits taken per reason
+def backtest_ma_exits(data, short_window, long_window, **rules):
+    data = data.astype({'Close': 'float64'})
+    data['Short_MA'] = data['Close'].rolling(window=short_window).mean()
+    data['Long_MA'] = data['Close'].rolling(window=long_window).mean()
+    position, reason = exit_positions(data['Close'].to_numpy(), (data['Short_MA'] > data['Long_MA']).to_numpy(),
+                                      **rules)
+    result, buys, sells = backtest_signal(data, position)
+    return result, buys, sells, {name: int(count) for name, count in exit_counts(reason).items()}
+
+
+# MA crossover entries (short MA above long MA) with every combination of
+# the exit parameter grids, for every ticker in `closes`. Returns a
+# DataFrame indexed by (Ticker, Stop Loss, Trailing Stop, Take Profit, Max
+# Holding) with backtest_summary's figures and the exits taken per reason.
+def exit_sweep(closes, short_window, long_window, stop_losses=(0,), trailing_stops=(0,), take_profits=(0,),
+               max_holds=(0,), chunk_columns=CHUNK_COLUMNS):
+    close = stack_closes({t: s for t, s in closes.items() if len(s.dropna()) > 2})
+    ma_short, ma_long = compute_ma(close, short_window, long_window)
+    signal = (ma_short > ma_long).to_numpy()
+    values = close.to_numpy(dtype=float)
+    grid = np.array(list(itertools.product(stop_losses, trailing_stops, take_profits, max_holds)), dtype=float)
+    # Column k is ticker k // len(grid) under parameter set k % len(grid)
+    n_columns = close.shape[1] * len(grid)
+    tables = []
+    for start in range(0, n_columns, chunk_columns):
+        columns = np.arange(start, min(start + chunk_columns, n_columns))
+        tickers, sets = columns // len(grid), columns % len(grid)
+        params = grid[sets]
+        position, reason = _kernel(values[:, tickers], signal[:, tickers],
+                                   *_thresholds(len(columns), *params.T))
+        summary = pd.DataFrame(_summary(values[:, tickers], position))
+        for name, counts in exit_counts(reason).items():
+            summary[f"{name} Exits"] = counts
+        summary.index = pd.MultiIndex.from_arrays(
+            [close.columns[tickers]] + [params[:, i] for i in range(len(PARAMETERS))], names=["Ticker"] + PARAMETERS)
+        tables.append(summary)
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables)
@@ -0,0 +1,344 @@
+"""Batch price forecasting.
+
+All models fit every ticker at once on a bar-aligned (time x ticker) matrix
+of log prices:
+
+    holt    Holt's linear exponential smoothing, alpha/beta chosen by a grid
+            search on one-step-ahead error
+    ar      AR(p) on log returns, least squares with an intercept
+    linear  straight-line trend fitted to log prices
+
+Fitted parameters are cached per ticker, keyed by a hash of the input series,
+so reruns on unchanged data do not refit. For Holt the engine also keeps the
+running state (error, level, trend) of every grid candidate after the last
+fit of each ticker's series; when a later series is that series plus new
+bars (same dates and values up to there), only the new bars are filtered
+and the best candidate is picked again. The result is the same as a full
+refit, so it does not depend on what was fitted before.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import perf
+from .indicators import stack_closes
+from .singleflight import SingleFlight
+
+MODELS = ["holt", "ar", "linear"]
+
+HOLT_ALPHAS = np.linspace(0.05, 0.95, 10)
+HOLT_BETAS = np.array([0.01, 0.05, 0.1, 0.2, 0.3])
+
+
+# Flat forecast at the last `window`-bar simple moving average, one value
+# per future bar of length `step` (a day by default)
+def simple_moving_average_forecast(close, forecast_days=14, window=5, step=pd.Timedelta(days=1)):
+    last_date = close.index[-1]
+    sma = close.rolling(window=window).mean().dropna()
+    last_sma = sma.iloc[-1]
+    future_dates = pd.date_range(start=last_date + step, periods=forecast_days, freq=step)
+    forecast = pd.Series(last_sma, index=future_dates)
+    return forecast
+
+
+def series_key(series):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype=float)).tobytes())
+    if isinstance(series.index, pd.DatetimeIndex):
+        digest.update(series.index.asi8.tobytes())
+    return digest.hexdigest()
+
+
+# Holt recursion over log prices y (time x ticker) for G candidate parameter
+# pairs at once; alpha and beta are (G x ticker). NaN bars (before a ticker's
+# first bar) leave the state untouched. `state` continues an earlier pass
+# from its (SSE, level, trend); a NaN level means the ticker has not started.
+# Returns SSE, level and trend (G x ticker), and with keep=True also the
+# level and trend after every bar (time x G x ticker).
+def _holt_pass(y, alpha, beta, state=None, keep=False):
+    shape = alpha.shape
+    if state is None:
+        sse, level, trend = np.zeros(shape), np.full(shape, np.nan), np.zeros(shape)
+    else:
+        sse, level, trend = (np.array(a, dtype=float) for a in state)
+    started = ~np.isnan(level[0])
+    if shape == (1, 1):
+        return _holt_pass_one(y[:, 0], alpha[0, 0], beta[0, 0], sse, level, trend, keep)
+    if keep:
+        levels, trends = np.empty((len(y),) + shape), np.empty((len(y),) + shape)
+    # Bars where every ticker has started and trades take the whole-array step
+    valid_rows = ~np.isnan(y)
+    seen = np.concatenate([np.zeros((1, shape[1]), dtype=bool), np.logical_or.accumulate(valid_rows, axis=0)])
+    whole = (valid_rows & (seen[:len(y)] | started)).all(axis=1)
+    for t, row in enumerate(y):
+        if whole[t]:
+            # Every ticker trading: one step over whole arrays
+            predicted = level + trend
+            sse += (row - predicted) ** 2
+            new_level = alpha * row + (1 - alpha) * predicted
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            level = new_level
+        else:
+            valid = valid_rows[t]
+            first = valid & ~started
+            level[:, first] = row[first]
+            step = valid & started
+            if step.any():
+                x = row[step]
+                a, b = alpha[:, step], beta[:, step]
+                prev_level, prev_trend = level[:, step], trend[:, step]
+                predicted = prev_level + prev_trend
+                sse[:, step] += (x - predicted) ** 2
+                new_level = a * x + (1 - a) * predicted
+                trend[:, step] = b * (new_level - prev_level) + (1 - b) * prev_trend
+                level[:, step] = new_level
+            started |= valid
+        if keep:
+            levels[t], trends[t] = level, trend
+    if keep:
+        return sse, level, trend, levels, trends
+    return sse, level, trend
+
+
+# _holt_pass for one series and one parameter pair, on Python floats, which
+# beats array calls on single elements by an order of magnitude
+def _holt_pass_one(y, alpha, beta, sse, level, trend, keep):
+    a, b = float(alpha), float(beta)
+    total, lev, tr = float(sse[0, 0]), float(level[0, 0]), float(trend[0, 0])
+    started = lev == lev
+    levels, trends = [], []
+    for x in y.tolist():
+        if x == x:
+            if started:
+                predicted = lev + tr
+                total += (x - predicted) ** 2
+                new_level = a * x + (1 - a) * predicted
+                tr = b * (new_level - lev) + (1 - b) * tr
+                lev = new_level
+            else:
+                lev, started = x, True
+        levels.append(lev)
+        trends.append(tr)
+    result = np.array([[total]]), np.array([[lev]]), np.array([[tr]])
+    if keep:
+        return result + (np.array(levels).reshape(-1, 1, 1), np.array(trends).reshape(-1, 1, 1))
+    return result
+
+
+def _holt_best(alpha, beta, sse, level, trend):
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(alpha.shape[1])
+    params = np.stack([alpha[best, cols], beta[best, cols]], axis=1)
+    state = np.stack([level[best, cols], trend[best, cols]], axis=1)
+    return params, state
+
+
+def _holt_full_grid(n):
+    a, b = np.meshgrid(HOLT_ALPHAS, HOLT_BETAS, indexing="ij")
+    return np.repeat(a.reshape(-1, 1), n, 1), np.repeat(b.reshape(-1, 1), n, 1)
+
+
+# Holt fit of every column of a (time x ticker) log-price matrix by the full
+# alpha/beta grid search. Returns params (ticker x [alpha, beta]) and the
+# final state (ticker x [level, trend]).
+def holt_fit(y):
+    y = np.asarray(y, dtype=float)
+    alpha, beta = _holt_full_grid(y.shape[1])
+    return _holt_best(alpha, beta, *_holt_pass(y, alpha, beta))
+
+
+# Holt level and trend after every bar of a (time x ticker) log-price matrix
+# with fixed per-ticker params (from holt_fit). The level is NaN and the
+# trend 0 before a ticker's first bar.
+def holt_filter(y, params):
+    y = np.asarray(y, dtype=float)
+    params = np.asarray(params, dtype=float)
+    *_, levels, trends = _holt_pass(y, params[None, :, 0], params[None, :, 1], keep=True)
+    return levels[:, 0], trends[:, 0]
+
+
+def _holt_predict(state, horizon):
+    steps = np.arange(1, horizon + 1)[:, None]
+    return state[:, 0][None, :] + steps * state[:, 1][None, :]
+
+
+# AR(p) on log returns: batched normal equations, one small solve per ticker
+def _ar_fit(y, p=5, ridge=1e-8):
+    r = np.diff(y, axis=0)
+    n_obs, n = r.shape
+    params = np.zeros((n, p + 1))
+    last = np.zeros((n, p))
+    if n_obs <= p:
+        return params, last
+    lags = np.stack([r[p - k - 1:n_obs - k - 1] for k in range(p)], axis=2)
+    X = np.concatenate([np.ones(lags.shape[:2] + (1,)), lags], axis=2)
+    target = r[p:]
+    mask = (~np.isnan(target) & ~np.isnan(lags).any(axis=2))[:, :, None]
+    X = np.where(mask, X, 0.0)
+    target = np.where(mask[:, :, 0], target, 0.0)
+    xtx = np.einsum("tni,tnj->nij", X, X) + ridge * np.eye(p + 1)
+    xty = np.einsum("tni,tn->ni", X, target)
+    enough = mask[:, :, 0].sum(axis=0) > 3 * (p + 1)
+    params[enough] = np.linalg.solve(xtx[enough], xty[enough][:, :, None])[:, :, 0]
+    last = np.nan_to_num(r[-p:][::-1].T)
+    return params, last
+
+
+def _ar_predict(params, last, y_last, horizon):
+    recent = last.copy()
+    out = np.empty((horizon, len(y_last)))
+    level = y_last.copy()
+    for h in range(horizon):
+        step = params[:, 0] + (params[:, 1:] * recent).sum(axis=1)
+        level = level + step
+        out[h] = level
+        recent = np.concatenate([step[:, None], recent[:, :-1]], axis=1)
+    return out
+
+
+# Least-squares line through each column's valid log prices
+def _linear_fit(y):
+    t = np.arange(len(y), dtype=float)[:, None]
+    mask = ~np.isnan(y)
+    n = mask.sum(axis=0)
+    t_mean = np.where(mask, t, 0).sum(axis=0) / np.maximum(n, 1)
+    y_mean = np.where(mask, y, 0).sum(axis=0) / np.maximum(n, 1)
+    dt = np.where(mask, t - t_mean, 0)
+    dy = np.where(mask, y - y_mean, 0)
+    var = (dt ** 2).sum(axis=0)
+    slope = np.where(var > 0, (dt * dy).sum(axis=0) / np.where(var > 0, var, 1), 0.0)
+    intercept = y_mean - slope * t_mean
+    return np.stack([intercept, slope], axis=1), np.full(y.shape[1], len(y) - 1.0)
+
+
+class ForecastEngine:
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._fits = OrderedDict()
+        # (ticker, first date) -> full-grid Holt state after the last fit
+        self._holt_states = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._fits:
+                self._fits.move_to_end(key)
+                return self._fits[key]
+        return None
+
+    def _put(self, key, value):
+        with self._lock:
+            self._fits[key] = value
+            self._fits.move_to_end(key)
+            while len(self._fits) > self.max_entries:
+                self._fits.popitem(last=False)
+
+    # Fit every ticker missing from the cache in one batch. Returns the
+    # per-ticker fit dicts in input order.
+    def fit(self, closes, model="holt", ar_order=5):
+        if model not in MODELS:
+            raise ValueError(f"Unknown forecast model: {model!r}")
+        closes = {t: s.dropna() for t, s in closes.items() if len(s.dropna()) > 2}
+        keys = {t: (model, ar_order if model == "ar" else None, series_key(s)) for t, s in closes.items()}
+        fits = {t: self._get(k) for t, k in keys.items()}
+        missing = [t for t, f in fits.items() if f is None]
+        if missing:
+            perf.miss()
+            # Sessions asking for the same fits at once share one batch
+            batch = tuple((t, keys[t]) for t in missing)
+            fits.update(self._flights.do(batch, self._fit_missing, closes, missing, keys, model, ar_order))
+        return fits
+
+    def _fit_missing(self, closes, missing, keys, model, ar_order):
+        log_prices = np.log(stack_closes({t: closes[t] for t in missing}).to_numpy())
+        if model == "holt":
+            params, state = self._fit_holt(closes, missing, log_prices)
+        elif model == "ar":
+            params, state = _ar_fit(log_prices, ar_order)
+        else:
+            params, state = _linear_fit(log_prices)
+        fits = {}
+        for i, ticker in enumerate(missing):
+            fit = {"params": params[i], "state": state[i], "last": log_prices[-1, i]}
+            fits[ticker] = fit
+            self._put(keys[ticker], fit)
+        return fits
+
+    # Full-grid Holt fit. A ticker whose series extends the one it was last
+    # fitted on resumes every candidate from the saved state and filters only
+    # the new bars; the others start from scratch.
+    def _fit_holt(self, closes, missing, log_prices):
+        alpha, beta = _holt_full_grid(len(missing))
+        grid = [np.zeros(alpha.shape), np.full(alpha.shape, np.nan), np.zeros(alpha.shape)]
+        # First row of log_prices each ticker still has to filter
+        skip = np.zeros(len(missing), dtype=int)
+        for i, ticker in enumerate(missing):
+            series = closes[ticker]
+            skip[i] = len(log_prices) - len(series)
+            saved = self._holt_states.get((ticker, series.index[0]))
+            if saved and saved["bars"] <= len(series) and series_key(series.iloc[:saved["bars"]]) == saved["key"]:
+                for g, values in zip(grid, saved["grid"]):
+                    g[:, i] = values
+                skip[i] += saved["bars"]
+        start = skip.min()
+        y = np.where(np.arange(start, len(log_prices))[:, None] >= skip[None, :], log_prices[start:], np.nan)
+        grid = _holt_pass(y, alpha, beta, grid)
+        with self._lock:
+            for i, ticker in enumerate(missing):
+                series = closes[ticker]
+                key = (ticker, series.index[0])
+                self._holt_states[key] = {
+                    "bars": len(series), "key": series_key(series), "grid": [g[:, i].copy() for g in grid],
+                }
+                self._holt_states.move_to_end(key)
+            while len(self._holt_states) > self.max_entries:
+                self._holt_states.popitem(last=False)
+        return _holt_best(alpha, beta, *grid)
+
+    # Price forecasts `horizon` bars ahead as a (step x ticker) DataFrame
+    def forecast(self, closes, horizon, model="holt", ar_order=5):
+        fits = self.fit(closes, model, ar_order)
+        if not fits:
+            return pd.DataFrame(index=pd.RangeIndex(1, horizon + 1, name="Step"))
+        params = np.array([f["params"] for f in fits.values()])
+        state = np.array([f["state"] for f in fits.values()])
+        last = np.array([f["last"] for f in fits.values()])
+        if model == "holt":
+            log_forecast = _holt_predict(state, horizon)
+        elif model == "ar":
+            log_forecast = _ar_predict(params, state, last, horizon)
+        else:
+            steps = state[None, :] + np.arange(1, horizon + 1)[:, None]
+            log_forecast = params[:, 0][None, :] + params[:, 1][None, :] * steps
+        return pd.DataFrame(np.exp(log_forecast), index=pd.RangeIndex(1, horizon + 1, name="Step"),
+                            columns=list(fits))
+
+    # 'up' / 'down' / 'neutral' per ticker, from the forecast move over the
+    # horizon relative to the last close
+    def direction(self, closes, horizon, model="holt", threshold=0.01):
+        forecast = self.forecast(closes, horizon, model)
+        directions = {}
+        for ticker in forecast.columns:
+            change = forecast[ticker].iloc[-1] / closes[ticker].dropna().iloc[-1] - 1
+            directions[ticker] = "up" if change > threshold else "down" if change < -threshold else "neutral"
+        return directions
+
+
+_engine = ForecastEngine()
+
+
+def get_engine():
+    return _engine
+
+
+def forecast_many(closes, horizon, model="holt"):
+    return _engine.forecast(closes, horizon, model)
+
+
+def forecast_direction(closes, horizon, model="holt", threshold=0.01):
+    return _engine.direction(closes, horizon, model, threshold)
@@ -0,0 +1,99 @@
+"""Technical indicators over one ticker or a whole (time x ticker) matrix.
+
+Every function accepts a Series, a DataFrame with one column per ticker, or
+a 1-D/2-D NumPy array, and returns the same kind of object. DataFrame inputs
+are processed for all columns in a single pandas call, so scoring a large
+universe costs one pass over the matrix rather than one pipeline per ticker.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _as_pandas(values):
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        return values, None
+    array = np.asarray(values, dtype=float)
+    if array.ndim == 1:
+        return pd.Series(array), np.ndarray
+    return pd.DataFrame(array), np.ndarray
+
+
+def _restore(result, kind):
+    return result.to_numpy() if kind is np.ndarray else result
+
+
+def compute_sma(close, window):
+    data, kind = _as_pandas(close)
+    return _restore(data.rolling(window).mean(), kind)
+
+
+def compute_ema(close, span):
+    data, kind = _as_pandas(close)
+    return _restore(data.ewm(span=span, adjust=False).mean(), kind)
+
+
+# method="sma" averages gains/losses over a plain rolling window (the
+# original page behaviour); method="wilder" uses Wilder's smoothing,
+# an EMA with alpha = 1/window.
+def compute_rsi(close, window=14, method="sma"):
+    data, kind = _as_pandas(close)
+    delta = data.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    if method == "sma":
+        avg_gain = gain.rolling(window).mean()
+        avg_loss = loss.rolling(window).mean()
+    elif method == "wilder":
+        avg_gain = gain.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+        avg_loss = loss.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    else:
+        raise ValueError(f"Unknown RSI method: {method!r}")
+    rs = avg_gain / avg_loss
+    return _restore(100 - (100 / (1 + rs)), kind)
+
+
+def compute_macd(close, fast=12, slow=26, signal=9):
+    data, kind = _as_pandas(close)
+    macd = data.ewm(span=fast, adjust=False).mean() - data.ewm(span=slow, adjust=False).mean()
+    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    return _restore(macd, kind), _restore(signal_line, kind)
+
+
+def compute_ma(close, short_window=20, long_window=50):
+    return compute_sma(close, short_window), compute_sma(close, long_window)
+
+
+# Build a (time x ticker) close matrix from per-ticker series.
+#   align="bars":  right-align on bar count, so the last row is every
+#                  ticker's latest bar and each column keeps its own calendar
+#                  (what last-bar scoring needs when 24/7 crypto and
+#                  exchange-hours equities are mixed).
+#   align="dates": outer-join on timestamps, leaving NaN where a ticker
+#                  did not trade.
+def stack_closes(closes, align="bars"):
+    closes = {t: s.dropna() for t, s in closes.items()}
+    if align == "dates":
+        return pd.DataFrame(closes)
+    if align != "bars":
+        raise ValueError(f"Unknown alignment: {align!r}")
+    length = max((len(s) for s in closes.values()), default=0)
+    matrix = np.full((length, len(closes)), np.nan)
+    for j, series in enumerate(closes.values()):
+        if len(series):
+            matrix[length - len(series):, j] = series.to_numpy(dtype=float)
+    return pd.DataFrame(matrix, index=pd.RangeIndex(-length + 1, 1), columns=list(closes))
+
+
+# Latest value of every indicator for every column of a close matrix
+def latest_indicators(close, rsi_window=14, rsi_method="sma", short_window=20, long_window=50):
+    rsi = compute_rsi(close, rsi_window, rsi_method)
+    macd, signal_line = compute_macd(close)
+    ma_short, ma_long = compute_ma(close, short_window, long_window)
+    return pd.DataFrame({
+        "RSI": rsi.iloc[-1],
+        "MACD": macd.iloc[-1],
+        "Signal": signal_line.iloc[-1],
+        "MA Short": ma_short.iloc[-1],
+        "MA Long": ma_long.iloc[-1],
+    })
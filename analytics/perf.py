@@ -0,0 +1,252 @@
+"""Lightweight per-rerun instrumentation.
+
+Code is wrapped in spans, either ``with perf.span("name", "compute"):`` or
+the ``@perf.timed()`` decorator. Each span records its wall time, the rows
+it processed, whether it was served from a cache, and how much the process's
+resident memory changed from its start to its end. With
+``ANALYTICS_PERF_MEMORY=1`` tracemalloc also runs, and each span records its
+peak Python/NumPy allocation above what was allocated when it started
+(process-wide, so spans running at the same time in other sessions add to
+it). Spans are collected into one ``Run`` per
+page rerun: ``perf.page(name)`` at the top of a page starts it, and
+``perf.panel()`` at the bottom shows it in an optional sidebar panel. Runs
+can be exported as Chrome-trace JSON, viewable in chrome://tracing or
+Perfetto.
+
+A span costs two clock reads and two reads of the current RSS, so recording
+stays on in production; tracemalloc slows allocation-heavy code and is off by
+default. Set ``ANALYTICS_PERF=0`` to turn recording off entirely.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENABLED = os.environ.get("ANALYTICS_PERF", "1") != "0"
+TRACE_MEMORY = ENABLED and os.environ.get("ANALYTICS_PERF_MEMORY", "0") == "1"
+HISTORY = 20
+
+# ru_maxrss is in KiB on Linux, bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_local = threading.local()
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+# Current resident set size in bytes (Linux; None where /proc is missing)
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Lifetime high-water mark of the resident set size in bytes
+def peak_rss():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+class Span:
+    __slots__ = ("name", "category", "start", "duration", "rows", "cache", "rss_delta", "peak_delta", "thread",
+                 "depth", "_rss", "_traced", "_traced_peak")
+
+    def __init__(self, name, category, rows=None, cache=None, depth=0):
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.cache = cache
+        self.start = time.time()
+        self.duration = None
+        self.rss_delta = None
+        self.peak_delta = None
+        self._rss = self._traced = self._traced_peak = None
+        self.thread = threading.get_ident()
+        self.depth = depth
+
+
+class Run:
+    def __init__(self, page):
+        self.page = page
+        self.start = time.time()
+        self.spans = []
+
+    @property
+    def duration(self):
+        ends = [s.start + s.duration for s in self.spans if s.duration is not None]
+        return max(ends, default=self.start) - self.start
+
+    def table(self):
+        import pandas as pd
+
+        rows = [{
+            "Span": "· " * s.depth + s.name,
+            "Category": s.category,
+            "ms": round(s.duration * 1e3, 2),
+            "Rows": s.rows,
+            "Cache": s.cache,
+            "RSS +MiB": None if s.rss_delta is None else round(s.rss_delta / 2**20, 1),
+            "Peak +MiB": None if s.peak_delta is None else round(s.peak_delta / 2**20, 1),
+        } for s in self.spans if s.duration is not None]
+        return pd.DataFrame(rows, columns=["Span", "Category", "ms", "Rows", "Cache", "RSS +MiB", "Peak +MiB"])
+
+
+def begin(page):
+    _local.run = Run(page)
+    _local.stack = []
+    return _local.run
+
+
+def current():
+    return getattr(_local, "run", None)
+
+
+# Number of rows in a result: len() of a frame/series/array, summed over
+# the values of a dict, or taken from the first item of a tuple
+def count_rows(result):
+    if isinstance(result, tuple) and result:
+        return count_rows(result[0])
+    if isinstance(result, dict):
+        sizes = [count_rows(v) for v in result.values()]
+        return sum(s for s in sizes if s is not None) if sizes else 0
+    if hasattr(result, "shape") and getattr(result, "shape", ()):
+        return result.shape[0]
+    return None
+
+
+# tracemalloc keeps one peak for the whole process: fold the peak since the
+# last reset into every open span of this thread, then start a new one
+def _fold_traced_peak():
+    _, peak = tracemalloc.get_traced_memory()
+    for s in _local.stack:
+        s._traced_peak = max(s._traced_peak, peak)
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def span(name, category="compute", rows=None, cache=None):
+    run = current()
+    if not ENABLED or run is None:
+        yield Span(name, category, rows, cache)
+        return
+    s = Span(name, category, rows, cache, depth=len(_local.stack))
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        _fold_traced_peak()
+        s._traced = s._traced_peak = tracemalloc.get_traced_memory()[0]
+    s._rss = current_rss()
+    run.spans.append(s)
+    _local.stack.append(s)
+    started = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.duration = time.perf_counter() - started
+        if s._rss is not None:
+            rss = current_rss()
+            s.rss_delta = None if rss is None else rss - s._rss
+        if tracing and tracemalloc.is_tracing():
+            _fold_traced_peak()
+            s.peak_delta = s._traced_peak - s._traced
+        _local.stack.pop()
+
+
+# Decorator form of span(). Rows are counted from the return value. With
+# cache=True the span starts as a cache "hit"; the wrapped cached function
+# calls miss() from its body, which only runs when the cache missed.
+def timed(name=None, category="compute", cache=False):
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label, category, cache="hit" if cache else None) as s:
+                result = fn(*args, **kwargs)
+                if s.rows is None:
+                    s.rows = count_rows(result)
+                return result
+        return wrapper
+    return decorate
+
+
+# Mark the innermost open span as a cache miss
+def miss():
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].cache = "miss"
+
+
+# Chrome trace-event JSON ("X" complete events, microsecond timestamps), one
+# enclosing event per run plus one per span
+def to_chrome_trace(runs):
+    pid = os.getpid()
+    events = []
+    for run in runs:
+        events.append({"name": run.page, "cat": "page", "ph": "X", "pid": pid,
+                       "tid": run.spans[0].thread if run.spans else 0,
+                       "ts": run.start * 1e6, "dur": run.duration * 1e6})
+        for s in run.spans:
+            if s.duration is None:
+                continue
+            args = {k: getattr(s, k) for k in ("rows", "cache", "rss_delta", "peak_delta") if getattr(s, k) is not None}
+            events.append({"name": s.name, "cat": s.category, "ph": "X", "pid": pid, "tid": s.thread,
+                           "ts": s.start * 1e6, "dur": s.duration * 1e6, "args": args})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+# -- Streamlit helpers --
+# Start a run for this page rerun and keep the last HISTORY runs of the
+# session for export
+def page(name):
+    import streamlit as st
+
+    run = begin(name)
+    runs = st.session_state.setdefault("perf_runs", deque(maxlen=HISTORY))
+    runs.append(run)
+    return run
+
+
+# Sidebar panel for the current run, shown when its checkbox is ticked.
+# Pages that stop early never reach this call, but their runs are still
+# kept for the trace download on the next page that does.
+def panel():
+    import streamlit as st
+
+    run = current()
+    if not ENABLED or run is None or not st.sidebar.checkbox("⏱️ Performance", key="perf_panel"):
+        return
+    table = run.table()
+    st.sidebar.caption(f"{run.page}: {run.duration * 1e3:.0f} ms, {len(table)} spans")
+    if not table.empty:
+        # Time by category of the outermost spans only, so nested spans are not counted twice
+        outer = [s.depth == 0 for s in run.spans if s.duration is not None]
+        by_category = table[outer].groupby("Category")["ms"].sum().sort_values(ascending=False)
+        st.sidebar.bar_chart(by_category)
+        st.sidebar.dataframe(table, hide_index=True)
+        hits = (table["Cache"] == "hit").sum()
+        misses = (table["Cache"] == "miss").sum()
+        if hits or misses:
+            st.sidebar.caption(f"Cache: {hits} hit / {misses} miss")
+    rss = peak_rss()
+    if rss is not None:
+        st.sidebar.caption(f"Process peak RSS: {rss / 2**20:.0f} MiB")
+    runs = list(st.session_state.get("perf_runs", [run]))
+    st.sidebar.download_button("⬇️ Chrome Trace", json.dumps(to_chrome_trace(runs)),
+                               "trace.json", "application/json")
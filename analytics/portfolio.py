@@ -0,0 +1,164 @@
+"""Multi-asset portfolio backtests with rebalancing and transaction costs.
+
+A strategy is a (date x asset) matrix of target weights; a boolean signal
+matrix can be turned into one with ``equal_weights``. At each rebalance bar
+the book is traded back to that row's targets at the close, paying ``fee``
+plus ``slippage`` on the traded fraction of equity; between rebalances the
+holdings drift with prices. Weights may sum to less than 1, the rest is
+cash earning nothing.
+
+The simulation is matrix work over all bars and assets: each bar's prices
+are divided by the prices at the last rebalance, so holdings between two
+rebalances are one gathered array, and equity carried from one rebalance to
+the next is a cumulative product over the rebalance bars. Nothing loops
+over days in Python.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .indicators import compute_ma
+
+PERIODS_PER_YEAR = 252
+
+# Calendar rebalancing frequencies (pandas period aliases)
+FREQUENCIES = {"Weekly": "W", "Monthly": "M", "Quarterly": "Q", "Yearly": "Y"}
+
+
+# Equal weight across the assets whose signal is on in each row; rows with
+# no signal are all cash
+def equal_weights(signals):
+    active = signals.fillna(0).astype(float)
+    count = active.sum(axis=1).replace(0, np.nan)
+    return active.div(count, axis=0).fillna(0.0)
+
+
+# Long while the short MA is above the long MA, per asset. Same rule as the
+# single-asset backtest, decided at the close and traded at that close.
+def ma_signals(closes, short_window, long_window):
+    short_ma, long_ma = compute_ma(closes, short_window, long_window)
+    return short_ma > long_ma
+
+
+# Boolean mask of the bars to rebalance on.
+#   None:           the first bar only (buy and hold)
+#   "signal":       the first bar and every bar whose targets changed
+#   "W"/"M"/"Q"/"Y": the first bar of every calendar period
+#   int n:          every n bars
+def rebalance_mask(targets, rebalance="M"):
+    n = len(targets)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    if rebalance is None:
+        pass
+    elif rebalance == "signal":
+        values = targets.to_numpy(dtype=float)
+        mask[1:] = (np.abs(np.diff(values, axis=0)) > 1e-12).any(axis=1)
+    elif isinstance(rebalance, (int, np.integer)):
+        if rebalance < 1:
+            raise ValueError("Rebalance interval must be at least one bar")
+        mask[::rebalance] = True
+    elif isinstance(rebalance, str):
+        periods = targets.index.to_period(rebalance).asi8
+        mask[1:] = periods[1:] != periods[:-1]
+    else:
+        raise ValueError(f"Unknown rebalance rule: {rebalance!r}")
+    mask[0] = True
+    return mask
+
+
+# Simulate a portfolio. `prices` is a (date x asset) close matrix on one
+# calendar (gaps are forward-filled; assets are untradeable before their
+# first price, and the book is also rebalanced on the bar each one starts
+# trading so its target weight is bought then rather than left in cash). `weights` is a (date x asset) target matrix on the same index,
+# or one Series / dict of static weights. `fee` and `slippage` are fractions
+# of traded value (0.001 = 10 bps).
+#
+# Returns a dict of
+#   "Equity":       portfolio value per bar, after costs
+#   "Weights":      held weights per bar, after that bar's trades
+#   "Turnover":     traded value / equity per bar (buys plus sells)
+#   "Costs":        fees and slippage paid per bar, in currency
+#   "Contribution": per-asset P&L, average weight, turnover and costs
+def backtest_portfolio(prices, weights, rebalance="M", fee=0.001, slippage=0.0005, initial=1.0):
+    prices = prices.astype(float).ffill()
+    if isinstance(weights, (pd.Series, dict)):
+        weights = pd.Series(weights, dtype=float).reindex(prices.columns).fillna(0.0)
+        targets = pd.DataFrame(np.broadcast_to(weights.to_numpy(), prices.shape),
+                               index=prices.index, columns=prices.columns)
+    else:
+        targets = weights.reindex(index=prices.index, columns=prices.columns).astype(float).ffill().fillna(0.0)
+    mask = rebalance_mask(targets, rebalance)
+
+    P = prices.to_numpy()
+    tradeable = ~np.isnan(P)
+    if len(P):
+        mask[np.argmax(tradeable, axis=0)[tradeable.any(axis=0)]] = True
+    # Untradeable assets are left in cash until they have a price
+    W = np.where(tradeable, targets.to_numpy(), 0.0)[mask]
+    Pr = np.where(tradeable, P, 1.0)[mask]
+    cash = 1.0 - W.sum(axis=1)
+    cost_rate = fee + slippage
+
+    # Growth of each holding and of the whole book from one rebalance to the
+    # next, and the weights the previous book had drifted to by then
+    rel = Pr[1:] / Pr[:-1]
+    drifted = W[:-1] * rel
+    growth = drifted.sum(axis=1) + cash[:-1]
+    drifted = drifted / growth[:, None]
+    trades = np.abs(W - np.vstack([np.zeros((1, W.shape[1])), drifted]))
+    turnover = trades.sum(axis=1)
+    kept = 1 - cost_rate * turnover
+    equity_k = initial * np.cumprod(np.concatenate([[1.0], growth]) * kept)
+    pre_trade = equity_k / kept
+
+    # Holdings on every bar: the last rebalance's book times each price
+    # relative to that rebalance
+    k = np.cumsum(mask) - 1
+    priced = np.where(tradeable, P, 1.0)
+    holdings = equity_k[k, None] * W[k] * (priced / Pr[k])
+    equity = holdings.sum(axis=1) + equity_k[k] * cash[k]
+
+    index, columns = prices.index, prices.columns
+    turnover_bar = np.zeros(len(index))
+    turnover_bar[mask] = turnover
+    costs_bar = np.zeros(len(index))
+    costs_bar[mask] = pre_trade * cost_rate * turnover
+
+    # Per-asset P&L: the holdings after the previous bar's trades times this bar's return
+    returns = np.where(tradeable[1:] & tradeable[:-1], priced[1:] / priced[:-1] - 1, 0.0)
+    pnl = (holdings[:-1] * returns).sum(axis=0)
+    held = holdings / equity[:, None]
+
+    contribution = pd.DataFrame({
+        "Contribution": pnl / initial,
+        "Average Weight": held.mean(axis=0),
+        "Turnover": trades.sum(axis=0),
+        "Costs": (pre_trade[:, None] * cost_rate * trades).sum(axis=0) / initial,
+    }, index=columns)
+    return {
+        "Equity": pd.Series(equity, index=index, name="Portfolio"),
+        "Weights": pd.DataFrame(held, index=index, columns=columns),
+        "Turnover": pd.Series(turnover_bar, index=index, name="Turnover"),
+        "Costs": pd.Series(costs_bar, index=index, name="Costs"),
+        "Contribution": contribution,
+    }
+
+
+# Headline figures of a backtest_portfolio result
+def portfolio_summary(result, periods_per_year=PERIODS_PER_YEAR):
+    equity = result["Equity"]
+    # Value before the first bar's trades, i.e. the initial capital
+    start = equity.iloc[0] + result["Costs"].iloc[0] if len(equity) else np.nan
+    returns = equity.pct_change().dropna()
+    std = returns.std()
+    years = len(returns) / periods_per_year
+    return {
+        "Final Return": equity.iloc[-1] / start - 1 if len(equity) else np.nan,
+        "Sharpe": returns.mean() / std * np.sqrt(periods_per_year) if std > 0 else np.nan,
+        "Max Drawdown": (equity / equity.cummax() - 1).min(),
+        "Annual Turnover": result["Turnover"].sum() / years if years > 0 else np.nan,
+        "Costs": result["Costs"].sum() / start if len(equity) else np.nan,
+        "Rebalances": int((result["Turnover"] > 0).sum()),
+    }
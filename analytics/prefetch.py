@@ -0,0 +1,135 @@
+"""Background prefetch and scheduled refresh of the selected assets.
+
+``prefetch`` is called when an asset is added: a background thread
+downloads its history and computes the indicators the pages show by
+default, so the first page opened finds them in the store and the
+derived-results cache. ``scheduler`` refreshes every asset a session has
+selected on a fixed interval and recomputes those indicators, so pages
+keep serving current data without fetching it themselves.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .indicators import compute_macd, compute_rsi, compute_sma
+from .store import REFRESH_SECONDS, derived, get_store, load_history
+
+log = logging.getLogger(__name__)
+
+PREFETCH_WORKERS = int(os.environ.get("ANALYTICS_PREFETCH_WORKERS", 2))
+SCHEDULE_SECONDS = int(os.environ.get("ANALYTICS_SCHEDULE_SECONDS", REFRESH_SECONDS))
+
+# Tickers not watched again for this long drop out of the schedule
+WATCH_SECONDS = 60 * 60
+
+# Daily series the pages compute with their default settings, as
+# (period, name, params, function of the close series). Names and params
+# match the pages' own derived() calls so the results are shared.
+WARM_UP = [
+    ("6mo", "rsi", (14, "sma"), lambda close: compute_rsi(close, 14, "sma")),
+    ("6mo", "macd", (12, 26, 9), compute_macd),
+    ("6mo", "sma", (20,), lambda close: compute_sma(close, 20)),
+    ("6mo", "sma", (50,), lambda close: compute_sma(close, 50)),
+    ("6mo", "sma", (100,), lambda close: compute_sma(close, 100)),
+    ("5y", "sma", (50,), lambda close: compute_sma(close, 50)),
+    ("5y", "sma", (200,), lambda close: compute_sma(close, 200)),
+    ("2y", "returns", (), lambda close: close.dropna().pct_change()),
+]
+
+_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+
+# Compute the WARM_UP series for one ticker from its stored daily bars
+def warm(ticker):
+    closes = {}
+    for period, name, params, compute in WARM_UP:
+        if period not in closes:
+            closes[period] = load_history(ticker, period, columns=["Close"])["Close"]
+        close = closes[period]
+        if not close.empty:
+            derived(ticker, name, (period,) + params, lambda: compute(close))
+
+
+def _prefetch(tickers, interval):
+    try:
+        errors = get_store().refresh(tickers)
+        if interval != "1d":
+            errors.update(get_store(interval).refresh(tickers))
+        for ticker in tickers:
+            if ticker not in errors:
+                warm(ticker)
+        for ticker, error in errors.items():
+            log.warning("Prefetch of %s failed: %s", ticker, error)
+    except Exception:
+        log.exception("Prefetch of %s failed", tickers)
+
+
+# Start downloading `tickers` (daily bars, plus `interval` bars if intraday)
+# and warming their indicators. Returns the Future without waiting on it.
+def prefetch(tickers, interval="1d"):
+    return _pool.submit(_prefetch, list(dict.fromkeys(tickers)), interval)
+
+
+class RefreshScheduler:
+    """Refreshes every watched ticker each ``every`` seconds on a daemon thread.
+
+    Pages call ``watch`` with a session's selection on each rerun; tickers
+    no session has watched for ``watch_seconds`` are dropped.
+    """
+
+    def __init__(self, every=SCHEDULE_SECONDS, watch_seconds=WATCH_SECONDS):
+        self.every = every
+        self.watch_seconds = watch_seconds
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, tickers, interval="1d"):
+        now = time.time()
+        with self._lock:
+            for ticker in tickers:
+                self._watched[(ticker, interval)] = now
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+                self._thread.start()
+
+    def watched(self):
+        cutoff = time.time() - self.watch_seconds
+        with self._lock:
+            for key in [k for k, seen in self._watched.items() if seen < cutoff]:
+                del self._watched[key]
+            return list(self._watched)
+
+    # One pass: refresh the stale watched tickers per interval, then rewarm
+    # the daily ones whose data changed
+    def run_once(self):
+        by_interval = {}
+        for ticker, interval in self.watched():
+            by_interval.setdefault(interval, []).append(ticker)
+        for interval, tickers in by_interval.items():
+            store = get_store(interval)
+            before = {t: store.version(t) for t in tickers}
+            try:
+                store.refresh(tickers)
+            except Exception:
+                log.exception("Scheduled refresh of %s failed", tickers)
+                continue
+            if interval == "1d":
+                for ticker in tickers:
+                    if store.version(ticker) != before[ticker]:
+                        warm(ticker)
+
+    def _loop(self):
+        while not self._stop.wait(self.every):
+            self.run_once()
+
+    def stop(self):
+        self._stop.set()
+
+
+scheduler = RefreshScheduler()
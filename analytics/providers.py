@@ -0,0 +1,156 @@
+"""Market data providers.
+
+A provider turns tickers into tz-naive OHLCV frames. ``fetch_many`` is the
+batch entry point the pages use: Yahoo downloads run on a bounded thread pool
+with retry and a per-request timeout, and one failing ticker never takes the
+others down. The pool belongs to the provider, and the app uses one provider
+for the whole process, so ``max_workers`` caps concurrent requests upstream
+across every session. Identical requests made while one is in flight share
+its result instead of being sent again. ``ReplayProvider`` serves recorded
+files so the app can run offline.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .singleflight import SingleFlight
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_init_lock = threading.Lock()
+
+
+def _file_name(ticker):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+
+
+def _clean(data):
+    if data.empty:
+        return data
+    if getattr(data.index, "tz", None) is not None:
+        data.index = data.index.tz_localize(None)
+    return data[[c for c in COLUMNS if c in data.columns]]
+
+
+class DataProvider:
+    """Base class; subclasses implement ``fetch`` for a single ticker."""
+
+    max_workers = 8
+    _flights = None
+
+    def fetch(self, ticker, period="max", interval="1d", start=None):
+        raise NotImplementedError
+
+    def _requests(self):
+        if self._flights is None:
+            with _init_lock:
+                if self._flights is None:
+                    pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                              thread_name_prefix=type(self).__name__)
+                    self._flights = SingleFlight(pool)
+        return self._flights
+
+    # Fetch every ticker, isolating failures: frames holds what succeeded and
+    # errors maps the rest to the exception that stopped them.
+    def fetch_many(self, tickers, period="max", interval="1d", start=None):
+        tickers = list(dict.fromkeys(tickers))
+        frames, errors = {}, {}
+        if not tickers:
+            return frames, errors
+        requests = self._requests()
+        futures = {}
+        for t in tickers:
+            t_start = start.get(t) if isinstance(start, dict) else start
+            futures[t] = requests.submit((t, period, interval, t_start), self.fetch, t, period, interval, t_start)
+        for ticker, future in futures.items():
+            try:
+                frames[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = e
+        return frames, errors
+
+
+class YahooProvider(DataProvider):
+    def __init__(self, max_workers=8, retries=3, timeout=20, backoff=0.5):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+
+    def fetch(self, ticker, period="max", interval="1d", start=None):
+        import yfinance as yf
+
+        kwargs = {"interval": interval, "timeout": self.timeout, "raise_errors": True}
+        if start is None:
+            kwargs["period"] = period
+        else:
+            kwargs["start"] = start
+        for attempt in range(self.retries):
+            try:
+                return _clean(yf.Ticker(ticker).history(**kwargs))
+            except Exception:
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+class ReplayProvider(DataProvider):
+    """Serve recorded ``<ticker>[_<interval>].parquet`` or ``.csv`` files from ``root``."""
+
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self.max_workers = max_workers
+
+    def _path(self, ticker, interval):
+        base = _file_name(ticker)
+        names = [f"{base}_{interval}"] + ([base] if interval == "1d" else [])
+        for name in names:
+            for ext in (".parquet", ".csv"):
+                path = os.path.join(self.root, name + ext)
+                if os.path.exists(path):
+                    return path
+        raise FileNotFoundError(f"No recorded {interval} data for {ticker} in {self.root}")
+
+    def fetch(self, ticker, period="max", interval="1d", start=None):
+        path = self._path(ticker, interval)
+        if path.endswith(".parquet"):
+            data = pd.read_parquet(path)
+        else:
+            data = pd.read_csv(path, index_col=0, parse_dates=True)
+        data = _clean(data)
+        if start is None and not data.empty:
+            from .store import period_start
+
+            start = period_start(data.index[-1], period)
+        if start is not None:
+            data = data.loc[data.index >= pd.Timestamp(start)]
+        return data
+
+
+# Save provider output so it can be replayed later with ReplayProvider
+def record(provider, tickers, root, period="max", interval="1d"):
+    os.makedirs(root, exist_ok=True)
+    frames, errors = provider.fetch_many(tickers, period, interval)
+    for ticker, frame in frames.items():
+        suffix = "" if interval == "1d" else f"_{interval}"
+        frame.to_parquet(os.path.join(root, f"{_file_name(ticker)}{suffix}.parquet"))
+    return errors
+
+
+_default = None
+
+
+# The process-wide provider, shared by every store so that they share its
+# request pool. MARKET_DATA_REPLAY=<dir> switches the whole app to recorded data.
+def default_provider():
+    global _default
+    with _init_lock:
+        if _default is None:
+            replay = os.environ.get("MARKET_DATA_REPLAY")
+            _default = ReplayProvider(replay) if replay else YahooProvider()
+        return _default
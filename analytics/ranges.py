@@ -0,0 +1,117 @@
+"""Monte Carlo price-range simulation.
+
+Paths are generated in chunks sized to a memory budget and never kept:
+each chunk only updates a per-day histogram of log returns (from which the
+fan-band quantiles are read) and the running count of paths that touched
+each price level. Memory is therefore O(days x bins) whatever the number
+of paths.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+METHODS = ["gbm", "bootstrap", "block"]
+
+
+# Closed-form range: log-normal price `days_forward` bars ahead at the given
+# two-sided confidence. Returns (lower, upper, horizon volatility).
+def get_potential_range(price_series, days_forward, confidence):
+    last_price = price_series.dropna().iloc[-1]
+    log_returns = np.log(price_series / price_series.shift(1)).dropna()
+    vol = log_returns.std() * np.sqrt(days_forward)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    lower = last_price * np.exp(-z * vol)
+    upper = last_price * np.exp(z * vol)
+    return lower, upper, vol
+
+
+def _log_returns(close):
+    close = pd.Series(close).dropna()
+    return np.log(close / close.shift(1)).dropna().to_numpy(dtype=float)
+
+
+# Log-return increments for one chunk of paths, shape (paths, days)
+def _increments(rng, method, returns, paths, days, mu, sigma, block_size):
+    if method == "gbm":
+        return rng.normal(mu, sigma, size=(paths, days))
+    if method == "bootstrap":
+        return returns[rng.integers(0, len(returns), size=(paths, days))]
+    if method == "block":
+        block_size = max(1, min(block_size, len(returns)))
+        n_blocks = -(-days // block_size)
+        starts = rng.integers(0, len(returns) - block_size + 1, size=(paths, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block_size)).reshape(paths, -1)[:, :days]
+        return returns[idx]
+    raise ValueError(f"Unknown simulation method: {method!r}")
+
+
+def _hist_quantiles(counts, lo, width, quantiles):
+    cum = np.cumsum(counts, axis=1)
+    total = cum[:, -1:]
+    out = np.empty((counts.shape[0], len(quantiles)))
+    bins = counts.shape[1]
+    for j, q in enumerate(quantiles):
+        target = q * total
+        k = np.minimum((cum < target).sum(axis=1), bins - 1)
+        below = np.where(k > 0, np.take_along_axis(cum, (k - 1)[:, None], 1)[:, 0], 0)
+        inside = np.take_along_axis(counts, k[:, None], 1)[:, 0]
+        frac = np.where(inside > 0, (target[:, 0] - below) / np.maximum(inside, 1), 0.5)
+        out[:, j] = lo + (k + np.clip(frac, 0, 1)) * width
+    return out
+
+
+# Simulate `n_paths` price paths `days_forward` steps ahead of the last close.
+#   method:      "gbm" (normal log returns), "bootstrap" (resampled daily
+#                log returns) or "block" (resampled runs of `block_size` days)
+#   drift:       daily log drift for GBM; 0 keeps the median at the last price
+#                like the closed-form range, None uses the historical mean
+#   quantiles:   probabilities returned for every day of the fan chart
+#   touch_levels: prices for which to estimate the chance of being reached
+#                on any day of the horizon
+# Returns (bands, touch): bands is a (day x quantile) DataFrame of prices,
+# touch a Series of probabilities indexed by level.
+def simulate_range(close, days_forward, n_paths=100_000, method="gbm", quantiles=(0.025, 0.5, 0.975),
+                   touch_levels=(), drift=0.0, block_size=5, seed=None, bins=2048,
+                   memory_budget=64 * 2**20):
+    returns = _log_returns(close)
+    if len(returns) < 2:
+        raise ValueError("Need at least three prices to simulate")
+    last_price = float(pd.Series(close).dropna().iloc[-1])
+    sigma = returns.std(ddof=1)
+    mu = returns.mean() if drift is None else drift
+    rng = np.random.default_rng(seed)
+
+    # Per-day histogram range: +-10 sigma around the expected path, wide enough
+    # that quantiles inside 0.1%-99.9% never fall in the clipped edge bins
+    steps = np.arange(1, days_forward + 1)
+    center = steps * (mu if method == "gbm" else returns.mean())
+    half = 10 * max(sigma, 1e-12) * np.sqrt(steps)
+    lo = center - half
+    width = 2 * half / bins
+    counts = np.zeros((days_forward, bins), dtype=np.int64)
+    offsets = np.arange(days_forward)[None, :] * bins
+
+    levels = np.asarray(touch_levels, dtype=float)
+    log_levels = np.log(levels / last_price) if len(levels) else levels
+    touched = np.zeros(len(levels), dtype=np.int64)
+
+    chunk = max(1, int(memory_budget // (days_forward * 8 * 3)))
+    done = 0
+    while done < n_paths:
+        size = min(chunk, n_paths - done)
+        paths = np.cumsum(_increments(rng, method, returns, size, days_forward, mu, sigma, block_size), axis=1)
+        idx = np.clip(((paths - lo) / width).astype(np.int64), 0, bins - 1)
+        counts += np.bincount((idx + offsets).ravel(), minlength=days_forward * bins).reshape(days_forward, bins)
+        if len(levels):
+            high, low = paths.max(axis=1), paths.min(axis=1)
+            up = log_levels >= 0
+            touched[up] += (high[:, None] >= log_levels[up]).sum(axis=0)
+            touched[~up] += (low[:, None] <= log_levels[~up]).sum(axis=0)
+        done += size
+
+    log_q = _hist_quantiles(counts, lo, width, quantiles)
+    bands = pd.DataFrame(last_price * np.exp(log_q), index=pd.Index(steps, name="Day"), columns=list(quantiles))
+    touch = pd.Series(touched / n_paths, index=pd.Index(levels, name="Level"), name="Probability")
+    return bands, touch
@@ -0,0 +1,229 @@
+"""Risk metrics over an aligned (date x asset) returns matrix.
+
+Everything is computed column-wise on one matrix, so adding assets widens
+the arrays instead of adding Python loops. Rolling mean/volatility/beta use
+cumulative sums and the trailing-peak drawdown uses pandas' deque-based
+rolling max, all O(n) per asset; rolling historical VaR/CVaR sort sliding
+windows in memory-bounded chunks.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+PERIODS_PER_YEAR = 252
+ROLLING_WINDOWS = [30, 90, 252]
+
+
+def calculate_volatility(price_series, periods_per_year=PERIODS_PER_YEAR):
+    returns = price_series.pct_change().dropna()
+    return returns.std() * np.sqrt(periods_per_year)
+
+
+def calculate_max_drawdown(price_series):
+    cumulative = (1 + price_series.pct_change()).cumprod()
+    peak = cumulative.cummax()
+    drawdown = (cumulative - peak) / peak
+    return drawdown.min()
+
+
+# Simple returns for several assets on one date index.
+#   calendar="union":  each asset's returns on its own trading days, NaN
+#                      where it did not trade (per-asset statistics)
+#   calendar="common": returns between the dates on which every asset traded,
+#                      so a 24/7 asset's weekend move lands in Monday's return
+#                      (covariance, beta and portfolio figures)
+def aligned_returns(closes, calendar="union"):
+    closes = {t: s.dropna() for t, s in closes.items() if len(s.dropna())}
+    if calendar == "union":
+        return pd.DataFrame({t: s.pct_change() for t, s in closes.items()}).iloc[1:]
+    if calendar != "common":
+        raise ValueError(f"Unknown calendar: {calendar!r}")
+    dates = None
+    for series in closes.values():
+        dates = series.index if dates is None else dates.intersection(series.index)
+    prices = pd.DataFrame({t: s.reindex(dates) for t, s in closes.items()})
+    return prices.pct_change().iloc[1:]
+
+
+def wealth(returns):
+    return (1 + returns.fillna(0)).cumprod()
+
+
+# Drawdown from the running peak, counting the starting value of 1 as a peak
+def drawdowns(returns):
+    w = wealth(returns)
+    return w / w.cummax().clip(lower=1) - 1
+
+
+def _tail(values, confidence):
+    level = np.nanquantile(values, 1 - confidence, axis=0)
+    below = np.where(values <= level, values, np.nan)
+    with np.errstate(invalid="ignore"):
+        return level, np.nanmean(below, axis=0)
+
+
+# Per-asset summary: annualized volatility, max drawdown, historical and
+# parametric (normal) one-period VaR/CVaR as returns (negative = loss), and
+# beta against `benchmark` (a returns Series on the same index, optional).
+def risk_summary(returns, confidence=0.95, benchmark=None, periods_per_year=PERIODS_PER_YEAR):
+    values = returns.to_numpy(dtype=float)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0, ddof=1)
+    z = NormalDist().inv_cdf(1 - confidence)
+    hist_var, hist_cvar = _tail(values, confidence)
+    summary = pd.DataFrame({
+        "Volatility": std * np.sqrt(periods_per_year),
+        "Max Drawdown": drawdowns(returns).min().to_numpy(),
+        "VaR (Hist)": hist_var,
+        "CVaR (Hist)": hist_cvar,
+        "VaR (Normal)": mean + z * std,
+        "CVaR (Normal)": mean - std * NormalDist().pdf(z) / (1 - confidence),
+    }, index=returns.columns)
+    if benchmark is not None:
+        summary["Beta"] = betas(returns, benchmark).to_numpy()
+    return summary
+
+
+# Beta of each column against `benchmark` (a returns Series), over the dates
+# where both have a return. Both should be measured between the same dates,
+# e.g. common-calendar returns for a benchmark built from them.
+def betas(returns, benchmark):
+    values = returns.to_numpy(dtype=float)
+    b = benchmark.reindex(returns.index).to_numpy(dtype=float)[:, None]
+    mask = ~np.isnan(values) & ~np.isnan(b)
+    n = mask.sum(axis=0)
+    x = np.where(mask, values, 0.0)
+    y = np.where(mask, b, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = ((x * y).sum(0) - x.sum(0) * y.sum(0) / n) / (n - 1)
+        var = ((y * y).sum(0) - y.sum(0) ** 2 / n) / (n - 1)
+    return pd.Series(cov / var, index=returns.columns, name="Beta")
+
+
+def _window_sums(x, window):
+    c = np.concatenate([np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)])
+    return c[window:] - c[:-window]
+
+
+def _pad(values, window, index, columns):
+    out = np.full((len(index), values.shape[1]), np.nan)
+    out[window - 1:] = values
+    return pd.DataFrame(out, index=index, columns=columns)
+
+
+# Historical VaR/CVaR over every trailing window, defined as in _tail. Each
+# asset's windows are sorted as contiguous rows, a block of assets at a time,
+# so memory stays near `memory_budget` bytes for any matrix size.
+def _rolling_tail(values, window, confidence, min_periods, memory_budget=64 * 2**20):
+    N = values.shape[1]
+    series = np.ascontiguousarray(np.where(np.isnan(values), np.inf, values).T)
+    windows = sliding_window_view(series, window, axis=1)
+    counts = _window_sums((~np.isnan(values)).astype(float), window).T
+    var = np.full(counts.shape, np.nan)
+    cvar = np.full(counts.shape, np.nan)
+    chunk = max(1, memory_budget // (counts.shape[1] * window * 8 * 2))
+    for start in range(0, N, chunk):
+        block = np.sort(windows[start:start + chunk], axis=2)
+        n = counts[start:start + chunk]
+        pos = (1 - confidence) * np.maximum(n - 1, 0)
+        lo = np.floor(pos).astype(int)
+        hi = np.minimum(lo + 1, np.maximum(n - 1, 0).astype(int))
+        v_lo = np.take_along_axis(block, lo[..., None], 2)[..., 0]
+        v_hi = np.take_along_axis(block, hi[..., None], 2)[..., 0]
+        with np.errstate(invalid="ignore"):
+            level = v_lo + (pos - lo) * (v_hi - v_lo)
+            # Mean of the returns at or below the VaR level; sorted, so the
+            # first `below` entries of each window
+            below = (block <= level[..., None]).sum(axis=2)
+            k = max(int(below.max()), 1)
+            sums = np.where(np.arange(k) < below[..., None], block[..., :k], 0.0).sum(axis=2)
+            ok = n >= min_periods
+            var[start:start + chunk] = np.where(ok, level, np.nan)
+            cvar[start:start + chunk] = np.where(ok, sums / below, np.nan)
+    return var.T, cvar.T
+
+
+# Rolling versions of the summary metrics over `window` rows. Windows with
+# fewer than `min_periods` observations (default: half the window) are NaN.
+def rolling_risk(returns, window, confidence=0.95, benchmark=None, min_periods=None,
+                 periods_per_year=PERIODS_PER_YEAR):
+    index, columns = returns.index, returns.columns
+    values = returns.to_numpy(dtype=float)
+    min_periods = min_periods or max(2, window // 2)
+    if len(values) < window:
+        empty = pd.DataFrame(np.nan, index=index, columns=columns)
+        names = ["Volatility", "Drawdown", "VaR (Hist)", "CVaR (Hist)", "VaR (Normal)", "CVaR (Normal)"]
+        return {k: empty for k in names + (["Beta"] if benchmark is not None else [])}
+
+    mask = ~np.isnan(values)
+    x = np.where(mask, values, 0.0)
+    n = _window_sums(mask.astype(float), window)
+    s1 = _window_sums(x, window)
+    s2 = _window_sums(x * x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / n
+        std = np.sqrt(np.maximum((s2 - s1 * s1 / n) / (n - 1), 0))
+    enough = n >= min_periods
+    mean, std = np.where(enough, mean, np.nan), np.where(enough, std, np.nan)
+
+    w = wealth(returns)
+    hist_var, hist_cvar = _rolling_tail(values, window, confidence, min_periods)
+    z = NormalDist().inv_cdf(1 - confidence)
+    result = {
+        "Volatility": _pad(std * np.sqrt(periods_per_year), window, index, columns),
+        "Drawdown": w / w.rolling(window, min_periods=1).max() - 1,
+        "VaR (Hist)": _pad(hist_var, window, index, columns),
+        "CVaR (Hist)": _pad(hist_cvar, window, index, columns),
+        "VaR (Normal)": _pad(mean + z * std, window, index, columns),
+        "CVaR (Normal)": _pad(mean - std * NormalDist().pdf(z) / (1 - confidence), window, index, columns),
+    }
+    if benchmark is not None:
+        result["Beta"] = rolling_betas(returns, benchmark, window, min_periods)
+    return result
+
+
+# Trailing-window betas against `benchmark`, on the dates of `returns`
+def rolling_betas(returns, benchmark, window, min_periods=None):
+    index, columns = returns.index, returns.columns
+    min_periods = min_periods or max(2, window // 2)
+    if len(returns) < window:
+        return pd.DataFrame(np.nan, index=index, columns=columns)
+    values = returns.to_numpy(dtype=float)
+    b = benchmark.reindex(index).to_numpy(dtype=float)[:, None]
+    joint = ~np.isnan(values) & ~np.isnan(b)
+    xb = np.where(joint, values, 0.0)
+    yb = np.where(joint, b, 0.0)
+    nb = _window_sums(joint.astype(float), window)
+    sx, sy = _window_sums(xb, window), _window_sums(yb, window)
+    sxy, syy = _window_sums(xb * yb, window), _window_sums(yb * yb, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (sxy - sx * sy / nb) / (syy - sy * sy / nb)
+    return _pad(np.where(nb >= min_periods, beta, np.nan), window, index, columns)
+
+
+# Portfolio-level figures from the covariance matrix of common-calendar
+# returns. `weights` defaults to equal weight.
+def portfolio_risk(returns, weights=None, confidence=0.95, periods_per_year=PERIODS_PER_YEAR):
+    returns = returns.dropna()
+    n_assets = returns.shape[1]
+    w = np.full(n_assets, 1 / n_assets) if weights is None else np.asarray(weights, dtype=float)
+    cov = np.cov(returns.to_numpy(), rowvar=False).reshape(n_assets, n_assets)
+    port_var = float(w @ cov @ w)
+    port = pd.Series(returns.to_numpy() @ w, index=returns.index, name="Portfolio")
+    asset_vol = np.sqrt(np.diag(cov))
+    port_summary = risk_summary(port.to_frame(), confidence, periods_per_year=periods_per_year).iloc[0]
+    figures = {
+        "Volatility": np.sqrt(port_var * periods_per_year),
+        "Max Drawdown": port_summary["Max Drawdown"],
+        "VaR (Hist)": port_summary["VaR (Hist)"],
+        "CVaR (Hist)": port_summary["CVaR (Hist)"],
+        "VaR (Normal)": port_summary["VaR (Normal)"],
+        "CVaR (Normal)": port_summary["CVaR (Normal)"],
+        "Diversification Ratio": float(w @ asset_vol) / np.sqrt(port_var) if port_var > 0 else np.nan,
+    }
+    contribution = pd.Series(w * (cov @ w) / port_var if port_var > 0 else np.nan,
+                             index=returns.columns, name="Risk Contribution")
+    return figures, contribution, port, pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
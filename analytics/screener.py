@@ -0,0 +1,145 @@
+"""Screening a large ticker universe.
+
+The universe is processed in batches: each batch is loaded with one batched
+store refresh, stacked into a (bar x ticker) matrix and scored with the
+column-wise indicator and forecast functions, so the cost per ticker is a
+column of array math rather than a Python loop. ``screen`` yields each
+batch's scored rows as soon as they are ready, so a page can show partial
+results while the rest of the universe is still loading.
+"""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import perf
+from .forecast import forecast_direction
+from .indicators import latest_indicators, stack_closes
+from .store import load_many
+
+SHORT_WINDOW = 20
+LONG_WINDOW = 100
+BATCH_SIZE = 100
+
+COLUMNS = ["Ticker", "Score", "RSI", "MACD Signal", "MA Diff", "Forecast", "Recommendation"]
+
+SYMBOL_COLUMNS = ["symbol", "ticker", "code"]
+
+
+# Tickers from a universe file: a CSV with a Symbol/Ticker column, or plain
+# text with one symbol per line (commas and blank lines are tolerated).
+# `source` is a path or an open (text or binary) file, such as a Streamlit
+# upload. Order is kept, duplicates dropped.
+def read_universe(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            source = f.read()
+    else:
+        source = source.read()
+    if isinstance(source, bytes):
+        source = source.decode("utf-8-sig")
+
+    first = source.lstrip().split("\n", 1)[0].strip().lower()
+    header = [c.strip() for c in first.split(",")]
+    column = next((c for c in header if c in SYMBOL_COLUMNS), None)
+    if column is not None:
+        table = pd.read_csv(io.StringIO(source), dtype=str)
+        table.columns = [c.strip().lower() for c in table.columns]
+        symbols = table[column].dropna().tolist()
+    else:
+        symbols = source.replace(",", "\n").split("\n")
+    symbols = [s.strip().upper() for s in symbols]
+    return list(dict.fromkeys(s for s in symbols if s and not s.startswith("#")))
+
+
+def recommendation(score):
+    if score >= 3:
+        return "🟢 Strong Buy"
+    if score <= -3:
+        return "🔴 Strong Sell"
+    return "🟡 Hold/Wait"
+
+
+# -- Total Score --
+# `latest` is one ticker's row of latest_indicators(); `forecast` is its
+# 'up'/'down'/'neutral' direction from the batch forecasting engine
+def score_asset(latest, forecast):
+    rsi = latest['RSI']
+    macd_val, signal_val = latest['MACD'], latest['Signal']
+    ma_s, ma_l = latest['MA Short'], latest['MA Long']
+
+    score = 0
+    if rsi < 30: score += 1
+    elif rsi > 70: score -= 1
+    if macd_val > signal_val: score += 1
+    else: score -= 1
+    if ma_s > ma_l: score += 1
+    else: score -= 1
+    if forecast == 'up': score += 1
+    elif forecast == 'down': score -= 1
+
+    return score, rsi, macd_val - signal_val, ma_s - ma_l, forecast, recommendation(score)
+
+
+# Score every row of latest_indicators() at once, with the same rules as
+# score_asset. `forecasts` maps ticker to 'up' / 'down' / 'neutral'.
+def score_frame(latest, forecasts):
+    rsi = latest["RSI"].to_numpy(dtype=float)
+    macd_diff = (latest["MACD"] - latest["Signal"]).to_numpy(dtype=float)
+    ma_diff = (latest["MA Short"] - latest["MA Long"]).to_numpy(dtype=float)
+    forecast = pd.Series(forecasts, dtype=object).reindex(latest.index).fillna("neutral")
+
+    with np.errstate(invalid="ignore"):
+        score = (np.where(rsi < 30, 1, np.where(rsi > 70, -1, 0))
+                 + np.where(macd_diff > 0, 1, -1)
+                 + np.where(ma_diff > 0, 1, -1)
+                 + forecast.map({"up": 1, "down": -1}).fillna(0).to_numpy(dtype=int))
+    return pd.DataFrame({
+        "Ticker": latest.index,
+        "Score": score,
+        "RSI": np.round(rsi, 2),
+        "MACD Signal": np.round(macd_diff, 4),
+        "MA Diff": np.round(ma_diff, 4),
+        "Forecast": forecast.to_numpy(),
+        "Recommendation": [recommendation(s) for s in score],
+    }, columns=COLUMNS)
+
+
+# Score already-loaded close series; tickers with fewer than three bars are skipped
+def score_closes(closes, days_forward=7):
+    closes = {t: s for t, s in closes.items() if len(s.dropna()) > 2}
+    if not closes:
+        empty = pd.DataFrame(columns=["RSI", "MACD", "Signal", "MA Short", "MA Long"], dtype=float)
+        return score_frame(empty, {})
+    with perf.span("indicators", rows=len(closes)):
+        latest = latest_indicators(stack_closes(closes), short_window=SHORT_WINDOW, long_window=LONG_WINDOW)
+    with perf.span("forecast", rows=len(closes), cache="hit"):
+        forecasts = forecast_direction(closes, days_forward, model="holt")
+    return score_frame(latest, forecasts)
+
+
+def _score_batch(tickers, period, days_forward):
+    frames, errors = load_many(tickers, period, columns=["Close"])
+    closes = {t: f["Close"] for t, f in frames.items()}
+    rows = score_closes(closes, days_forward)
+    errors.update({t: "not enough data" for t in closes if t not in set(rows["Ticker"])})
+    return rows, errors
+
+
+# Score `tickers` in batches of `batch_size`. Yields (scored rows, errors,
+# tickers done so far) after every batch.
+def screen(tickers, period="6mo", days_forward=7, batch_size=BATCH_SIZE):
+    tickers = list(dict.fromkeys(tickers))
+    for start in range(0, len(tickers), batch_size):
+        batch = tickers[start:start + batch_size]
+        rows, errors = _score_batch(batch, period, days_forward)
+        yield rows, errors, start + len(batch)
+
+
+# One page of a results table, sorted without touching the scores
+def page(table, sort_by="Score", ascending=False, page_size=50, number=1):
+    ordered = table.sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+    start = (number - 1) * page_size
+    return ordered.iloc[start:start + page_size]
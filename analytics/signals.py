@@ -0,0 +1,143 @@
+"""Indicator buy/sell rules evaluated at every bar.
+
+The Technical Indicators page and ``score_asset`` judge only the latest bar.
+Here the same rules run over a whole (bar x ticker) close matrix, every bar
+and every ticker at once, so they can be backtested and their historical
+edge measured across a universe:
+
+    composite  the Technical Indicators rule: buy when RSI < 30 with MACD
+               above its signal line and the short MA above the long one,
+               sell when RSI > 70 with both crosses down
+    score      the Score Performance score (RSI, MACD, MA and forecast
+               legs, -4..4), long from a bar scoring at least ``entry``
+               until one scoring at most ``exit``
+
+The forecast leg is the Holt direction ``days_forward`` bars ahead as at
+each bar, as in the walk-forward evaluation: alpha/beta are chosen on each
+ticker's first ``MIN_TRAIN`` bars and the filter then runs forward, so no
+bar sees later data. Before that the leg is neutral.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_signals, signals_summary
+from .evaluation import MIN_TRAIN
+from .forecast import holt_filter, holt_fit
+from .indicators import compute_ma, compute_macd, compute_rsi, stack_closes
+from .screener import LONG_WINDOW, SHORT_WINDOW
+
+RULES = ["composite", "score"]
+
+
+# Every indicator the rules read, as (bar x ticker) matrices
+def indicator_series(close, rsi_window=14, rsi_method="sma", short_window=20, long_window=50):
+    macd, signal_line = compute_macd(close)
+    ma_short, ma_long = compute_ma(close, short_window, long_window)
+    return {
+        "RSI": compute_rsi(close, rsi_window, rsi_method),
+        "MACD": macd,
+        "Signal": signal_line,
+        "MA Short": ma_short,
+        "MA Long": ma_long,
+    }
+
+
+# 1 on buy bars, -1 on sell bars, else 0. Comparisons with a missing value
+# are false, as on the page.
+def composite_signal(indicators):
+    rsi = indicators["RSI"]
+    macd_cross = indicators["MACD"] > indicators["Signal"]
+    ma_cross = indicators["MA Short"] > indicators["MA Long"]
+    buy = (rsi < 30) & macd_cross & ma_cross
+    sell = (rsi > 70) & ~macd_cross & ~ma_cross
+    return buy.astype(int) - sell.astype(int)
+
+
+# Holt forecast direction at every bar of a bar-aligned close matrix (see
+# stack_closes): 1 up, -1 down, 0 neutral (a move within `threshold`, or too
+# few bars to fit). Parameters are fitted for all tickers in one grid search
+# and one filter pass gives every ticker's level and trend at every bar, as
+# in evaluation's per-ticker pass.
+def forecast_series(close, days_forward=7, threshold=0.01, min_train=MIN_TRAIN):
+    y = np.log(close.to_numpy(dtype=float))
+    n_bars, n_tickers = y.shape
+    first = n_bars - (~np.isnan(y)).sum(axis=0)
+    rows = np.minimum(first[None, :] + np.arange(min_train)[:, None], max(n_bars - 1, 0))
+    enough = n_bars - first >= min_train
+    train = np.where(enough, y[rows, np.arange(n_tickers)] if n_bars else np.nan, np.nan)
+    params, _ = holt_fit(train)
+    levels, trends = holt_filter(y, params)
+    with np.errstate(invalid="ignore"):
+        change = np.exp(levels + days_forward * trends - y) - 1
+        directions = np.where(change > threshold, 1, np.where(change < -threshold, -1, 0))
+    fitted = np.arange(n_bars)[:, None] >= first[None, :] + min_train - 1
+    return pd.DataFrame(np.where(fitted & enough, directions, 0), index=close.index, columns=close.columns)
+
+
+# score_frame's score at every bar; NaN until the long MA and RSI exist
+def score_series(indicators, forecast=None):
+    rsi = indicators["RSI"]
+    score = ((rsi < 30).astype(int) - (rsi > 70).astype(int)
+             + 2 * (indicators["MACD"] > indicators["Signal"]).astype(int) - 1
+             + 2 * (indicators["MA Short"] > indicators["MA Long"]).astype(int) - 1)
+    if forecast is not None:
+        score = score + forecast
+    return score.where(rsi.notna() & indicators["MA Long"].notna())
+
+
+# 1 from each entry bar until the next exit bar, else 0; an entry wins a tie
+def hold_between(entries, exits):
+    state = pd.DataFrame(np.where(entries, 1.0, np.where(exits, 0.0, np.nan)),
+                         index=entries.index, columns=entries.columns)
+    return state.ffill().fillna(0.0)
+
+
+# Mean forward return over `horizon` bars from bars grouped by `signal`
+# value, pooled over every ticker, with the hit rate (share of positive
+# forward returns) and the number of bars. Rows are labelled by signal value
+# as text, with an "All Bars" row last.
+def signal_edge(close, signal, horizon=7):
+    forward = close.shift(-horizon) / close - 1
+    table = pd.DataFrame({"Signal": signal.to_numpy().ravel(), "Forward": forward.to_numpy().ravel()}).dropna()
+    grouped = table.groupby("Signal")["Forward"]
+    edge = pd.DataFrame({
+        "Mean Return": grouped.mean(),
+        "Hit Rate": grouped.apply(lambda r: (r > 0).mean()),
+        "Bars": grouped.size(),
+    })
+    edge.index = pd.Index([f"{value:g}" for value in edge.index], name="Signal")
+    edge.loc["All Bars"] = [table["Forward"].mean(), (table["Forward"] > 0).mean(), len(table)]
+    return edge
+
+
+# Run one rule over every ticker in `closes` (ticker -> close series) and
+# backtest it long/flat. Returns a dict with the bar-aligned "Close" matrix,
+# the rule's per-bar "Signal" (events for composite, score for score), the
+# backtest_signals matrices under "Backtest", the per-ticker "Summary", and
+# the forward-return "Edge" of each signal value.
+def signal_backtest(closes, rule="composite", entry=3, exit=-3, days_forward=7, forecast=True):
+    if rule not in RULES:
+        raise ValueError(f"Unknown signal rule: {rule!r}")
+    close = stack_closes({t: s for t, s in closes.items() if len(s.dropna()) > 2})
+    if rule == "composite":
+        signal = composite_signal(indicator_series(close))
+        position = hold_between(signal == 1, signal == -1)
+    else:
+        indicators = indicator_series(close, short_window=SHORT_WINDOW, long_window=LONG_WINDOW)
+        signal = score_series(indicators, forecast_series(close, days_forward) if forecast else None)
+        position = hold_between(signal >= entry, signal <= exit)
+    position = position.where(close.notna(), 0.0)
+    backtest = backtest_signals(close, position)
+    return {
+        "Close": close,
+        "Signal": signal.where(close.notna()),
+        "Backtest": backtest,
+        "Summary": signals_summary(backtest),
+        "Edge": signal_edge(close, signal.where(close.notna()), days_forward),
+    }
+
+
+# One ticker's column of a bar-aligned matrix, back on its own dates
+def on_dates(matrix, ticker, index):
+    return pd.Series(matrix[ticker].to_numpy()[len(matrix) - len(index):], index=index, name=ticker)
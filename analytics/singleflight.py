@@ -0,0 +1,73 @@
+"""Coalescing of concurrent identical calls ("single flight").
+
+One Streamlit server is shared by every session, so at busy moments many
+sessions ask for the same download or computation at once. A
+``SingleFlight`` lets the first caller for a key run it while every later
+caller for the same key, until it finishes, waits for that run and gets its
+result (or its exception). Nothing is cached once the call returns; the
+caches around it keep results.
+
+``do`` runs the call in the first caller's thread. ``submit`` hands it to an
+executor instead and returns the shared Future, so a bounded pool caps how
+many distinct calls run at once however many sessions are waiting.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.calls = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            self.calls += 1
+            return future, True
+
+    def _land(self, key, future):
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    # Call fn(*args) unless a call for `key` is already running, in which
+    # case wait for that one. Returns its result or raises its exception.
+    def do(self, key, fn, *args):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._land(key, future)
+        return future.result()
+
+    # Future for fn(*args) run on the executor, shared by every caller
+    # submitting the same `key` while it is pending or running
+    def submit(self, key, fn, *args):
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            future = self.executor.submit(fn, *args)
+            self._flights[key] = future
+            self.calls += 1
+        future.add_done_callback(lambda f: self._land(key, f))
+        return future
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
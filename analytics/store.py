@@ -0,0 +1,412 @@
+"""Persistent per-ticker OHLCV store.
+
+Each ticker's full daily history is downloaded once and kept as a Parquet
+file under ``MARKET_DATA_DIR``. Later loads only ask the provider for the
+bars newer than the last stored one, and every ``period`` a page asks for is
+a slice of the single in-memory frame instead of a fresh download.
+
+Intraday data is kept by a second store at the finest interval (1m) in
+compact form (see ``analytics.bars``). The 5m, 1h and other intraday
+intervals are resampled from it on first use and cached until new bars
+arrive.
+
+Data that has been seen once is never waited for again: a ticker already
+in memory or on disk is served as it is, and if it is older than
+``refresh_seconds`` a background thread fetches the new bars while the page
+renders (stale-while-revalidate). Only tickers with no stored data block
+on the provider. Pass ``wait=True`` to load fresh data instead, as the
+batch CLI does.
+
+Every frame the store holds has a version number, renewed whenever new bars
+are merged in. Results computed from a ticker's data are cached under it in
+``analytics.cache`` with ``derived``, and dropped when the version changes.
+The version used is the one of the frame ``load``/``load_many`` last handed
+to the calling thread (``loaded_version``), so a background refresh that
+lands between a page's load and its ``derived`` call cannot file a result
+computed from the old bars under the new version.
+"""
+
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import perf
+from .cache import cached, cached_many, derived_cache
+from .bars import BASE_INTERVAL, compact, is_intraday, resample
+from .providers import COLUMNS, default_provider
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get(
+    "MARKET_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".market_data"),
+)
+REFRESH_SECONDS = int(os.environ.get("MARKET_DATA_REFRESH", 15 * 60))
+BACKGROUND_WORKERS = int(os.environ.get("MARKET_DATA_BACKGROUND_WORKERS", 2))
+INTRADAY_REFRESH_SECONDS = int(os.environ.get("MARKET_DATA_INTRADAY_REFRESH", 60))
+
+# Longest history Yahoo serves for a first 1-minute download; later deltas
+# keep extending the stored series
+INTRADAY_FULL_PERIOD = "5d"
+
+PERIODS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+    "max": None,
+}
+
+
+def period_start(last, period):
+    """First timestamp covered by ``period`` counting back from ``last``."""
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported period: {period!r}")
+    offset = PERIODS[period]
+    return None if offset is None else last - offset
+
+
+# Versions are unique across stores, so a daily and an intraday frame of the
+# same ticker never share cache entries
+_versions = itertools.count(1)
+
+# Background refreshes of stale tickers, shared by every store
+_background = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="revalidate")
+
+
+class OHLCVStore:
+    """Store for one bar interval.
+
+    ``interval`` is what the provider is asked for; other intervals passed to
+    ``load``/``load_many`` are resampled from it. ``full_period`` bounds the
+    first download, and ``compact`` keeps frames in the float32 form from
+    ``analytics.bars``.
+    """
+
+    def __init__(self, root=DATA_DIR, refresh_seconds=REFRESH_SECONDS, provider=None,
+                 interval="1d", full_period="max", compact=False):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self.provider = provider or default_provider()
+        self.interval = interval
+        self.full_period = full_period
+        self.compact = compact
+        self._frames = {}
+        self._checked = {}
+        self._versions = {}
+        self._pending = set()
+        self._locks = {}
+        self._lock = threading.Lock()
+        # Per thread: ticker -> version of the frame last loaded
+        self._loaded = threading.local()
+
+    def _path(self, ticker):
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+        suffix = "" if self.interval == "1d" else f"_{self.interval}"
+        return os.path.join(self.root, f"{name}{suffix}.parquet")
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _read(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None, 0.0
+        return pd.read_parquet(path), os.path.getmtime(path)
+
+    def _write(self, ticker, frame):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(ticker)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        frame.to_parquet(tmp)
+        os.replace(tmp, path)
+
+    def _is_stale(self, ticker):
+        if ticker not in self._frames:
+            frame, mtime = self._read(ticker)
+            if frame is not None:
+                with self._lock:
+                    self._frames[ticker] = frame
+                    self._versions[ticker] = next(_versions)
+                self._checked[ticker] = mtime
+        return time.time() - self._checked.get(ticker, 0.0) >= self.refresh_seconds
+
+    # The last two stored bars are requested again: the newest may have been a
+    # partial bar, and the one before it tells us whether Yahoo re-adjusted the
+    # history (split/dividend), in which case the whole series is downloaded again.
+    def _delta_start(self, ticker):
+        frame = self._frames.get(ticker)
+        if frame is None or frame.empty:
+            return None
+        start = frame.index[-2] if len(frame) > 1 else frame.index[-1]
+        return start if is_intraday(self.interval) else start.date()
+
+    def _merge(self, frame, new):
+        if frame is None or frame.empty:
+            return new
+        if new.empty:
+            return frame
+        overlap = frame.index[-2] if len(frame) > 1 else frame.index[-1]
+        if overlap in new.index:
+            if abs(new.at[overlap, "Close"] / frame.at[overlap, "Close"] - 1) > 1e-6:
+                return None
+        return pd.concat([frame.loc[frame.index < new.index[0]], new])
+
+    def _store(self, ticker, frame):
+        if self.compact:
+            frame = compact(frame)
+        changed = frame is not self._frames.get(ticker) and not frame.empty
+        if changed:
+            self._write(ticker, frame)
+        # The frame and its version change together for _snapshot
+        with self._lock:
+            previous = self._versions.get(ticker) if changed else None
+            if changed:
+                self._versions[ticker] = next(_versions)
+            self._frames[ticker] = frame
+        if previous is not None:
+            derived_cache.invalidate(ticker, previous)
+        self._checked[ticker] = time.time()
+
+    # The ticker's frame and its version, read together
+    def _snapshot(self, ticker):
+        with self._lock:
+            return self._frames[ticker], self._versions.get(ticker, 0)
+
+    def _served(self, ticker, frame, version):
+        versions = getattr(self._loaded, "versions", None)
+        if versions is None:
+            versions = self._loaded.versions = {}
+        versions[ticker] = version
+        return frame
+
+    # Bring every stale ticker up to date with batched provider calls: one
+    # delta fetch for all of them, then a full download for new tickers and
+    # any whose history was re-adjusted. Network errors keep the stored data.
+    def refresh(self, tickers, force=False):
+        tickers = sorted(set(tickers))
+        locks = [self._ticker_lock(t) for t in tickers]
+        for lock in locks:
+            lock.acquire()
+        try:
+            stale = [t for t in tickers if self._is_stale(t) or force]
+            if not stale:
+                return {}
+            perf.miss()
+            starts = {t: self._delta_start(t) for t in stale}
+            with perf.span("fetch", "fetch") as s:
+                frames, errors = self.provider.fetch_many(stale, self.full_period, self.interval, start=starts)
+                s.rows = sum(len(f) for f in frames.values())
+            full = []
+            for ticker, new in frames.items():
+                merged = self._merge(self._frames.get(ticker), new)
+                if merged is None:
+                    full.append(ticker)
+                else:
+                    self._store(ticker, merged)
+            if full:
+                with perf.span("fetch (full history)", "fetch") as s:
+                    frames, more = self.provider.fetch_many(full, self.full_period, self.interval)
+                    s.rows = sum(len(f) for f in frames.values())
+                errors.update(more)
+                for ticker, new in frames.items():
+                    self._store(ticker, new)
+            for ticker in errors:
+                if ticker in self._frames:
+                    self._checked[ticker] = time.time()
+            return {t: e for t, e in errors.items() if t not in self._frames}
+        finally:
+            for lock in locks:
+                lock.release()
+
+    # Read stored files for tickers not yet in memory. Another thread may be
+    # fetching a ticker right now; its lock is only waited on when there is
+    # nothing stored to serve in the meantime.
+    def _load_stored(self, tickers):
+        for ticker in tickers:
+            if ticker not in self._frames and os.path.exists(self._path(ticker)):
+                with self._ticker_lock(ticker):
+                    self._is_stale(ticker)
+
+    # Make `tickers` available, blocking only for tickers with no data.
+    # Stale tickers are queued for a background refresh unless `wait`.
+    def _ensure(self, tickers, wait=False):
+        if wait:
+            return self.refresh(tickers)
+        self._load_stored(tickers)
+        unseen = [t for t in tickers if t not in self._frames]
+        now = time.time()
+        stale = [t for t in tickers if t in self._frames
+                 and now - self._checked.get(t, 0.0) >= self.refresh_seconds]
+        if stale:
+            self.refresh_in_background(stale)
+        return self.refresh(unseen) if unseen else {}
+
+    def refresh_in_background(self, tickers):
+        """Queue a refresh of ``tickers``; ones already queued are skipped."""
+        with self._lock:
+            tickers = [t for t in dict.fromkeys(tickers) if t not in self._pending]
+            self._pending.update(tickers)
+        if tickers:
+            return _background.submit(self._background_refresh, tickers)
+        return None
+
+    def _background_refresh(self, tickers):
+        try:
+            for ticker, error in self.refresh(tickers).items():
+                log.warning("Background refresh of %s failed: %s", ticker, error)
+        except Exception:
+            log.exception("Background refresh of %s failed", tickers)
+        finally:
+            with self._lock:
+                self._pending.difference_update(tickers)
+
+    def history(self, ticker, wait=False):
+        """Full stored history for ``ticker``.
+
+        Stale data is returned at once and refreshed in the background; with
+        ``wait`` it is refreshed first. Like ``yf.Ticker.history`` this
+        returns an empty frame when nothing could be fetched, so pages keep
+        their existing "no data" handling.
+        """
+        frame, version = self._history(ticker, wait)
+        return self._served(ticker, frame, version)
+
+    def _history(self, ticker, wait=False):
+        with perf.span("store.history", "data", cache="hit"):
+            errors = self._ensure([ticker], wait)
+        if ticker in errors:
+            log.warning("Failed to fetch %s: %s", ticker, errors[ticker])
+            return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([]), dtype=float), 0
+        return self._snapshot(ticker)
+
+    def _slice(self, frame, period, columns):
+        if not frame.empty:
+            start = period_start(frame.index[-1], period)
+            if start is not None:
+                frame = frame.iloc[frame.index.searchsorted(start):]
+        if columns is not None:
+            frame = frame[list(columns)]
+        return frame
+
+    def version(self, ticker):
+        """Version of the ticker's stored frame; 0 if nothing is stored."""
+        return self._versions.get(ticker, 0)
+
+    def loaded_version(self, ticker):
+        """Version of the ticker's frame last loaded by this thread.
+
+        Falls back to the current ``version`` for a ticker the thread has
+        not loaded. Results computed from loaded data are cached under this
+        version, which may be older than ``version`` if a refresh has landed
+        since the load.
+        """
+        versions = getattr(self._loaded, "versions", None) or {}
+        return versions.get(ticker, self.version(ticker))
+
+    def derived(self, ticker, name, params, compute):
+        """Result of ``compute()`` cached for the data this thread loaded.
+
+        ``params`` must hold everything besides the stored bars that the
+        result depends on, including the period it was computed over.
+        """
+        return cached((ticker, self.loaded_version(ticker), name, params), compute)
+
+    def derived_many(self, tickers, name, params, compute_many):
+        """``derived`` for several tickers, computing the misses in one call.
+
+        ``compute_many(missing)`` returns ``{ticker: result}`` for the list
+        of tickers that were not cached.
+        """
+        keys = {t: (t, self.loaded_version(t), name, params) for t in dict.fromkeys(tickers)}
+        return cached_many(keys, compute_many)
+
+    # Full history at a coarser `interval`, resampled from the stored bars
+    # on first use and kept until new bars arrive
+    def _at_interval(self, ticker, frame, version, interval):
+        if interval is None or interval == self.interval or frame.empty:
+            return frame
+
+        def build():
+            with perf.span(f"resample {interval}", rows=len(frame)):
+                return resample(frame, interval)
+        return cached((ticker, version, "resample", (interval,)), build)
+
+    def load(self, ticker, period="max", columns=None, interval=None, wait=False):
+        """``period`` slice of the stored history; rows are not copied.
+
+        ``interval`` resamples to coarser bars than the store's own.
+        """
+        frame, version = self._history(ticker, wait)
+        frame = self._slice(self._at_interval(ticker, frame, version, interval), period, columns)
+        return self._served(ticker, frame, version)
+
+    def load_many(self, tickers, period="max", columns=None, interval=None, wait=False):
+        """Load several tickers with one batched refresh.
+
+        Returns ``(frames, errors)``; a ticker that could not be fetched is
+        reported in ``errors`` instead of failing the others.
+        """
+        with perf.span("store.load_many", "data", cache="hit") as s:
+            errors = self._ensure(list(dict.fromkeys(tickers)), wait)
+            s.rows = len(tickers)
+        frames = {}
+        for t in dict.fromkeys(tickers):
+            if t not in errors:
+                frame, version = self._snapshot(t)
+                frame = self._slice(self._at_interval(t, frame, version, interval), period, columns)
+                frames[t] = self._served(t, frame, version)
+        return frames, errors
+
+    def clear(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._frames.clear()
+                self._checked.clear()
+                for t, version in self._versions.items():
+                    derived_cache.invalidate(t, version)
+                self._versions.clear()
+            else:
+                self._frames.pop(ticker, None)
+                self._checked.pop(ticker, None)
+                if ticker in self._versions:
+                    derived_cache.invalidate(ticker, self._versions.pop(ticker))
+
+
+_default = OHLCVStore()
+_intraday = OHLCVStore(refresh_seconds=INTRADAY_REFRESH_SECONDS, interval=BASE_INTERVAL,
+                       full_period=INTRADAY_FULL_PERIOD, compact=True)
+
+
+# Daily store for "1d", the compact 1-minute store for intraday intervals
+def get_store(interval="1d"):
+    return _intraday if is_intraday(interval) else _default
+
+
+def load_history(ticker, period="max", columns=None, interval="1d", wait=False):
+    return get_store(interval).load(ticker, period, columns, interval, wait)
+
+
+def load_many(tickers, period="max", columns=None, interval="1d", wait=False):
+    return get_store(interval).load_many(tickers, period, columns, interval, wait)
+
+
+# Cached result derived from a ticker's bars at `interval`; see OHLCVStore.derived
+def derived(ticker, name, params, compute, interval="1d"):
+    return get_store(interval).derived(ticker, name, (interval,) + tuple(params), compute)
+
+
+def derived_many(tickers, name, params, compute_many, interval="1d"):
+    return get_store(interval).derived_many(tickers, name, (interval,) + tuple(params), compute_many)
@@ -0,0 +1,226 @@
+"""Incremental indicators that update in O(1) per new bar.
+
+Each object keeps only the state it needs (a running sum, an EMA value, a
+window of recent inputs) and matches the batch functions in
+``analytics.indicators`` and ``analytics.risk`` to float tolerance:
+
+    StreamingSMA        compute_sma
+    StreamingEMA        compute_ema
+    StreamingMACD       compute_macd
+    StreamingRSI        compute_rsi (method "sma" or "wilder")
+    StreamingDrawdown   calculate_max_drawdown
+    StreamingVolatility calculate_volatility (or a rolling window of it)
+
+Feed one bar with ``update(x)`` or a batch with ``update_many(values)``.
+Until an indicator has enough bars it emits NaN, like the batch versions.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+
+class StreamingIndicator:
+    value = math.nan
+
+    def update(self, x):
+        raise NotImplementedError
+
+    def update_many(self, values):
+        return np.array([self.update(float(x)) for x in values])
+
+
+# Fixed-size window with a running sum. The sum is rebuilt from the buffer
+# once per `window` updates, so rounding error cannot build up over long
+# streams while the cost stays O(1) amortized.
+class _Window:
+    def __init__(self, window):
+        self.window = window
+        self.items = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._since_resum = 0
+
+    def push(self, x):
+        if len(self.items) == self.window:
+            old = self.items[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.items.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self._since_resum += 1
+        if self._since_resum >= self.window:
+            self.total = math.fsum(self.items)
+            self.total_sq = math.fsum(v * v for v in self.items)
+            self._since_resum = 0
+
+    @property
+    def full(self):
+        return len(self.items) == self.window
+
+
+class StreamingSMA(StreamingIndicator):
+    def __init__(self, window):
+        self._window = _Window(window)
+
+    def update(self, x):
+        self._window.push(x)
+        self.value = self._window.total / self._window.window if self._window.full else math.nan
+        return self.value
+
+
+# EMA with adjust=False: seeded with the first input
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        if (span is None) == (alpha is None):
+            raise ValueError("Pass exactly one of span or alpha")
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.min_periods = min_periods
+        self.count = 0
+        self._ema = math.nan
+
+    def update(self, x):
+        self._ema = x if self.count == 0 else self._ema + self.alpha * (x - self._ema)
+        self.count += 1
+        self.value = self._ema if self.count >= self.min_periods else math.nan
+        return self.value
+
+
+class StreamingMACD(StreamingIndicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self._fast = StreamingEMA(span=fast)
+        self._slow = StreamingEMA(span=slow)
+        self._signal = StreamingEMA(span=signal)
+        self.value = (math.nan, math.nan)
+
+    def update(self, x):
+        macd = self._fast.update(x) - self._slow.update(x)
+        self.value = (macd, self._signal.update(macd))
+        return self.value
+
+    def update_many(self, values):
+        out = np.array([self.update(float(x)) for x in values]).reshape(-1, 2)
+        return out[:, 0], out[:, 1]
+
+
+class StreamingRSI(StreamingIndicator):
+    def __init__(self, window=14, method="sma"):
+        if method == "sma":
+            self._gain, self._loss = StreamingSMA(window), StreamingSMA(window)
+        elif method == "wilder":
+            self._gain = StreamingEMA(alpha=1 / window, min_periods=window)
+            self._loss = StreamingEMA(alpha=1 / window, min_periods=window)
+        else:
+            raise ValueError(f"Unknown RSI method: {method!r}")
+        self._prev = None
+
+    def update(self, x):
+        if self._prev is None:
+            self._prev = x
+            return self.value
+        delta = x - self._prev
+        self._prev = x
+        avg_gain = self._gain.update(max(delta, 0.0))
+        avg_loss = self._loss.update(max(-delta, 0.0))
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or avg_gain == avg_loss == 0:
+            self.value = math.nan
+        elif avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - 100 / (1 + avg_gain / avg_loss)
+        return self.value
+
+
+# Drawdown from the running peak. Like calculate_max_drawdown, the first
+# bar only anchors the return series, so the peak starts from the second bar.
+class StreamingDrawdown(StreamingIndicator):
+    def __init__(self):
+        self.started = False
+        self.peak = math.nan
+        self.max_drawdown = math.nan
+
+    def update(self, x):
+        if not self.started:
+            self.started = True
+            return self.value
+        self.peak = x if math.isnan(self.peak) else max(self.peak, x)
+        self.value = x / self.peak - 1
+        self.max_drawdown = self.value if math.isnan(self.max_drawdown) else min(self.max_drawdown, self.value)
+        return self.value
+
+
+# Annualized volatility of simple returns. With window=None it covers every
+# bar seen so far (calculate_volatility); otherwise the last `window` returns.
+class StreamingVolatility(StreamingIndicator):
+    def __init__(self, window=None, periods_per_year=252):
+        self.scale = math.sqrt(periods_per_year)
+        self._window = _Window(window) if window else None
+        self._prev = None
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        if self._prev is None:
+            self._prev = x
+            return self.value
+        r = x / self._prev - 1
+        self._prev = x
+        if self._window is not None:
+            self._window.push(r)
+            n = len(self._window.items)
+            if not self._window.full or n < 2:
+                self.value = math.nan
+                return self.value
+            var = (self._window.total_sq - self._window.total ** 2 / n) / (n - 1)
+        else:
+            # Welford's update
+            self.count += 1
+            d = r - self._mean
+            self._mean += d / self.count
+            self._m2 += d * (r - self._mean)
+            if self.count < 2:
+                return self.value
+            var = self._m2 / (self.count - 1)
+        self.value = math.sqrt(max(var, 0.0)) * self.scale
+        return self.value
+
+
+# One set of live indicators per symbol, for keeping a watchlist current
+# bar by bar without recomputing history.
+class Watchlist:
+    def __init__(self, factory=None):
+        self.factory = factory or default_indicators
+        self.symbols = {}
+
+    def _indicators(self, symbol):
+        if symbol not in self.symbols:
+            self.symbols[symbol] = self.factory()
+        return self.symbols[symbol]
+
+    # Replay history once so the state is warm before live bars arrive
+    def warm_up(self, symbol, closes):
+        for indicator in self._indicators(symbol).values():
+            indicator.update_many(closes)
+        return self.values(symbol)
+
+    def update(self, symbol, close):
+        for indicator in self._indicators(symbol).values():
+            indicator.update(float(close))
+        return self.values(symbol)
+
+    def values(self, symbol):
+        return {name: indicator.value for name, indicator in self._indicators(symbol).items()}
+
+
+def default_indicators():
+    return {
+        "RSI": StreamingRSI(14),
+        "MACD": StreamingMACD(),
+        "MA Short": StreamingSMA(20),
+        "MA Long": StreamingSMA(50),
+        "Drawdown": StreamingDrawdown(),
+        "Volatility": StreamingVolatility(),
+    }
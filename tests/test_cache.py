@@ -0,0 +1,36 @@
+import numpy as np
+
+from analytics.cache import DerivedCache
+
+
+def _filled():
+    cache = DerivedCache()
+    cache.put(("AAPL", 1, "rsi", ()), np.ones(3))
+    cache.put(("AAPL", 2, "rsi", ()), np.ones(3))
+    cache.put(("MSFT", 3, "rsi", ()), np.ones(3))
+    cache.put((("AAPL", "MSFT"), (2, 3), "estimate", ("1y",)), np.ones(3))
+    cache.put((("MSFT", "BTC-USD"), (3, 4), "estimate", ("1y",)), np.ones(3))
+    return cache
+
+
+def test_invalidate_drops_multi_asset_entries_of_the_ticker():
+    cache = _filled()
+    cache.invalidate("AAPL", 2)
+    assert cache.get(("AAPL", 2, "rsi", ())) is None
+    assert cache.get((("AAPL", "MSFT"), (2, 3), "estimate", ("1y",))) is None
+    assert cache.get(("AAPL", 1, "rsi", ())) is not None
+    assert cache.get((("MSFT", "BTC-USD"), (3, 4), "estimate", ("1y",))) is not None
+    assert cache.bytes == 3 * np.ones(3).nbytes
+
+
+def test_invalidate_other_version_keeps_entries():
+    cache = _filled()
+    cache.invalidate("MSFT", 99)
+    assert len(cache) == 5
+
+
+def test_invalidate_every_version():
+    cache = _filled()
+    cache.invalidate("MSFT")
+    assert len(cache) == 2
+    assert cache.get(("AAPL", 1, "rsi", ())) is not None
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.correlation import correlation_analysis, rolling_correlation
+
+
+# Correlated returns on a union calendar: every column has gaps, some share
+# few bars with the others, and one is constant
+def _returns(rows=200, assets=9, seed=0):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, (rows, 1))
+    values = 0.6 * common + rng.normal(0, 0.01, (rows, assets))
+    returns = pd.DataFrame(values, index=pd.bdate_range("2020-01-01", periods=rows),
+                           columns=[f"A{i}" for i in range(assets)])
+    returns = returns.mask(rng.random(returns.shape) < 0.15)
+    returns.iloc[:170, 1] = np.nan
+    returns.iloc[150:, 2] = np.nan
+    returns["A3"] = 0.001
+    return returns
+
+
+@pytest.mark.parametrize("min_periods", [1, 20, 40])
+@pytest.mark.parametrize("block_size", [2, 4, 512])
+def test_matrix_matches_pandas_pairwise_corr(min_periods, block_size):
+    returns = _returns()
+    matrix, _, _ = correlation_analysis(returns, k=5, block_size=block_size, min_periods=min_periods)
+    expected = returns.corr(min_periods=min_periods)
+    np.testing.assert_allclose(matrix.to_numpy(dtype=float), expected.to_numpy(), atol=1e-6)
+
+
+def test_top_pairs_come_from_the_matrix():
+    returns = _returns(seed=1)
+    matrix, most, least = correlation_analysis(returns, k=3, block_size=2)
+    expected = returns.corr(min_periods=20).to_numpy()
+    upper = expected[np.triu_indices(len(expected), 1)]
+    upper = np.sort(upper[~np.isnan(upper)])
+    np.testing.assert_allclose(np.sort(most.iloc[:, -1].to_numpy())[::-1], upper[::-1][:3], atol=1e-6)
+    np.testing.assert_allclose(np.sort(least.iloc[:, -1].to_numpy()), upper[:3], atol=1e-6)
+
+
+# Each full window equals pandas' pairwise-complete correlation of its rows
+def test_rolling_matches_pandas_per_window():
+    returns = _returns(seed=2).drop(columns="A3")
+    rolling = rolling_correlation(returns, "A0", 30, min_periods=10)
+    assert list(rolling.columns) == list(returns.columns[1:])
+    assert rolling.iloc[:29].isna().all().all()
+    for end in (30, 100, 160, 200):
+        expected = returns.iloc[end - 30:end].corr(min_periods=10)["A0"].drop("A0")
+        np.testing.assert_allclose(rolling.iloc[end - 1].to_numpy(), expected.to_numpy(), atol=1e-8)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import evaluation
+from analytics.evaluation import walk_forward
+from analytics.forecast import ForecastEngine, simple_moving_average_forecast
+
+
+def _closes(tickers=3, rows=160, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=rows)
+    return {f"T{i}": pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, rows - 10 * i))), index=index[10 * i:])
+            for i in range(tickers)}
+
+
+# Forecasts refitted from scratch on the bars up to each origin, scored the
+# same way as walk_forward
+def _manual(close, method, horizons, min_train):
+    x = close.to_numpy()
+    engine = ForecastEngine()
+    errors = {h: [] for h in horizons}
+    for origin in range(min_train - 1, len(x) - 1):
+        history = close.iloc[:origin + 1]
+        if method == "sma":
+            forecast = simple_moving_average_forecast(history, max(horizons), window=5).to_numpy()
+        else:
+            forecast = engine.forecast({"T": history}, max(horizons), method)["T"].to_numpy()
+        for h in horizons:
+            if origin + h < len(x):
+                errors[h].append(abs(forecast[h - 1] - x[origin + h]))
+    return {h: np.mean(e) for h, e in errors.items()}
+
+
+@pytest.mark.parametrize("method", ["linear", "ar", "sma"])
+def test_matches_a_refit_at_every_origin(method):
+    close = _closes(1)["T0"]
+    _, per_ticker = walk_forward({"T0": close}, methods=[method], horizons=[1, 5], workers=1)
+    expected = _manual(close, method, [1, 5], evaluation.MIN_TRAIN)
+    for h, mae in expected.items():
+        assert per_ticker.loc[("T0", method, h), "MAE"] == pytest.approx(mae, rel=1e-9)
+
+
+def test_pooled_run_matches_serial(monkeypatch):
+    closes = _closes()
+    serial = walk_forward(closes, workers=1, origin_block=25)
+    monkeypatch.setattr(evaluation, "PARALLEL_MIN_ORIGINS", 0)
+    pooled = walk_forward(closes, workers=2, origin_block=25)
+    for expected, got in zip(serial, pooled):
+        pd.testing.assert_frame_equal(got, expected, rtol=1e-12)
+
+
+def test_origin_blocks_do_not_change_scores():
+    closes = _closes(2)
+    whole = walk_forward(closes, workers=1, origin_block=10_000)[1]
+    blocked = walk_forward(closes, workers=1, origin_block=7)[1]
+    pd.testing.assert_frame_equal(blocked, whole, rtol=1e-10)
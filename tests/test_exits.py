@@ -0,0 +1,108 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.backtest import backtest_ma_strategy, backtest_signal, backtest_summary
+from analytics.exits import _summary, backtest_ma_exits, exit_positions, exit_positions_loop, exit_sweep
+
+RULES = {
+    "stop_loss": [None, 0.03, 0.1],
+    "trailing_stop": [None, 0.05],
+    "take_profit": [None, 0.04, 0.2],
+    "max_hold": [None, 1, 15],
+}
+
+
+def _market(rows=400, columns=6, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(rows, columns)), axis=0))
+    # Signals that stay on or off for a few bars at a time
+    signal = np.repeat(rng.random((rows // 4 + 1, columns)) > 0.5, 4, axis=0)[:rows]
+    return close, signal
+
+
+@pytest.mark.parametrize("rules", [dict(zip(RULES, values)) for values in itertools.product(*RULES.values())])
+def test_kernel_matches_reference_loop(rules):
+    close, signal = _market()
+    position, reason = exit_positions(close, signal, **rules, chunk_columns=4)
+    expected_position, expected_reason = exit_positions_loop(close, signal, **rules)
+    np.testing.assert_array_equal(position, expected_position)
+    np.testing.assert_array_equal(reason, expected_reason)
+
+
+def test_per_column_parameters_match_reference_loop():
+    close, signal = _market(columns=40, seed=1)
+    rng = np.random.default_rng(2)
+    rules = {
+        "stop_loss": rng.choice([0, 0.02, 0.05], 40),
+        "trailing_stop": rng.choice([0, 0.04], 40),
+        "take_profit": rng.choice([0, 0.03, 0.1], 40),
+        "max_hold": rng.choice([0, 5, 20], 40),
+    }
+    position, reason = exit_positions(close, signal, **rules, chunk_columns=7)
+    expected_position, expected_reason = exit_positions_loop(close, signal, **rules)
+    np.testing.assert_array_equal(position, expected_position)
+    np.testing.assert_array_equal(reason, expected_reason)
+
+
+def test_single_series_and_leading_gaps():
+    close, signal = _market(columns=1, seed=3)
+    close[:30] = np.nan
+    position, reason = exit_positions(close[:, 0], signal[:, 0], stop_loss=0.05, take_profit=0.1)
+    expected_position, expected_reason = exit_positions_loop(close[:, 0], signal[:, 0], stop_loss=0.05,
+                                                             take_profit=0.1)
+    assert position.ndim == 1
+    np.testing.assert_array_equal(position, expected_position)
+    np.testing.assert_array_equal(reason, expected_reason)
+
+
+def _data(rows=500, seed=4):
+    close, _ = _market(rows, 1, seed)
+    return pd.DataFrame({"Close": close[:, 0]}, index=pd.bdate_range("2020-01-01", periods=rows))
+
+
+def test_no_exit_rules_equals_ma_crossover():
+    data = _data()
+    result, buys, sells, exits = backtest_ma_exits(data, 20, 100)
+    expected, expected_buys, expected_sells = backtest_ma_strategy(data, 20, 100)
+    pd.testing.assert_frame_equal(result, expected)
+    pd.testing.assert_frame_equal(buys, expected_buys)
+    pd.testing.assert_frame_equal(sells, expected_sells)
+    assert sum(exits.values()) == exits["Signal"]
+
+
+def test_sweep_rows_match_single_backtests():
+    data = _data(seed=5)
+    table = exit_sweep({"X": data["Close"]}, 20, 100, (0, 0.05), (0,), (0, 0.1), (0, 30))
+    for (_, stop_loss, _, take_profit, max_hold), row in table.iterrows():
+        _, _, _, exits = backtest_ma_exits(data, 20, 100, stop_loss=stop_loss, take_profit=take_profit,
+                                           max_hold=max_hold)
+        assert [row[f"{name} Exits"] for name in exits] == list(exits.values())
+
+
+# The sweep's figures equal backtest_summary's for the same positions, an
+# entry on the first bar included
+@pytest.mark.parametrize("first_bar", [False, True])
+def test_summary_matches_backtest_summary(first_bar):
+    data = _data(seed=6)
+    close = data["Close"].to_numpy()
+    _, signal = _market(len(close), 1, seed=7)
+    signal = signal[:, 0].copy()
+    signal[:5] = first_bar
+    position, _ = exit_positions(close, signal)
+    result, _, _ = backtest_signal(data, position)
+    summary = _summary(close[:, None], position[:, None])
+    expected = backtest_summary(result)
+    for name, value in expected.items():
+        assert summary[name][0] == pytest.approx(value, rel=1e-12), name
+    assert position[0] == first_bar
+
+
+def test_sweep_without_rules_matches_ma_backtest_summary():
+    data = _data(seed=8)
+    row = exit_sweep({"X": data["Close"]}, 20, 100).iloc[0]
+    expected = backtest_summary(backtest_ma_strategy(data, 20, 100)[0])
+    for name, value in expected.items():
+        assert row[name] == pytest.approx(value, rel=1e-12), name
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.forecast import ForecastEngine, holt_filter, holt_fit
+from analytics.indicators import stack_closes
+
+
+def _closes(rows=400, tickers=4, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2020-01-01", periods=rows)
+    return {f"T{i}": pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, rows))), index=index)
+            for i in range(tickers)}
+
+
+def _fits(engine, closes):
+    return engine.fit(closes, "holt")
+
+
+# A warm refit on appended bars gives exactly the cold full-grid fit
+def test_holt_warm_refit_matches_cold_fit():
+    closes = _closes()
+    warm = ForecastEngine()
+    _fits(warm, {t: s.iloc[:250] for t, s in closes.items()})
+    _fits(warm, {t: s.iloc[:300] for t, s in closes.items()})
+    fitted = _fits(warm, closes)
+    cold = _fits(ForecastEngine(), closes)
+    for ticker in closes:
+        np.testing.assert_array_equal(fitted[ticker]["params"], cold[ticker]["params"])
+        np.testing.assert_array_equal(fitted[ticker]["state"], cold[ticker]["state"])
+
+
+# Fits do not depend on what was fitted before: a different window or a
+# revised history is refitted from scratch
+@pytest.mark.parametrize("earlier", [
+    lambda s: s.iloc[100:300],
+    lambda s: s.iloc[:300] * 1.01,
+    lambda s: s.iloc[:300].set_axis(s.index[:300] - pd.Timedelta(days=1)),
+])
+def test_holt_fit_is_path_independent(earlier):
+    closes = _closes(tickers=2, seed=1)
+    engine = ForecastEngine()
+    _fits(engine, {t: earlier(s) for t, s in closes.items()})
+    fitted = _fits(engine, closes)
+    cold = _fits(ForecastEngine(), closes)
+    for ticker in closes:
+        np.testing.assert_array_equal(fitted[ticker]["params"], cold[ticker]["params"])
+        np.testing.assert_array_equal(fitted[ticker]["state"], cold[ticker]["state"])
+
+
+def test_holt_mixed_warm_and_cold_batch():
+    closes = _closes(tickers=3, seed=2)
+    engine = ForecastEngine()
+    _fits(engine, {"T0": closes["T0"].iloc[:200]})
+    closes["T2"] = closes["T2"].iloc[50:]
+    fitted = _fits(engine, closes)
+    for ticker, series in closes.items():
+        cold = _fits(ForecastEngine(), {ticker: series})[ticker]
+        np.testing.assert_array_equal(fitted[ticker]["params"], cold["params"])
+        np.testing.assert_allclose(fitted[ticker]["state"], cold["state"], rtol=1e-12)
+
+
+# The per-bar filter ends in the fitted state, for one series and several
+def test_holt_filter_ends_at_fitted_state():
+    closes = _closes(tickers=3, seed=3)
+    closes["T1"] = closes["T1"].iloc[120:]
+    y = np.log(stack_closes(closes).to_numpy())
+    for columns in ([0], [0, 1, 2]):
+        params, state = holt_fit(y[:, columns])
+        levels, trends = holt_filter(y[:, columns], params)
+        np.testing.assert_array_equal(levels[-1], state[:, 0])
+        np.testing.assert_array_equal(trends[-1], state[:, 1])
+    assert np.isnan(levels[:119, 1]).all() and (trends[:119, 1] == 0).all()
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.portfolio import backtest_portfolio, equal_weights, rebalance_mask
+
+
+def _prices(rows=300, assets=5, seed=0, late=None):
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0005, 0.02, size=(rows, assets))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)),
+                          index=pd.bdate_range("2020-01-01", periods=rows),
+                          columns=[chr(ord("a") + i) for i in range(assets)])
+    for asset, start in (late or {}).items():
+        prices.iloc[:start, prices.columns.get_loc(asset)] = np.nan
+    return prices
+
+
+# Plain per-bar simulation of the same rules: holdings drift with prices, and
+# on rebalance bars (and each asset's first tradeable bar) the book is traded
+# back to the targets, paying costs on the traded fraction of equity
+def _reference(prices, targets, rebalance, fee, slippage, initial=1.0):
+    P = prices.ffill().to_numpy()
+    T = targets.to_numpy()
+    tradeable = ~np.isnan(P)
+    mask = rebalance_mask(targets, rebalance)
+    for j in range(P.shape[1]):
+        if tradeable[:, j].any():
+            mask[np.argmax(tradeable[:, j])] = True
+    holdings, cash = np.zeros(P.shape[1]), initial
+    equity, turnover, costs, weights = [], [], [], []
+    for t in range(len(P)):
+        if t:
+            for j in range(P.shape[1]):
+                if tradeable[t, j] and tradeable[t - 1, j]:
+                    holdings[j] *= P[t, j] / P[t - 1, j]
+        value = holdings.sum() + cash
+        traded = cost = 0.0
+        if mask[t]:
+            target = np.where(tradeable[t], T[t], 0.0)
+            traded = np.abs(target - holdings / value).sum()
+            cost = value * (fee + slippage) * traded
+            value -= cost
+            holdings = value * target
+            cash = value * (1 - target.sum())
+        equity.append(value)
+        turnover.append(traded)
+        costs.append(cost)
+        weights.append(holdings / value)
+    return np.array(equity), np.array(turnover), np.array(costs), np.array(weights)
+
+
+def _targets(prices, weights):
+    if isinstance(weights, pd.Series):
+        return pd.DataFrame(np.broadcast_to(weights.to_numpy(), prices.shape), index=prices.index,
+                            columns=prices.columns)
+    return weights
+
+
+@pytest.mark.parametrize("rebalance", [None, "signal", "M", "W", 5])
+@pytest.mark.parametrize("late", [None, {"c": 40}, {"a": 10, "c": 120}])
+def test_matches_reference_loop(rebalance, late):
+    prices = _prices(late=late)
+    rng = np.random.default_rng(1)
+    signals = pd.DataFrame(rng.random(prices.shape) > 0.4, index=prices.index, columns=prices.columns)
+    # Hold each signal for a few bars so "signal" rebalancing is not every bar
+    weights = equal_weights(signals.iloc[::7].reindex(prices.index).ffill())
+    result = backtest_portfolio(prices, weights, rebalance, fee=0.001, slippage=0.0005)
+    equity, turnover, costs, held = _reference(prices, weights, rebalance, 0.001, 0.0005)
+    np.testing.assert_allclose(result["Equity"].to_numpy(), equity, rtol=1e-10)
+    np.testing.assert_allclose(result["Turnover"].to_numpy(), turnover, atol=1e-12)
+    np.testing.assert_allclose(result["Costs"].to_numpy(), costs, atol=1e-12)
+    np.testing.assert_allclose(result["Weights"].to_numpy(), held, atol=1e-12)
+
+
+def test_static_weights_match_reference_loop():
+    prices = _prices(late={"b": 25})
+    weights = pd.Series([0.3, 0.2, 0.2, 0.1, 0.1], index=prices.columns)
+    result = backtest_portfolio(prices, weights, "Q", fee=0.002, slippage=0.001)
+    equity, *_ = _reference(prices, _targets(prices, weights), "Q", 0.002, 0.001)
+    np.testing.assert_allclose(result["Equity"].to_numpy(), equity, rtol=1e-10)
+
+
+# Buy and hold must buy a late-starting asset when it starts trading, not keep
+# its weight in cash
+def test_late_start_asset_is_bought_under_buy_and_hold():
+    prices = _prices(late={"c": 60})
+    weights = pd.Series(0.2, index=prices.columns)
+    result = backtest_portfolio(prices, weights, None, fee=0.0, slippage=0.0)
+    held = result["Weights"]
+    assert held["c"].iloc[:60].eq(0).all()
+    assert held["c"].iloc[60] > 0.1
+    assert held.iloc[-1].sum() == pytest.approx(1.0)
+    assert held.iloc[-1].max() < 0.5
+    assert (result["Turnover"] > 0).sum() == 2
+
+
+def test_costs_reduce_equity_by_traded_fraction():
+    prices = _prices(assets=2)
+    weights = pd.Series([0.5, 0.5], index=prices.columns)
+    result = backtest_portfolio(prices, weights, None, fee=0.001, slippage=0.0005, initial=100.0)
+    assert result["Turnover"].iloc[0] == pytest.approx(1.0)
+    assert result["Costs"].iloc[0] == pytest.approx(100.0 * 0.0015)
+    assert result["Equity"].iloc[0] == pytest.approx(100.0 * (1 - 0.0015))
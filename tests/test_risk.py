@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.risk import risk_summary, rolling_risk
+
+
+def _returns(rows=300, assets=3, seed=0, decimals=None):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 0.01, size=(rows, assets))
+    if decimals is not None:
+        values = values.round(decimals)
+    returns = pd.DataFrame(values, index=pd.bdate_range("2020-01-01", periods=rows),
+                           columns=[f"A{i}" for i in range(assets)])
+    returns.iloc[:40, 1] = np.nan
+    returns.iloc[100:110, 2] = np.nan
+    return returns
+
+
+# The last rolling window must give the same figures as the summary of the
+# same rows, ties at the VaR level included
+@pytest.mark.parametrize("decimals", [None, 3])
+@pytest.mark.parametrize("window", [30, 90])
+def test_rolling_matches_summary_of_each_window(decimals, window):
+    returns = _returns(decimals=decimals)
+    rolling = rolling_risk(returns, window, 0.95)
+    for end in (window + 40, 120, len(returns)):
+        summary = risk_summary(returns.iloc[end - window:end], 0.95)
+        for metric in ["VaR (Hist)", "CVaR (Hist)", "VaR (Normal)", "CVaR (Normal)"]:
+            np.testing.assert_allclose(rolling[metric].iloc[end - 1].to_numpy(), summary[metric].to_numpy(),
+                                       rtol=1e-9, err_msg=f"{metric} at {end}")
+        np.testing.assert_allclose(rolling["Volatility"].iloc[end - 1].to_numpy(), summary["Volatility"].to_numpy(),
+                                   rtol=1e-9)
+
+
+def test_rolling_keys_do_not_depend_on_length():
+    returns = _returns()
+    benchmark = returns.mean(axis=1)
+    for rows in (10, 300):
+        assert list(rolling_risk(returns.iloc[:rows], 30)) == list(rolling_risk(returns, 30))
+        assert "Beta" not in rolling_risk(returns.iloc[:rows], 30)
+        assert "Beta" in rolling_risk(returns.iloc[:rows], 30, benchmark=benchmark)
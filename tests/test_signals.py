@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.signals import on_dates, signal_backtest, signal_edge
+
+
+def _known():
+    close = pd.DataFrame({
+        "A": [100.0, 110.0, 99.0, 99.0, 120.0],
+        "B": [np.nan, 50.0, 55.0, 55.0, 44.0],
+    })
+    signal = pd.DataFrame({
+        "A": [1.0, 1.0, -1.0, 0.0, 1.0],
+        "B": [np.nan, 1.0, 0.0, -1.0, 1.0],
+    })
+    return close, signal
+
+
+# Forward returns pooled over tickers by signal value; the last bar has no
+# forward return and a bar without a close has no signal, so neither counts
+def test_edge_of_known_signals():
+    close, signal = _known()
+    edge = signal_edge(close, signal, horizon=1)
+    assert list(edge.index) == ["-1", "0", "1", "All Bars"]
+    assert edge.loc["1", "Mean Return"] == pytest.approx((0.1 - 0.1 + 0.1) / 3)
+    assert edge.loc["1", "Hit Rate"] == pytest.approx(2 / 3)
+    assert edge.loc["-1", "Mean Return"] == pytest.approx(-0.1)
+    assert edge.loc["-1", "Hit Rate"] == 0
+    assert edge.loc["0", "Mean Return"] == pytest.approx((120 / 99 - 1) / 2)
+    assert edge.loc["0", "Hit Rate"] == pytest.approx(0.5)
+    assert list(edge["Bars"]) == [2, 2, 3, 7]
+    assert edge.loc["All Bars", "Mean Return"] == pytest.approx((0.1 - 0.1 + 120 / 99 - 1 + 0.1 - 0.2) / 7)
+    assert edge.loc["All Bars", "Hit Rate"] == pytest.approx(3 / 7)
+
+
+def test_edge_horizon_drops_the_last_bars():
+    close, signal = _known()
+    edge = signal_edge(close, signal, horizon=3)
+    # A: bars 0 and 1 reach 3 bars ahead; B: bar 1 only
+    assert edge.loc["All Bars", "Bars"] == 3
+    assert edge.loc["1", "Mean Return"] == pytest.approx((99 / 100 - 1 + 120 / 110 - 1 + 44 / 50 - 1) / 3)
+
+
+def test_on_dates_takes_the_tickers_last_bars():
+    close, _ = _known()
+    dates = pd.bdate_range("2024-01-01", periods=4)
+    series = on_dates(close, "B", dates)
+    assert list(series) == [50.0, 55.0, 55.0, 44.0]
+    assert series.index.equals(dates) and series.name == "B"
+
+
+@pytest.mark.parametrize("rule", ["composite", "score"])
+def test_signal_backtest_counts_every_scored_bar_once(rule):
+    rng = np.random.default_rng(0)
+    closes = {t: pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))),
+                           index=pd.bdate_range("2020-01-01", periods=n))
+              for t, n in {"A": 400, "B": 250}.items()}
+    result = signal_backtest(closes, rule, days_forward=5, forecast=False)
+    close, signal, edge = result["Close"], result["Signal"], result["Edge"]
+    scored = (signal.notna() & close.shift(-5).notna()).to_numpy().sum()
+    assert edge.loc["All Bars", "Bars"] == scored
+    assert edge["Bars"].drop("All Bars").sum() == scored
+    # No position where a ticker has no close
+    position = result["Backtest"]["Signal"]
+    assert (position.to_numpy()[close.isna().to_numpy()] == 0).all()
+    assert len(result["Summary"]) == 2
@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analytics.providers import COLUMNS, DataProvider
+from analytics.store import OHLCVStore
+
+
+def _bars(rows, start="2024-01-01"):
+    close = 100 + np.arange(rows, dtype=float)
+    return pd.DataFrame({c: close for c in COLUMNS}, index=pd.bdate_range(start, periods=rows))
+
+
+class StaticProvider(DataProvider):
+    def __init__(self, frame):
+        self.frame = frame
+
+    def fetch(self, ticker, period="max", interval="1d", start=None):
+        return self.frame if start is None else self.frame.loc[self.frame.index >= pd.Timestamp(start)]
+
+
+# A refresh that lands between a load and derived() must not file the result
+# computed from the loaded (old) bars under the new version
+def test_derived_keys_on_the_version_that_was_loaded(tmp_path):
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=3600, provider=StaticProvider(_bars(50)))
+    close = store.load("AAA", columns=["Close"])["Close"]
+    loaded = store.version("AAA")
+
+    store._store("AAA", _bars(51))
+    assert store.version("AAA") != loaded
+
+    last = store.derived("AAA", "last", (), lambda: close.iloc[-1])
+    assert last == 149.0
+    assert store.loaded_version("AAA") == loaded
+
+    close = store.load("AAA", columns=["Close"])["Close"]
+    assert store.loaded_version("AAA") == store.version("AAA")
+    assert store.derived("AAA", "last", (), lambda: close.iloc[-1]) == 150.0
+
+
+def test_load_many_and_derived_many_use_loaded_versions(tmp_path):
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=3600, provider=StaticProvider(_bars(30)))
+    frames, errors = store.load_many(["AAA", "BBB"], columns=["Close"])
+    assert not errors
+    loaded = {t: store.version(t) for t in frames}
+    store._store("AAA", _bars(31))
+
+    results = store.derived_many(list(frames), "count", (),
+                                 lambda missing: {t: len(frames[t]) for t in missing})
+    assert results == {"AAA": 30, "BBB": 30}
+    assert {t: store.loaded_version(t) for t in frames} == loaded
+
+
+# Versions are recorded per thread: a thread that did not load the ticker
+# keys on the current version
+def test_loaded_version_is_per_thread(tmp_path):
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=3600, provider=StaticProvider(_bars(20)))
+    store.load("AAA")
+    loaded = store.version("AAA")
+    store._store("AAA", _bars(21))
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(store.loaded_version("AAA")))
+    thread.start()
+    thread.join()
+    assert seen == [store.version("AAA")]
+    assert store.loaded_version("AAA") == loaded
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.indicators import compute_ema, compute_macd, compute_rsi, compute_sma
+from analytics.risk import calculate_max_drawdown, calculate_volatility
+from analytics.streaming import (StreamingDrawdown, StreamingEMA, StreamingMACD, StreamingRSI, StreamingSMA,
+                                 StreamingVolatility, Watchlist)
+
+
+def _close(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows))))
+
+
+# One bar at a time, as a live feed would arrive
+def _stream(indicator, close):
+    return np.array([indicator.update(float(x)) for x in close])
+
+
+@pytest.mark.parametrize("window", [1, 5, 20])
+def test_sma_matches_batch(window):
+    close = _close()
+    np.testing.assert_allclose(_stream(StreamingSMA(window), close), compute_sma(close, window).to_numpy(),
+                               rtol=1e-12)
+
+
+def test_sma_warm_up_is_nan():
+    streamed = _stream(StreamingSMA(20), _close())
+    assert np.isnan(streamed[:19]).all() and not np.isnan(streamed[19:]).any()
+
+
+@pytest.mark.parametrize("span", [3, 12, 26])
+def test_ema_matches_batch(span):
+    close = _close()
+    np.testing.assert_allclose(_stream(StreamingEMA(span=span), close), compute_ema(close, span).to_numpy(),
+                               rtol=1e-12)
+
+
+def test_macd_matches_batch():
+    close = _close()
+    indicator = StreamingMACD()
+    streamed = np.array([indicator.update(float(x)) for x in close])
+    macd, signal_line = compute_macd(close)
+    np.testing.assert_allclose(streamed[:, 0], macd.to_numpy(), rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(streamed[:, 1], signal_line.to_numpy(), rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("method", ["sma", "wilder"])
+def test_rsi_matches_batch(method):
+    close = _close()
+    streamed = _stream(StreamingRSI(14, method), close)
+    np.testing.assert_allclose(streamed, compute_rsi(close, 14, method).to_numpy(), rtol=1e-9)
+    assert np.isnan(streamed[:14]).all()
+
+
+# A window with no losses is RSI 100; one with no moves at all is NaN
+@pytest.mark.parametrize("method", ["sma", "wilder"])
+def test_rsi_zero_loss(method):
+    close = pd.Series(np.concatenate([np.arange(100.0, 130.0), np.full(40, 130.0)]))
+    streamed = _stream(StreamingRSI(5, method), close)
+    batch = compute_rsi(close, 5, method).to_numpy()
+    np.testing.assert_allclose(streamed, batch, rtol=1e-12)
+    assert streamed[10] == 100.0
+    if method == "sma":
+        assert np.isnan(streamed[-1])
+
+
+def test_drawdown_matches_batch():
+    close = _close()
+    indicator = StreamingDrawdown()
+    streamed = _stream(indicator, close)
+    cumulative = (1 + close.pct_change()).cumprod()
+    np.testing.assert_allclose(streamed, (cumulative / cumulative.cummax() - 1).to_numpy(), rtol=1e-12,
+                               atol=1e-15)
+    for end in (2, 50, len(close)):
+        partial = StreamingDrawdown()
+        partial.update_many(close.iloc[:end])
+        assert partial.max_drawdown == pytest.approx(calculate_max_drawdown(close.iloc[:end]), abs=1e-12)
+    assert math.isnan(streamed[0])
+
+
+def test_volatility_matches_batch():
+    close = _close(120)
+    streamed = _stream(StreamingVolatility(), close)
+    expected = [calculate_volatility(close.iloc[:end + 1]) for end in range(len(close))]
+    np.testing.assert_allclose(streamed, expected, rtol=1e-10)
+    assert np.isnan(streamed[:2]).all()
+
+
+def test_rolling_volatility_matches_batch():
+    close = _close()
+    streamed = _stream(StreamingVolatility(window=30), close)
+    expected = close.pct_change().rolling(30).std() * np.sqrt(252)
+    np.testing.assert_allclose(streamed, expected.to_numpy(), rtol=1e-9)
+
+
+def test_watchlist_matches_batch_on_every_bar():
+    close = _close(200, seed=1)
+    watchlist = Watchlist()
+    watchlist.warm_up("AAA", close.iloc[:100])
+    macd, signal_line = compute_macd(close)
+    expected = {
+        "RSI": compute_rsi(close, 14),
+        "MACD": macd,
+        "MA Short": compute_sma(close, 20),
+        "MA Long": compute_sma(close, 50),
+    }
+    for i in range(100, len(close)):
+        values = watchlist.update("AAA", close.iloc[i])
+        for name, series in expected.items():
+            got = values[name][0] if name == "MACD" else values[name]
+            assert got == pytest.approx(series.iloc[i], rel=1e-9)
+        assert values["MACD"][1] == pytest.approx(signal_line.iloc[i], rel=1e-9)
+        assert values["Volatility"] == pytest.approx(calculate_volatility(close.iloc[:i + 1]), rel=1e-9)
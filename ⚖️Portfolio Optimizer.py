@@ -0,0 +1,121 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+
+from analytics import perf
+from analytics.cache import cached
+from analytics.charts import cached_figure
+from analytics.correlation import calendar_returns
+from analytics.optimizer import estimate, get_engine, portfolio_stats, random_portfolios
+from analytics.store import get_store, load_many
+
+st.set_page_config(page_title="⚖️ Portfolio Optimizer", layout="wide")
+st.title("⚖️ Portfolio Optimizer")
+perf.page("Portfolio Optimizer")
+
+if "selected_assets" not in st.session_state:
+    st.session_state.selected_assets = []
+if len(st.session_state.selected_assets) < 2:
+    st.warning("⚠️ Please go to the Dashboard and select at least two assets first.")
+    st.stop()
+
+# Efficient frontier with the min-variance and max-Sharpe portfolios; the
+# random cloud is drawn with WebGL so tens of thousands of points stay fast
+def frontier_chart(period, frontier, cloud, points):
+    fig = go.Figure()
+    if cloud is not None and len(cloud):
+        fig.add_trace(go.Scattergl(
+            x=cloud["Volatility"], y=cloud["Return"], mode='markers', name='Random Portfolios',
+            marker=dict(size=3, color=cloud["Sharpe"], colorscale="Viridis", opacity=0.5,
+                        colorbar=dict(title="Sharpe"))
+        ))
+    fig.add_trace(go.Scatter(x=frontier["Volatility"], y=frontier["Return"], mode='lines',
+                             name='Efficient Frontier', line=dict(color='black', width=3)))
+    for (name, (vol, ret)), symbol in zip(points.items(), ["diamond", "star"]):
+        fig.add_trace(go.Scatter(x=[vol], y=[ret], mode='markers', name=name,
+                                 marker=dict(size=16, symbol=symbol, line=dict(width=1, color='black'))))
+    fig.update_layout(
+        title=f"Efficient Frontier ({period})",
+        xaxis_title="Annualized Volatility",
+        yaxis_title="Annualized Return",
+        xaxis=dict(tickformat=".0%"),
+        yaxis=dict(tickformat=".0%"),
+        template="plotly_white",
+        height=600
+    )
+    return fig
+
+col1, col2 = st.columns(2)
+period = col1.selectbox("Select Time Period", ['6mo', '1y', '2y', '5y'], index=2)
+risk_free = col2.number_input("Risk-Free Rate (annual %)", 0.0, 20.0, 0.0, step=0.25) / 100
+
+# Load Data
+@perf.timed(category="data")
+def load_data(tickers, period):
+    frames, errors = load_many(tickers, period, columns=["Close"])
+    return {t: f['Close'] for t, f in frames.items() if len(f) > 2}, errors
+
+closes, errors = load_data(st.session_state.selected_assets, period)
+for ticker, error in errors.items():
+    st.error(f"Error loading data for {ticker}: {error}")
+if len(closes) < 2:
+    st.error("❌ Not enough data to optimize a portfolio.")
+    st.stop()
+
+# Expected returns and the shrunk covariance are estimated once per set of
+# assets and data versions; moving the sliders below only re-solves
+returns = calendar_returns(closes)
+assets = tuple(returns.columns)
+versions = tuple(get_store().loaded_version(t) for t in assets)
+data_key = (assets, versions, period)
+with perf.span("estimate", rows=returns.size):
+    mu, cov, shrinkage = cached((assets, versions, "estimate", (period,)), lambda: estimate(returns))
+shared_bars = len(returns.dropna())
+if shared_bars < 2 * len(assets):
+    st.warning(f"⚠️ Only {shared_bars} bars shared by all {len(assets)} assets; "
+               "estimates rely heavily on shrinkage.")
+
+col1, col2 = st.columns(2)
+min_cap = 1 / len(assets)
+max_weight = col1.slider("Maximum Weight per Asset", min_cap, 1.0, max(min_cap, 0.4), step=0.01,
+                         format="%.2f")
+n_random = col2.select_slider("Random Portfolios", [0, 1_000, 5_000, 10_000, 50_000, 100_000], value=5_000)
+# Rounded so that slider jitter maps to the same cached frontier
+cap = max(round(max_weight, 4), min_cap)
+
+with perf.span("frontier", rows=len(assets)):
+    result = get_engine().optimize(data_key, mu, cov, 0.0, cap, risk_free)
+frontier = result["Frontier"]
+weights = pd.concat([result["Min Variance"], result["Max Sharpe"]], axis=1)
+
+cloud = None
+if n_random:
+    with perf.span("random portfolios", rows=n_random * len(assets)):
+        cloud = cached((assets, versions, "random_portfolios", (period, n_random, risk_free, cap)),
+                       lambda: random_portfolios(mu, cov, n_random, risk_free, hi=cap, seed=0))
+
+points = {}
+for name in weights.columns:
+    ret, vol, _ = portfolio_stats(weights[name].to_numpy(), mu, cov, risk_free)
+    points[name] = (vol[0], ret[0])
+fig = cached_figure(("frontier", period, frontier, cloud, tuple(points.items())),
+                    lambda: frontier_chart(period, frontier, cloud, points))
+st.plotly_chart(fig, use_container_width=True)
+st.caption(f"{len(assets)} assets, {shared_bars:,} shared bars, covariance shrinkage {shrinkage:.0%} "
+           "towards a scaled identity (every asset at the average variance, zero correlation).")
+
+cols = st.columns(2)
+for col, name in zip(cols, weights.columns):
+    ret, vol, sharpe = portfolio_stats(weights[name].to_numpy(), mu, cov, risk_free)
+    col.markdown(f"### {'🛡️' if name == 'Min Variance' else '🚀'} {name}")
+    metrics = col.columns(3)
+    metrics[0].metric("Return", f"{ret[0]:.2%}")
+    metrics[1].metric("Volatility", f"{vol[0]:.2%}")
+    metrics[2].metric("Sharpe", f"{sharpe[0]:.2f}")
+
+st.markdown("### Weights")
+held = weights[(weights > 1e-4).any(axis=1)].sort_values("Max Sharpe", ascending=False)
+st.dataframe(held.style.format("{:.2%}"))
+st.caption(f"{len(held)} of {len(assets)} assets hold a weight of at least 0.01%.")
+
+perf.panel()
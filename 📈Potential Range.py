@@ -1,84 +1,122 @@
 import streamlit as st
-import yfinance as yf
-import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from scipy.stats import norm
+
+from analytics import perf
+from analytics.charts import cached_figure, downsample
+from analytics.ranges import get_potential_range, simulate_range
+from analytics.store import load_many
 
 st.set_page_config(page_title="📊 Potential Price Range", layout="wide")
 st.title("📊 Potential Price Range Estimator")
+perf.page("Potential Range")
 
 # User input
 period = st.selectbox("📆 Historical Data Period", ["1mo", "3mo", "6mo", "1y", "2y"], index=2)
 days_forward = st.slider("🔮 Forecast Horizon (days)", 5, 90, 30)
 confidence = st.slider("📊 Confidence Level", 0.80, 0.99, 0.95, step=0.01)
+model = st.radio("📐 Model", ["Log-Normal", "Monte Carlo"], horizontal=True)
+
+SIM_METHODS = {"GBM": "gbm", "Historical Bootstrap": "bootstrap", "Block Bootstrap": "block"}
+if model == "Monte Carlo":
+    col1, col2, col3 = st.columns(3)
+    sim_method = col1.selectbox("Simulation Method", list(SIM_METHODS))
+    n_paths = col2.selectbox("Paths", [10_000, 100_000, 1_000_000], index=1, format_func=lambda n: f"{n:,}")
+    seed = col3.number_input("Random Seed", min_value=0, value=42, step=1)
 
 # Load close price data
-@st.cache_data
-def load_data(ticker, period):
-    data = yf.Ticker(ticker).history(period=period)
-    data.index = data.index.tz_localize(None)
-    return data['Close']
-
-# Calculate future price range using log returns
-def get_potential_range(price_series, days_forward, confidence):
-    last_price = price_series.dropna().iloc[-1]
-    log_returns = np.log(price_series / price_series.shift(1)).dropna()
-    vol = log_returns.std() * np.sqrt(days_forward)
-    z = norm.ppf(1 - (1 - confidence) / 2)
-    lower = last_price * np.exp(-z * vol)
-    upper = last_price * np.exp(z * vol)
-    return lower, upper, vol
+@perf.timed(category="data")
+def load_data(tickers, period):
+    frames, _ = load_many(tickers, period, columns=["Close"])
+    return {t: f['Close'] for t, f in frames.items()}
+
+# Monte Carlo fan bands (tail, quartile and median quantiles per day) and the
+# probability of touching the closed-form bounds at any point before the horizon
+@perf.timed(cache=True)
+@st.cache_data(show_spinner="Simulating price paths...")
+def get_simulated_range(price_series, days_forward, confidence, method, n_paths, seed, touch_levels):
+    perf.miss()
+    tail = (1 - confidence) / 2
+    return simulate_range(price_series, days_forward, n_paths=n_paths, method=method,
+                          quantiles=(tail, 0.25, 0.5, 0.75, 1 - tail),
+                          touch_levels=touch_levels, seed=seed)
+
+# Plot with Plotly
+def range_chart(ticker, close, lower, upper, bands):
+    fig = go.Figure()
+
+    # Historical price, downsampled to screen resolution
+    history = downsample(close)
+    fig.add_trace(go.Scatter(
+        x=history.index, y=history, name="Historical Price", mode='lines'
+    ))
+
+    # Simulated fan: outer confidence band, inner 50% band and median
+    if model == "Monte Carlo":
+        future = pd.date_range(close.index[-1] + pd.Timedelta(days=1), periods=days_forward)
+        for lo_col, hi_col, name, alpha in [(0, 4, f"{int(confidence * 100)}% Band", 0.15), (1, 3, "50% Band", 0.3)]:
+            fig.add_trace(go.Scatter(x=future, y=bands.iloc[:, lo_col], mode='lines',
+                                     line=dict(width=0), showlegend=False))
+            fig.add_trace(go.Scatter(x=future, y=bands.iloc[:, hi_col], mode='lines', line=dict(width=0),
+                                     fill='tonexty', fillcolor=f'rgba(0,100,200,{alpha})', name=name))
+        fig.add_trace(go.Scatter(x=future, y=bands.iloc[:, 2], mode='lines', name='Median Path',
+                                 line=dict(dash='dot', color='orange')))
+
+    # Projected interval band
+    # (drawn at the end of the simulated fan in Monte Carlo mode)
+    offset = days_forward if model == "Monte Carlo" else 1
+    projection_date = pd.date_range(close.index[-1] + pd.Timedelta(days=offset), periods=1)
+    fig.add_trace(go.Scatter(
+        x=[projection_date[0], projection_date[0]],
+        y=[lower, upper],
+        name=f"{int(confidence * 100)}% Confidence Interval",
+        mode='lines',
+        line=dict(width=0),
+        showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=[projection_date[0], projection_date[0]],
+        y=[lower, upper],
+        fill='tonexty',
+        fillcolor='rgba(0,100,200,0.2)',
+        mode='none',
+        name='Projected Range'
+    ))
+
+    fig.update_layout(
+        title=f"{ticker} Potential Price Range",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        template="plotly_white",
+        showlegend=True
+    )
+    return fig
 
 # Ensure assets selected
 if "selected_assets" not in st.session_state or not st.session_state.selected_assets:
     st.warning("⚠️ Please go to the Dashboard to select assets.")
 else:
+    closes = load_data(st.session_state.selected_assets, period)
     for ticker in st.session_state.selected_assets:
         st.subheader(f"📌 {ticker} — {days_forward}-Day Projection ({int(confidence * 100)}% CI)")
 
-        close = load_data(ticker, period)
-        if close.empty:
+        close = closes.get(ticker)
+        if close is None or close.empty:
             st.warning(f"⚠ No data for {ticker}")
             continue
 
-        lower, upper, vol = get_potential_range(close, days_forward, confidence)
-
-        # Plot with Plotly
-        fig = go.Figure()
-
-        # Historical price
-        fig.add_trace(go.Scatter(
-            x=close.index, y=close, name="Historical Price", mode='lines'
-        ))
-
-        # Projected interval band
-        projection_date = pd.date_range(close.index[-1] + pd.Timedelta(days=1), periods=1)
-        fig.add_trace(go.Scatter(
-            x=[projection_date[0], projection_date[0]],
-            y=[lower, upper],
-            name=f"{int(confidence * 100)}% Confidence Interval",
-            mode='lines',
-            line=dict(width=0),
-            showlegend=False
-        ))
-        fig.add_trace(go.Scatter(
-            x=[projection_date[0], projection_date[0]],
-            y=[lower, upper],
-            fill='tonexty',
-            fillcolor='rgba(0,100,200,0.2)',
-            mode='none',
-            name='Projected Range'
-        ))
-
-        fig.update_layout(
-            title=f"{ticker} Potential Price Range",
-            xaxis_title="Date",
-            yaxis_title="Price",
-            template="plotly_white",
-            showlegend=True
-        )
+        with perf.span(f"range {ticker}", rows=len(close)):
+            lower, upper, vol = get_potential_range(close, days_forward, confidence)
+        if model == "Monte Carlo":
+            bands, touch = get_simulated_range(close, days_forward, confidence, SIM_METHODS[sim_method],
+                                               n_paths, int(seed), (lower, upper))
+            touch_lower, touch_upper = touch.iloc[0], touch.iloc[1]
+            lower, upper = bands.iloc[-1, 0], bands.iloc[-1, -1]
+        else:
+            bands = None
 
+        fig = cached_figure(("range", ticker, model, confidence, days_forward, close, lower, upper, bands),
+                            lambda: range_chart(ticker, close, lower, upper, bands))
         st.plotly_chart(fig, use_container_width=True)
 
         # Metrics summary
@@ -86,6 +124,9 @@ else:
         col1.metric("📉 Lower Bound", f"${lower:.2f}")
         col2.metric("📈 Upper Bound", f"${upper:.2f}")
         col3.metric("📊 Volatility (σ)", f"{vol*100:.2f}%")
+        if model == "Monte Carlo":
+            col1.metric("🎯 P(touch log-normal lower)", f"{touch_lower:.1%}")
+            col2.metric("🎯 P(touch log-normal upper)", f"{touch_upper:.1%}")
 
         with st.expander("ℹ️ Range Calculation Formula"):
             st.markdown(f"""
@@ -95,3 +136,11 @@ else:
                 - Using: `Log-Normal Model`
                 - Range = `price × exp(±z × σ × √days)`
             """)
+            if model == "Monte Carlo":
+                st.markdown(f"""
+                - Monte Carlo: **{n_paths:,}** `{sim_method}` paths, seed **{int(seed)}**
+                - Bounds = simulated {(1 - confidence) / 2:.1%} / {1 - (1 - confidence) / 2:.1%} quantiles on day {days_forward}
+                - Touch probability = share of paths reaching the log-normal bound on any day
+                """)
+
+perf.panel()
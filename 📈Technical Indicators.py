@@ -1,10 +1,16 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from analytics import perf
+from analytics.charts import cached_figure, downsample, zoom, zoom_slider
+from analytics.indicators import compute_macd, compute_rsi, compute_sma
+from analytics.signals import composite_signal
+from analytics.store import derived, load_history
+
 st.set_page_config(page_title="📈 Technical Indicators", layout="wide")
 st.title("📈 Technical Indicators")
+perf.page("Technical Indicators")
 
 # Check if assets are selected
 # This assumes that the assets are selected on a previous page and stored in session state
@@ -14,74 +20,72 @@ if "selected_assets" not in st.session_state or not st.session_state.selected_as
 
 # User selects the asset and time period for analysis
 ticker = st.selectbox("Select Asset", st.session_state.selected_assets)
-period = st.selectbox("Select Period", ['1mo', '3mo', '6mo', '1y', '2y'], index=2)
+period = st.selectbox("Select Period", ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y'], index=4)
+interval = st.selectbox("Bar Interval", ["1d", "1h", "5m", "1m"])
+rsi_method = st.radio("RSI Smoothing", ["Simple", "Wilder"], horizontal=True)
 
 # Load Data
-@st.cache_data
-def load_data(ticker, period):
-    data = yf.Ticker(ticker).history(period=period)
-    data.index = data.index.tz_localize(None)
-    return data
-
-# Compute Indicators
-def compute_rsi(close, window=14):
-    delta = close.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(window).mean()
-    avg_loss = loss.rolling(window).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-def compute_macd(close):
-    ema12 = close.ewm(span=12, adjust=False).mean()
-    ema26 = close.ewm(span=26, adjust=False).mean()
-    macd = ema12 - ema26
-    signal = macd.ewm(span=9, adjust=False).mean()
-    return macd, signal
-
-def compute_ma(close, short=20, long=50):
-    return close.rolling(short).mean(), close.rolling(long).mean()
+@perf.timed(category="data")
+def load_data(ticker, period, interval):
+    return load_history(ticker, period, interval=interval)
 
 # Get Data
-data = load_data(ticker, period)
+data = load_data(ticker, period, interval)
 if data.empty:
     st.error("❌ Unable to fetch data for the selected asset. Please check the ticker symbol or try a different period.")
     st.stop()
 
+# Indicators are shared through the derived-results cache with the other
+# pages that compute them for the same ticker, period and interval
 close = data["Close"]
-rsi = compute_rsi(close)
-macd, signal_line = compute_macd(close)
-ma_short, ma_long = compute_ma(close)
+method = "wilder" if rsi_method == "Wilder" else "sma"
+with perf.span("indicators", rows=len(close)):
+    rsi = derived(ticker, "rsi", (period, 14, method), lambda: compute_rsi(close, 14, method), interval)
+    macd, signal_line = derived(ticker, "macd", (period, 12, 26, 9), lambda: compute_macd(close), interval)
+    ma_short = derived(ticker, "sma", (period, 20), lambda: compute_sma(close, 20), interval)
+    ma_long = derived(ticker, "sma", (period, 50), lambda: compute_sma(close, 50), interval)
+
+# Charts show the zoomed range at screen resolution; indicators are computed
+# on the full period above so their values at the zoom start are correct
+start, end = zoom_slider(close.index, key="indicators_zoom")
+
+def macd_chart(macd, signal_line):
+    fig, ax = plt.subplots()
+    macd, signal_line = downsample(macd), downsample(signal_line)
+    ax.plot(macd.index, macd, label='MACD')
+    ax.plot(signal_line.index, signal_line, label='Signal Line')
+    ax.legend()
+    return fig
 
 # Closing Price
 st.subheader("📈 Closing Price")
-st.line_chart(close)
+with perf.span("render close", "render"):
+    st.line_chart(downsample(zoom(close, start, end)))
 
 # RSI
 st.subheader("📊 RSI")
-st.line_chart(rsi)
+with perf.span("render rsi", "render"):
+    st.line_chart(downsample(zoom(rsi, start, end)))
 
 # MACD
 st.subheader("📉 MACD")
-fig, ax = plt.subplots()
-ax.plot(data.index, macd, label='MACD')
-ax.plot(data.index, signal_line, label='Signal Line')
-ax.legend()
-st.pyplot(fig)
+macd_view, signal_view = zoom(macd, start, end), zoom(signal_line, start, end)
+st.image(cached_figure(("macd", ticker, interval, macd_view, signal_view), lambda: macd_chart(macd_view, signal_view)))
 
 # Overall Technical Signal Analysis
 st.subheader("📌 Overall Technical Signal Analysis")
 try:
-    current_rsi = rsi.iloc[-1]
-    macd_cross = macd.iloc[-1] > signal_line.iloc[-1]
-    ma_cross = ma_short.iloc[-1] > ma_long.iloc[-1]
+    signal = composite_signal({
+        "RSI": rsi, "MACD": macd, "Signal": signal_line, "MA Short": ma_short, "MA Long": ma_long
+    }).iloc[-1]
 
-    if current_rsi < 30 and macd_cross and ma_cross:
+    if signal == 1:
         st.success("🟢 Buy Signal")
-    elif current_rsi > 70 and not macd_cross and not ma_cross:
+    elif signal == -1:
         st.error("🔴 Sell Signal")
     else:
         st.info("🟡 No Clear Signal")
 except:
     st.warning("⚠️ Insufficient data to determine signal")
+
+perf.panel()
@@ -1,62 +1,109 @@
 import streamlit as st
-import yfinance as yf
-import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 
+from analytics import perf
+from analytics.risk import (ROLLING_WINDOWS, aligned_returns, betas, drawdowns, portfolio_risk, risk_summary,
+                            rolling_betas, rolling_risk)
+from analytics.charts import cached_figure, downsample
+from analytics.store import derived, load_many
+
 # --- Initialize session_state for selected_assets to prevent KeyError ---
 if "selected_assets" not in st.session_state:
     st.session_state.selected_assets = []
 
 st.title("📉 Risk Analysis")
+perf.page("Risk Analysis")
 
 if not st.session_state.selected_assets:
     st.warning("⚠️ Please go to the Dashboard and select one or more assets first.")
     st.stop()
 
-@st.cache_data
-def load_data(ticker):
-    data = yf.Ticker(ticker).history(period="2y")
-    data.index = data.index.tz_localize(None)
-    return data['Close']
-
-def calculate_volatility(price_series):
-    returns = price_series.pct_change().dropna()
-    return returns.std() * np.sqrt(252)
-
-def calculate_max_drawdown(price_series):
-    cumulative = (1 + price_series.pct_change()).cumprod()
-    peak = cumulative.cummax()
-    drawdown = (cumulative - peak) / peak
-    return drawdown.min()
-
-for ticker in st.session_state.selected_assets:
-    st.subheader(f"Risk Metrics for {ticker}")
-
-    try:
-        close_prices = load_data(ticker)
-        vol = calculate_volatility(close_prices)
-        mdd = calculate_max_drawdown(close_prices)
-    except Exception as e:
-        st.error(f"Error loading data for {ticker}: {e}")
-        continue
-
-    st.write(f"📈 Annualized Volatility: `{vol:.2%}`")
-    st.write(f"📉 Max Drawdown: `{mdd:.2%}`")
+# Load every selected asset in one concurrent batch
+@perf.timed(category="data")
+def load_data(tickers):
+    frames, errors = load_many(tickers, "2y", columns=["Close"])
+    return {t: f['Close'] for t, f in frames.items()}, errors
 
-    # Plotting
+# Price and drawdown panels; the drawdown keeps its troughs via min-max downsampling
+def risk_chart(ticker, close_prices, drawdown):
     fig, ax = plt.subplots(2, 1, figsize=(10, 6), sharex=True)
 
-    ax[0].plot(close_prices.index, close_prices, label='Close Price')
+    price = downsample(close_prices)
+    ax[0].plot(price.index, price, label='Close Price')
     ax[0].set_title(f"{ticker} Close Price")
     ax[0].grid(True)
     ax[0].legend()
 
-    cumulative = (1 + close_prices.pct_change().fillna(0)).cumprod()
-    peak = cumulative.cummax()
-    drawdown = (cumulative - peak) / peak
+    drawdown = downsample(drawdown, method="minmax")
     ax[1].plot(drawdown.index, drawdown, color='red', label='Drawdown')
     ax[1].set_title(f"{ticker} Drawdown")
     ax[1].grid(True)
     ax[1].legend()
+    return fig
+
+confidence = st.slider("VaR / CVaR Confidence Level", 0.90, 0.99, 0.95, step=0.01)
+window = st.selectbox("Rolling Window (bars)", ROLLING_WINDOWS, index=1)
+
+closes, errors = load_data(st.session_state.selected_assets)
+for ticker, error in errors.items():
+    st.error(f"Error loading data for {ticker}: {error}")
+closes = {t: c for t, c in closes.items() if len(c) > 2}
+if not closes:
+    st.stop()
+
+# One aligned returns matrix for every asset: own trading days for per-asset
+# figures, dates where all assets traded for the portfolio and beta
+with perf.span("risk metrics") as span:
+    # Same matrix as aligned_returns(closes), built from per-asset returns
+    # kept in the derived-results cache
+    returns = pd.DataFrame({
+        t: derived(t, "returns", ("2y",), lambda c=c: c.dropna().pct_change()) for t, c in closes.items()
+    }).iloc[1:]
+    common = aligned_returns(closes, calendar="common")
+    portfolio = common.mean(axis=1)
+    summary = risk_summary(returns, confidence)
+    rolling = rolling_risk(returns, window, confidence)
+    # Beta pairs each asset's returns with the portfolio's between the same dates
+    summary["Beta"] = betas(common, portfolio).reindex(summary.index)
+    rolling["Beta"] = rolling_betas(common, portfolio, window)
+    drawdown_all = drawdowns(returns)
+    span.rows = returns.size
+
+st.subheader("📋 Risk Summary")
+st.dataframe(summary.style.format({c: "{:.2%}" for c in summary.columns if c != "Beta"} | {"Beta": "{:.2f}"}))
+st.caption(f"VaR / CVaR are one-day returns at {confidence:.0%} confidence. "
+           "Beta is measured against the equal-weight portfolio of the selected assets.")
+
+if len(closes) > 1 and len(common.dropna()) > 2:
+    st.subheader("💼 Equal-Weight Portfolio")
+    with perf.span("portfolio risk", rows=len(common)):
+        figures, contribution, _, _ = portfolio_risk(common, confidence=confidence)
+    cols = st.columns(4)
+    cols[0].metric("Volatility", f"{figures['Volatility']:.2%}")
+    cols[1].metric("Max Drawdown", f"{figures['Max Drawdown']:.2%}")
+    cols[2].metric(f"VaR {confidence:.0%} (Hist)", f"{figures['VaR (Hist)']:.2%}")
+    cols[3].metric("Diversification Ratio", f"{figures['Diversification Ratio']:.2f}")
+    st.bar_chart(contribution)
+
+st.subheader(f"📈 Rolling {window}-Bar Metrics")
+metric = st.selectbox("Rolling Metric", list(rolling))
+with perf.span("render rolling", "render"):
+    st.line_chart(downsample(rolling[metric]))
+
+for ticker in st.session_state.selected_assets:
+    if ticker not in closes:
+        continue
+    st.subheader(f"Risk Metrics for {ticker}")
+    close_prices = closes[ticker]
+    vol = summary.at[ticker, "Volatility"]
+    mdd = summary.at[ticker, "Max Drawdown"]
+
+    st.write(f"📈 Annualized Volatility: `{vol:.2%}`")
+    st.write(f"📉 Max Drawdown: `{mdd:.2%}`")
+
+    # Plotting
+    drawdown = drawdown_all[ticker].reindex(close_prices.index).fillna(0)
+    st.image(cached_figure(("risk", ticker, close_prices, drawdown), lambda: risk_chart(ticker, close_prices, drawdown)))
 
-    st.pyplot(fig)
+perf.panel()
@@ -1,10 +1,16 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from analytics import perf
+from analytics.charts import cached_figure, downsample, zoom, zoom_slider
+from analytics.indicators import compute_sma
+from analytics.prefetch import prefetch, scheduler
+from analytics.store import derived, load_many
+
 st.set_page_config(page_title="Multi-Asset Dashboard", layout="wide")
 st.title("📈 Multi-Asset Price Tracker")
+perf.page("Dashboard")
 
 # Initialize Session State
 if "selected_assets" not in st.session_state:
@@ -24,49 +30,71 @@ tickers = {
 selected_name = st.selectbox("🔍 Select an asset to add", list(tickers.keys()))
 selected_ticker = tickers[selected_name]
 
-# Click button to add to selected assets list
+# Click button to add to selected assets list; its history and default
+# indicators start loading in the background straight away
 if st.button("➕ Add Asset"):
     if selected_ticker not in st.session_state.selected_assets:
         st.session_state.selected_assets.append(selected_ticker)
+        prefetch([selected_ticker])
+
+# Daily bars cover five years; intraday bars whatever history is stored
+interval = st.selectbox("⏱️ Bar Interval", ["1d", "1h", "5m", "1m"])
+
+# Keep the selection refreshed in the background while the session is active
+scheduler.watch(st.session_state.selected_assets, interval)
 
 # Show currently selected assets
 st.sidebar.header("🗂️ Selected Assets")
 for ticker in st.session_state.selected_assets:
     st.sidebar.write(ticker)
 
+def period_for(interval):
+    return "5y" if interval == "1d" else "max"
+
 # Function: Get Historical Data
-@st.cache_data
-def load_data(ticker):
-    data = yf.Ticker(ticker)
-    hist = data.history(period="5y")
-    hist.index = pd.to_datetime(hist.index)
-    return hist
+@perf.timed(category="data")
+def load_data(tickers, interval):
+    frames, _ = load_many(tickers, period_for(interval), interval=interval)
+    return frames
+
+# Price chart with both MAs, downsampled to screen resolution
+def price_chart(ticker, view):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    unit = "Day" if interval == "1d" else "Bar"
+    for column, label, color in [('Close', 'Close Price', None), ('MA50', f'50-{unit} MA', 'orange'), ('MA200', f'200-{unit} MA', 'red')]:
+        line = downsample(view[column])
+        ax.plot(line.index, line, label=label, color=color)
+    ax.set_title(f'{ticker} Price Chart')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Price')
+    ax.legend()
+    ax.grid()
+    return fig
 
 # === Display Charts for Selected Assets ===
+histories = load_data(st.session_state.selected_assets, interval)
+dates = pd.DatetimeIndex(sorted(set().union(*(h.index for h in histories.values())))) if histories else pd.DatetimeIndex([])
+start, end = zoom_slider(dates, key="dashboard_zoom")
 for ticker in st.session_state.selected_assets:
-    hist = load_data(ticker)
-    if hist.empty:
+    hist = histories.get(ticker)
+    if hist is None or hist.empty:
         st.error(f"❌ Data not available for {ticker}")
         continue
 
     # Compute Moving Averages
-    ma50 = hist['Close'].rolling(window=50).mean()
-    ma200 = hist['Close'].rolling(window=200).mean()
+    with perf.span(f"moving averages {ticker}", rows=len(hist)):
+        close = hist['Close']
+        ma50 = derived(ticker, "sma", (period_for(interval), 50), lambda: compute_sma(close, 50), interval)
+        ma200 = derived(ticker, "sma", (period_for(interval), 200), lambda: compute_sma(close, 200), interval)
 
     st.subheader(f"📉 {ticker} Price Chart")
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(hist.index, hist['Close'], label='Close Price')
-    ax.plot(hist.index, ma50, label='50-Day MA', color='orange')
-    ax.plot(hist.index, ma200, label='200-Day MA', color='red')
-    ax.set_title(f'{ticker} Price Chart')
-    ax.set_xlabel('Date')
-    ax.set_ylabel('Price')
-    ax.legend()
-    ax.grid()
-    st.pyplot(fig)
+    view = zoom(pd.DataFrame({'Close': hist['Close'], 'MA50': ma50, 'MA200': ma200}), start, end)
+    st.image(cached_figure(("dashboard", ticker, interval, view), lambda: price_chart(ticker, view)))
 
     # Price Summary
     st.markdown(f"**Min:** ${hist['Close'].min():.2f} | **Max:** ${hist['Close'].max():.2f}")
     trend = "Bullish" if ma50.iloc[-1] > ma200.iloc[-1] else "Bearish"
-    st.markdown(f"**Trend:** `{trend}`") 
\ No newline at end of file
+    st.markdown(f"**Trend:** `{trend}`") 
+
+perf.panel()
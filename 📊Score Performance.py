@@ -1,68 +1,101 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 
-# -- Technical Indicator Functions --
-def compute_rsi(series, window=14):
-    delta = series.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(window=window).mean()
-    avg_loss = loss.rolling(window=window).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-def compute_macd(series, fast=12, slow=26, signal=9):
-    exp1 = series.ewm(span=fast, adjust=False).mean()
-    exp2 = series.ewm(span=slow, adjust=False).mean()
-    macd = exp1 - exp2
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    return macd, signal_line
-
-def compute_ma(series, short_window=20, long_window=100):
-    ma_short = series.rolling(window=short_window).mean()
-    ma_long = series.rolling(window=long_window).mean()
-    return ma_short, ma_long
-
-# -- Simulated Forecast Logic (You can connect your model here) --
-def get_forecast(ticker):
-    import random
-    return random.choice(['up', 'down', 'neutral'])
-
-# -- Total Score --
-def score_asset(data, ticker):
-    close = data['Close']
-    rsi = compute_rsi(close).iloc[-1]
-    macd, signal_line = compute_macd(close)
-    macd_val, signal_val = macd.iloc[-1], signal_line.iloc[-1]
-    ma_short, ma_long = compute_ma(close)
-    ma_s, ma_l = ma_short.iloc[-1], ma_long.iloc[-1]
-
-    forecast = get_forecast(ticker)
-
-    score = 0
-    if rsi < 30: score += 1
-    elif rsi > 70: score -= 1
-    if macd_val > signal_val: score += 1
-    else: score -= 1
-    if ma_s > ma_l: score += 1
-    else: score -= 1
-    if forecast == 'up': score += 1
-    elif forecast == 'down': score -= 1
-
-    if score >= 3:
-        recommendation = "🟢 Strong Buy"
-    elif score <= -3:
-        recommendation = "🔴 Strong Sell"
-    else:
-        recommendation = "🟡 Hold/Wait"
+from analytics import perf
+from analytics.forecast import forecast_direction
+from analytics.indicators import compute_macd, compute_rsi, compute_sma
+from analytics.screener import BATCH_SIZE, LONG_WINDOW, SHORT_WINDOW, page, read_universe, score_asset, screen
+from analytics.store import derived, load_many
+
+PAGE_SIZES = [25, 50, 100, 250]
 
-    return score, rsi, macd_val - signal_val, ma_s - ma_l, forecast, recommendation
+def color_recommendation(val):
+    if "Buy" in val:
+        return 'background-color: #b6fcb6'
+    elif "Sell" in val:
+        return 'background-color: #fcb6b6'
+    else:
+        return 'background-color: #fcfcb6'
+
+def styled(df):
+    return df.style.map(color_recommendation, subset=['Recommendation'])
+
+# Latest indicator values for one ticker, from series shared through the
+# derived-results cache with the Technical Indicators page
+def latest_for(ticker, close, period):
+    rsi = derived(ticker, "rsi", (period, 14, "sma"), lambda: compute_rsi(close, 14, "sma"))
+    macd, signal_line = derived(ticker, "macd", (period, 12, 26, 9), lambda: compute_macd(close))
+    ma_short = derived(ticker, "sma", (period, SHORT_WINDOW), lambda: compute_sma(close, SHORT_WINDOW))
+    ma_long = derived(ticker, "sma", (period, LONG_WINDOW), lambda: compute_sma(close, LONG_WINDOW))
+    return {"RSI": rsi.iloc[-1], "MACD": macd.iloc[-1], "Signal": signal_line.iloc[-1],
+            "MA Short": ma_short.iloc[-1], "MA Long": ma_long.iloc[-1]}
+
+# -- Screener --
+# Scores a whole universe file in batches. Results are kept in session state
+# per (universe, period, horizon), so sorting and paging only re-slice them.
+def screener(period, days_forward):
+    upload = st.file_uploader("Universe File (CSV with a Symbol column, or one ticker per line)",
+                              type=["csv", "txt"])
+    if upload is None:
+        st.info("Upload a universe file to screen it.")
+        return
+    universe = read_universe(upload)
+    batch_size = st.number_input("Batch Size", 10, 1000, BATCH_SIZE, step=10)
+    st.caption(f"{len(universe):,} symbols in universe")
+
+    key = (tuple(universe), period, days_forward)
+    results = st.session_state.get("screener_results")
+    if st.button("▶️ Run Screener"):
+        parts, failed = [], {}
+        progress = st.progress(0.0, text="Scoring...")
+        live = st.empty()
+        for rows, errors, done in screen(universe, period, days_forward, int(batch_size)):
+            parts.append(rows)
+            failed.update(errors)
+            partial = pd.concat(parts, ignore_index=True)
+            progress.progress(done / len(universe), text=f"Scored {len(partial):,} of {len(universe):,}")
+            live.dataframe(partial.sort_values("Score", ascending=False).head(PAGE_SIZES[0]),
+                           use_container_width=True, hide_index=True)
+        progress.empty()
+        live.empty()
+        results = {"key": key, "table": pd.concat(parts, ignore_index=True), "errors": failed}
+        st.session_state.screener_results = results
+    if results is None or results["key"] != key:
+        st.info("Press Run Screener to score this universe.")
+        return
+
+    table = results["table"]
+    if results["errors"]:
+        with st.expander(f"⚠ {len(results['errors'])} symbols skipped"):
+            st.write(results["errors"])
+    st.markdown(f"### 📋 Screener Results ({len(table):,} assets)")
+    counts = table["Recommendation"].value_counts()
+    cols = st.columns(len(counts) or 1)
+    for col, (label, count) in zip(cols, counts.items()):
+        col.metric(label, f"{count:,}")
+
+    col1, col2, col3, col4 = st.columns(4)
+    sort_by = col1.selectbox("Sort By", ["Score", "RSI", "MACD Signal", "MA Diff", "Ticker"])
+    ascending = col2.radio("Order", ["Descending", "Ascending"], horizontal=True) == "Ascending"
+    page_size = col3.selectbox("Rows per Page", PAGE_SIZES, index=1)
+    pages = max(1, -(-len(table) // page_size))
+    number = col4.number_input(f"Page (of {pages})", 1, pages, 1)
+    st.dataframe(styled(page(table, sort_by, ascending, page_size, number)),
+                 use_container_width=True, hide_index=True)
+    st.download_button("⬇️ Download CSV", table.to_csv(index=False), "screener.csv", "text/csv")
 
 # -- Main Process --
 def main():
     st.title("📊 Overall Scoring + Price Forecast Analysis")
+    perf.page("Score Performance")
+
+    mode = st.radio("Mode", ["Selected Assets", "Screener"], horizontal=True)
+    if mode == "Screener":
+        period = st.selectbox("Select Analysis Period", ['1mo', '3mo', '6mo', '1y', '2y'], index=2)
+        days_forward = st.slider("Forecast Days Ahead", 1, 30, 7)
+        screener(period, days_forward)
+        return
 
     # Check if assets are selected
     if "selected_assets" not in st.session_state or not st.session_state.selected_assets:
@@ -75,16 +108,21 @@ def main():
     confidence = st.slider("Forecast Confidence Interval", 0.5, 0.99, 0.95)
 
     rows = []
+    frames, _ = load_many(assets_to_score, period, columns=["Close"])
+    closes = {t: f['Close'] for t, f in frames.items() if not f.empty}
+    with perf.span("indicators", rows=len(closes)):
+        latest = pd.DataFrame.from_dict({t: latest_for(t, c, period) for t, c in closes.items()}, orient="index")
+    with perf.span("forecast", rows=len(closes), cache="hit"):
+        forecasts = forecast_direction(closes, days_forward, model="holt")
 
     for ticker in assets_to_score:
         st.subheader(f"📌 {ticker} - {days_forward} Days Forecast (Confidence Interval: {int(confidence*100)}%)")
 
-        data = yf.Ticker(ticker).history(period=period)
-        if data.empty:
+        if ticker not in closes:
             st.warning(f"⚠ No data for {ticker}")
             continue
 
-        score, rsi, macd_diff, ma_diff, forecast, recommendation = score_asset(data, ticker)
+        score, rsi, macd_diff, ma_diff, forecast, recommendation = score_asset(latest.loc[ticker], forecasts.get(ticker, 'neutral'))
         rows.append({
             "Ticker": ticker,
             "Score": score,
@@ -95,22 +133,13 @@ def main():
             "Recommendation": recommendation
         })
 
-        # 📌 TODO: you can connect your forecasting model here
-        st.info(f"Forecast Trend: **{forecast}** — (You can implement your own forecasting model here)")
+        st.info(f"Forecast Trend: **{forecast}** — Holt exponential smoothing, {days_forward} days ahead")
 
     df = pd.DataFrame(rows)
 
-    def color_recommendation(val):
-        if "Buy" in val:
-            return 'background-color: #b6fcb6'
-        elif "Sell" in val:
-            return 'background-color: #fcb6b6'
-        else:
-            return 'background-color: #fcfcb6'
-
     if not df.empty:
         st.markdown("### 📋 Overall Scoring Summary")
-        st.dataframe(df.style.applymap(color_recommendation, subset=['Recommendation']))
+        st.dataframe(styled(df))
 
         selected = st.selectbox("Select Asset for Detailed Signals", df['Ticker'])
         detail = df[df['Ticker'] == selected].iloc[0]
@@ -119,8 +148,9 @@ def main():
         st.write(f"- RSI: {detail['RSI']} (below 30 = Buy, above 70 = Sell)")
         st.write(f"- MACD Diff: {detail['MACD Signal']} (Positive = Buy)")
         st.write(f"- MA Diff: {detail['MA Diff']} (Positive = Short-term > Long-term = Bullish)")
-        st.write(f"- Simulated Forecast: {detail['Forecast']}")
+        st.write(f"- Forecast: {detail['Forecast']} (Holt, more than ±1% over the horizon)")
         st.markdown(f"## Recommended Action: {detail['Recommendation']}")
 
 if __name__ == "__main__":
     main()
+    perf.panel()
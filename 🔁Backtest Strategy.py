@@ -1,81 +1,358 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 
+from analytics import perf
+from analytics.backtest import (LONG_WINDOWS, METRICS, SHORT_WINDOWS, backtest_ma_strategy, backtest_signal, best_pair,
+                                sweep_many)
+from analytics.cache import cached
+from analytics.charts import cached_figure, downsample
+from analytics.exits import PARAMETERS, backtest_ma_exits, exit_sweep
+from analytics.portfolio import FREQUENCIES, backtest_portfolio, equal_weights, ma_signals, portfolio_summary
+from analytics.screener import read_universe
+from analytics.signals import on_dates, signal_backtest
+from analytics.store import derived, derived_many, get_store, load_history, load_many
+
 st.set_page_config(page_title="🔁 Backtest: MA Crossover", layout="wide")
 st.title("🔁 Backtest: MA Crossover Strategy")
+perf.page("Backtest Strategy")
+
+# Heatmap of one sweep metric over (short, long) window pairs, or any other
+# two swept parameters
+def sweep_heatmap(ticker, metric, period, table, by="MA Windows", x_title="Long MA Window",
+                  y_title="Short MA Window"):
+    fig = go.Figure(go.Heatmap(
+        z=table.to_numpy(), x=table.columns, y=table.index,
+        colorscale="RdYlGn", colorbar=dict(title=metric)
+    ))
+    fig.update_layout(
+        title=f"{ticker} {metric} by {by} ({period})",
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        template="plotly_white"
+    )
+    return fig
+
+# Plotting with Plotly
+def backtest_chart(ticker, period, result, buys, sells, label="MA Strategy"):
+    fig = go.Figure()
+
+    # Equity curves are downsampled; signal markers stay at full resolution
+    curves = downsample(result[["Strategy", "BuyHold"]])
+    fig.add_trace(go.Scatter(x=curves.index, y=curves["Strategy"], mode='lines', name=label))
+    fig.add_trace(go.Scatter(x=curves.index, y=curves["BuyHold"], mode='lines', name='Buy & Hold', line=dict(dash='dot')))
 
-# Backtesting logic
-def backtest_ma_strategy(data, short_window, long_window):
-    data = data.copy()
-    data['Short_MA'] = data['Close'].rolling(window=short_window).mean()
-    data['Long_MA'] = data['Close'].rolling(window=long_window).mean()
-    data['Signal'] = 0
-    data.loc[data['Short_MA'] > data['Long_MA'], 'Signal'] = 1
-    data['Position'] = data['Signal'].diff()
-    data['Strategy_Returns'] = data['Close'].pct_change() * data['Signal'].shift(1)
-    data['Strategy'] = (1 + data['Strategy_Returns']).cumprod()
-    data['BuyHold'] = (1 + data['Close'].pct_change()).cumprod()
-
-    buy_signals = data[data['Position'] == 1]
-    sell_signals = data[data['Position'] == -1]
-    return data, buy_signals, sell_signals
+    # Buy signals
+    fig.add_trace(go.Scatter(
+        x=buys.index,
+        y=result.loc[buys.index, "Strategy"],
+        mode='markers',
+        marker=dict(color='green', size=10, symbol='triangle-up'),
+        name='Buy Signal'
+    ))
+
+    # Sell signals
+    fig.add_trace(go.Scatter(
+        x=sells.index,
+        y=result.loc[sells.index, "Strategy"],
+        mode='markers',
+        marker=dict(color='red', size=10, symbol='triangle-down'),
+        name='Sell Signal'
+    ))
+
+    fig.update_layout(
+        title=f"{ticker} Strategy Backtest ({period})",
+        xaxis_title="Date",
+        yaxis_title="Cumulative Return",
+        template="plotly_white",
+        legend=dict(x=0, y=1)
+    )
+    return fig
+
+# Portfolio equity against an equal-weight buy & hold of the same assets
+def portfolio_chart(period, equity, benchmark):
+    curves = downsample(pd.DataFrame({"Portfolio": equity, "Buy & Hold": benchmark}))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=curves.index, y=curves["Portfolio"], mode='lines', name='Portfolio'))
+    fig.add_trace(go.Scatter(x=curves.index, y=curves["Buy & Hold"], mode='lines', name='Equal-Weight Buy & Hold', line=dict(dash='dot')))
+    fig.update_layout(
+        title=f"Portfolio Backtest ({period})",
+        xaxis_title="Date",
+        yaxis_title="Portfolio Value",
+        template="plotly_white",
+        legend=dict(x=0, y=1)
+    )
+    return fig
 
 # Check if assets are selected
 if "selected_assets" not in st.session_state or not st.session_state.selected_assets:
     st.warning("⚠️ Please select assets from the Dashboard first.")
     st.stop()
 
+mode = st.radio("Mode", ["Single Backtest", "Parameter Sweep", "Exit Sweep", "Portfolio", "Indicator Signals"],
+                horizontal=True)
+
+# Exit sweep: one MA pair with every combination of stop-loss, trailing-stop,
+# take-profit and holding-limit settings, for every asset in one pass
+if mode == "Exit Sweep":
+    sweep_assets = st.multiselect("Assets to Sweep", st.session_state.selected_assets,
+                                  default=st.session_state.selected_assets)
+    col1, col2, col3 = st.columns(3)
+    period = col1.selectbox("Select Time Period", ['6mo', '1y', '2y', '5y'], index=2)
+    short_ma = col2.slider("Short MA Window", 5, 50, 20)
+    long_ma = col3.slider("Long MA Window", 30, 200, 100)
+    col1, col2, col3, col4 = st.columns(4)
+    stop_losses = col1.multiselect("Stop Loss (%)", [0, 2, 5, 10, 15, 20], default=[0, 5, 10])
+    trailing_stops = col2.multiselect("Trailing Stop (%)", [0, 5, 10, 15, 20], default=[0, 10])
+    take_profits = col3.multiselect("Take Profit (%)", [0, 5, 10, 20, 50, 100], default=[0, 10, 20, 50])
+    max_holds = col4.multiselect("Max Holding (bars)", [0, 10, 20, 60, 120], default=[0, 60])
+    metric = st.selectbox("Metric", METRICS, index=1)
+    grids = tuple(tuple(sorted(g)) or (0,) for g in (stop_losses, trailing_stops, take_profits, max_holds))
+    if not sweep_assets:
+        st.stop()
+
+    frames, errors = load_many(sweep_assets, period, columns=["Close"])
+    for ticker in errors:
+        st.error(f"❌ No data available for {ticker}.")
+    closes = {t: f['Close'] for t, f in frames.items() if len(f) > 2}
+    if not closes:
+        st.stop()
+    assets = tuple(closes)
+    versions = tuple(get_store().loaded_version(t) for t in assets)
+    n_sets = np.prod([len(g) for g in grids])
+    with perf.span("exit sweep", rows=sum(len(c) for c in closes.values()) * n_sets):
+        table = cached((assets, versions, "exit_sweep", (period, short_ma, long_ma, grids)), lambda: exit_sweep(
+            closes, short_ma, long_ma, *([v / 100 for v in g] for g in grids[:3]), grids[3]))
+    st.caption(f"{len(assets)} assets × {n_sets} exit settings")
+
+    # Settings ranked by their average over the assets, in percent as entered
+    average = table.groupby(level=PARAMETERS)[METRICS + ["Trades"]].mean().sort_values(metric, ascending=False)
+    average.index = average.index.set_levels(
+        [level * 100 if name != "Max Holding" else level.astype(int) for name, level in zip(average.index.names, average.index.levels)])
+    st.markdown(f"### Exit Settings by Average {metric}")
+    st.dataframe(average.head(20).style.format({
+        "Final Return": "{:.2%}", "Sharpe": "{:.2f}", "Max Drawdown": "{:.2%}", "Trades": "{:.1f}"
+    }))
+    st.caption("Stop, trailing and take-profit levels are in percent; 0 switches a rule off.")
+
+    ticker = st.selectbox("Heatmap Asset", assets)
+    col1, col2 = st.columns(2)
+    trailing = col1.selectbox("Trailing Stop (%)", grids[1], key="heatmap_trailing")
+    hold = col2.selectbox("Max Holding (bars)", grids[3], key="heatmap_hold")
+    view = table.xs((ticker, trailing / 100, float(hold)), level=["Ticker", "Trailing Stop", "Max Holding"])[metric]
+    heat = view.unstack("Take Profit")
+    heat.index = pd.Index(heat.index * 100, name="Stop Loss (%)")
+    heat.columns = pd.Index(heat.columns * 100, name="Take Profit (%)")
+    fig = cached_figure(("exit sweep", ticker, metric, period, heat), lambda: sweep_heatmap(
+        ticker, metric, period, heat, "Exit Levels", "Take Profit (%)", "Stop Loss (%)"))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("### Exits Taken")
+    exits = table.xs(ticker, level="Ticker").filter(like="Exits").sum()
+    st.dataframe(exits.rename("Exits").to_frame().style.format("{:,.0f}"))
+    perf.panel()
+    st.stop()
+
+# Indicator signals: the Technical Indicators rule or the Score Performance
+# score at every bar of every asset, backtested long/flat, with the forward
+# return after each signal pooled across the assets
+if mode == "Indicator Signals":
+    source = st.radio("Assets", ["Selected Assets", "Universe File"], horizontal=True)
+    if source == "Universe File":
+        upload = st.file_uploader("Universe File (CSV with a Symbol column, or one ticker per line)", type=["csv", "txt"])
+        if upload is None:
+            st.info("Upload a universe file to backtest it.")
+            st.stop()
+        tickers = read_universe(upload)
+    else:
+        tickers = st.session_state.selected_assets
+    col1, col2 = st.columns(2)
+    period = col1.selectbox("Select Time Period", ['6mo', '1y', '2y', '5y'], index=2)
+    rule = col2.selectbox("Rule", ["Technical Indicators Signal", "Score Thresholds"])
+    entry, exit_at, days_forward, use_forecast = 3, -3, 7, True
+    if rule == "Score Thresholds":
+        col1, col2, col3 = st.columns(3)
+        entry = col1.slider("Buy at Score ≥", -3, 4, 3)
+        exit_at = col2.slider("Sell at Score ≤", -4, 3, -3)
+        days_forward = col3.slider("Forecast / Forward Return Horizon (days)", 1, 30, 7)
+        use_forecast = st.checkbox("Include Forecast Leg in the Score", value=True)
+    else:
+        days_forward = st.slider("Forward Return Horizon (days)", 1, 30, 7)
+
+    frames, errors = load_many(tickers, period, columns=["Close"])
+    if errors:
+        with st.expander(f"⚠ {len(errors)} assets skipped"):
+            st.write({t: str(e) for t, e in errors.items()})
+    closes = {t: f['Close'] for t, f in frames.items() if len(f) > 2}
+    if not closes:
+        st.error("❌ No data available for these assets.")
+        st.stop()
+
+    assets = tuple(closes)
+    versions = tuple(get_store().loaded_version(t) for t in assets)
+    name = "composite" if rule == "Technical Indicators Signal" else "score"
+    options = (period, name, entry, exit_at, days_forward, use_forecast)
+    with perf.span("signal backtest", rows=sum(len(c) for c in closes.values())):
+        result = cached((assets, versions, "signal_backtest", options), lambda: signal_backtest(
+            closes, name, entry=entry, exit=exit_at, days_forward=days_forward, forecast=use_forecast))
+
+    summary = result["Summary"]
+    cols = st.columns(4)
+    cols[0].metric("Median Return", f"{summary['Final Return'].median():.2%}",
+                   f"{(summary['Final Return'] - summary['Buy & Hold']).median():+.2%} vs buy & hold")
+    cols[1].metric("Median Sharpe", f"{summary['Sharpe'].median():.2f}")
+    cols[2].metric("Beat Buy & Hold", f"{(summary['Final Return'] > summary['Buy & Hold']).mean():.0%}")
+    cols[3].metric("Trades", f"{int(summary['Trades'].sum()):,}")
+
+    st.markdown(f"### Forward {days_forward}-Bar Return by Signal")
+    edge = result["Edge"]
+    if name == "composite":
+        edge = edge.rename(index={"1": "🟢 Buy", "-1": "🔴 Sell", "0": "No Signal"})
+    st.dataframe(edge.style.format({"Mean Return": "{:.2%}", "Hit Rate": "{:.1%}", "Bars": "{:,.0f}"}))
+    st.caption("Pooled over every asset and bar; compare a signal's row with All Bars for its edge.")
+
+    ticker = st.selectbox("Equity Curve for", assets)
+    index = closes[ticker].dropna().index
+    position = on_dates(result["Backtest"]["Signal"], ticker, index)
+    frame, buys, sells = backtest_signal(closes[ticker].dropna().to_frame("Close"), position)
+    fig = cached_figure(("signal backtest", ticker, options, frame[["Strategy", "BuyHold"]]),
+                        lambda: backtest_chart(ticker, period, frame, buys, sells, label=rule))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("### Per-Asset Results")
+    st.dataframe(summary.style.format({
+        "Final Return": "{:.2%}", "Buy & Hold": "{:.2%}", "Sharpe": "{:.2f}", "Max Drawdown": "{:.2%}"
+    }))
+    perf.panel()
+    st.stop()
+
+# Portfolio: all selected assets in one book, rebalanced with fees and slippage
+if mode == "Portfolio":
+    period = st.selectbox("Select Time Period", ['6mo', '1y', '2y', '5y'], index=2)
+    allocation = st.selectbox("Allocation", ["Equal Weight", "MA Crossover (equal weight while long)"])
+    rebalance = st.selectbox("Rebalance", list(FREQUENCIES) + ["On Signal Change", "Never"], index=1)
+    if allocation != "Equal Weight":
+        short_ma = st.slider("Short MA Window", 5, 50, 20)
+        long_ma = st.slider("Long MA Window", 30, 200, 100)
+    col1, col2 = st.columns(2)
+    fee_bps = col1.number_input("Fee (bps of traded value)", 0.0, 100.0, 10.0, step=1.0)
+    slippage_bps = col2.number_input("Slippage (bps)", 0.0, 100.0, 5.0, step=1.0)
+
+    frames, errors = load_many(st.session_state.selected_assets, period, columns=["Close"])
+    for ticker in errors:
+        st.error(f"❌ No data available for {ticker}.")
+    # Union calendar: an asset's last close carries over days it did not trade
+    prices = pd.DataFrame({t: f['Close'] for t, f in frames.items() if not f.empty}).sort_index()
+    if prices.empty:
+        st.stop()
+
+    if allocation == "Equal Weight":
+        weights = pd.Series(1 / prices.shape[1], index=prices.columns)
+    else:
+        weights = equal_weights(ma_signals(prices.ffill(), short_ma, long_ma))
+    rule = {"On Signal Change": "signal", "Never": None}.get(rebalance, FREQUENCIES.get(rebalance))
+    with perf.span("portfolio backtest", rows=prices.size):
+        result = backtest_portfolio(prices, weights, rule, fee=fee_bps / 1e4, slippage=slippage_bps / 1e4)
+        benchmark = backtest_portfolio(prices, pd.Series(1 / prices.shape[1], index=prices.columns), None,
+                                       fee=fee_bps / 1e4, slippage=slippage_bps / 1e4)
+
+    fig = cached_figure(("portfolio", period, result["Equity"], benchmark["Equity"]),
+                        lambda: portfolio_chart(period, result["Equity"], benchmark["Equity"]))
+    st.plotly_chart(fig, use_container_width=True)
+
+    summary = portfolio_summary(result)
+    cols = st.columns(5)
+    cols[0].metric("Total Return", f"{summary['Final Return']:.2%}",
+                   f"{summary['Final Return'] - portfolio_summary(benchmark)['Final Return']:+.2%} vs buy & hold")
+    cols[1].metric("Sharpe", f"{summary['Sharpe']:.2f}")
+    cols[2].metric("Max Drawdown", f"{summary['Max Drawdown']:.2%}")
+    cols[3].metric("Annual Turnover", f"{summary['Annual Turnover']:.1f}x")
+    cols[4].metric("Costs", f"{summary['Costs']:.2%}", f"{summary['Rebalances']} rebalances", delta_color="off")
+
+    st.markdown("### Per-Asset Contribution")
+    st.dataframe(result["Contribution"].style.format({
+        "Contribution": "{:.2%}", "Average Weight": "{:.1%}", "Turnover": "{:.2f}x", "Costs": "{:.3%}"
+    }))
+    perf.panel()
+    st.stop()
+
+# Parameter sweep: every short/long pair the sliders allow, for several assets
+if mode == "Parameter Sweep":
+    sweep_assets = st.multiselect("Assets to Sweep", st.session_state.selected_assets,
+                                  default=st.session_state.selected_assets)
+    period = st.selectbox("Select Time Period", ['6mo', '1y', '2y'], index=2)
+    metric = st.selectbox("Heatmap Metric", METRICS, index=1)
+    if not sweep_assets:
+        st.stop()
+
+    frames, _ = load_many(sweep_assets, period, columns=["Close"])
+    closes = {t: f['Close'] for t, f in frames.items() if not f.empty}
+    # Sweeps are cached per asset and shared between sessions; only the
+    # uncached assets are swept, one per worker process
+    with st.spinner(f"Evaluating {len(SHORT_WINDOWS) * len(LONG_WINDOWS)} window pairs per asset..."):
+        with perf.span("parameter sweep", rows=sum(len(c) for c in closes.values())):
+            sweeps = derived_many(list(closes), "sweep_ma", (period,),
+                                  lambda missing: sweep_many({t: closes[t] for t in missing}))
+
+    for ticker in sweep_assets:
+        if ticker not in sweeps:
+            st.error(f"❌ No data available for {ticker}.")
+            continue
+        table = sweeps[ticker][metric]
+        fig = cached_figure(("sweep", ticker, metric, period, table),
+                            lambda: sweep_heatmap(ticker, metric, period, table))
+        st.plotly_chart(fig, use_container_width=True)
+
+        best = best_pair(sweeps[ticker], metric)
+        if best:
+            short, long, values = best
+            st.markdown(
+                f"**Best by {metric}:** Short {short} / Long {long} — "
+                f"Return `{values['Final Return']:.2%}`, Sharpe `{values['Sharpe']:.2f}`, "
+                f"Max Drawdown `{values['Max Drawdown']:.2%}`"
+            )
+    perf.panel()
+    st.stop()
+
 # User selection
 ticker = st.selectbox("Select Asset for Backtest", st.session_state.selected_assets)
-period = st.selectbox("Select Time Period", ['6mo', '1y', '2y'], index=2)
+period = st.selectbox("Select Time Period", ['5d', '1mo', '6mo', '1y', '2y'], index=4)
+interval = st.selectbox("Bar Interval", ["1d", "1h", "5m", "1m"])
 short_ma = st.slider("Short MA Window", 5, 50, 20)
 long_ma = st.slider("Long MA Window", 30, 200, 100)
+with st.expander("🛑 Exit Rules (0 = off)"):
+    col1, col2, col3, col4 = st.columns(4)
+    stop_loss = col1.number_input("Stop Loss (%)", 0.0, 50.0, 0.0, step=1.0) / 100
+    trailing_stop = col2.number_input("Trailing Stop (%)", 0.0, 50.0, 0.0, step=1.0) / 100
+    take_profit = col3.number_input("Take Profit (%)", 0.0, 500.0, 0.0, step=5.0) / 100
+    max_hold = col4.number_input("Max Holding (bars)", 0, 1000, 0, step=5)
+rules = dict(stop_loss=stop_loss, trailing_stop=trailing_stop, take_profit=take_profit, max_hold=max_hold)
 
 # Load data
-data = yf.Ticker(ticker).history(period=period)
+data = load_history(ticker, period, columns=["Close"], interval=interval)
 if data.empty:
     st.error("❌ No data available for this asset.")
     st.stop()
 
-# Run backtest
-result, buys, sells = backtest_ma_strategy(data, short_ma, long_ma)
-
-# Plotting with Plotly
-fig = go.Figure()
-
-fig.add_trace(go.Scatter(x=result.index, y=result["Strategy"], mode='lines', name='MA Strategy'))
-fig.add_trace(go.Scatter(x=result.index, y=result["BuyHold"], mode='lines', name='Buy & Hold', line=dict(dash='dot')))
-
-# Buy signals
-fig.add_trace(go.Scatter(
-    x=buys.index,
-    y=result.loc[buys.index, "Strategy"],
-    mode='markers',
-    marker=dict(color='green', size=10, symbol='triangle-up'),
-    name='Buy Signal'
-))
-
-# Sell signals
-fig.add_trace(go.Scatter(
-    x=sells.index,
-    y=result.loc[sells.index, "Strategy"],
-    mode='markers',
-    marker=dict(color='red', size=10, symbol='triangle-down'),
-    name='Sell Signal'
-))
-
-fig.update_layout(
-    title=f"{ticker} Strategy Backtest ({period})",
-    xaxis_title="Date",
-    yaxis_title="Cumulative Return",
-    template="plotly_white",
-    legend=dict(x=0, y=1)
-)
+# Run backtest; exit rules make it path dependent, handled by the exits engine
+exits = None
+with perf.span("backtest", rows=len(data)):
+    if any(rules.values()):
+        result, buys, sells, exits = derived(ticker, "backtest_ma_exits", (period, short_ma, long_ma) + tuple(rules.values()),
+                                             lambda: backtest_ma_exits(data, short_ma, long_ma, **rules), interval)
+    else:
+        result, buys, sells = derived(ticker, "backtest_ma", (period, short_ma, long_ma),
+                                      lambda: backtest_ma_strategy(data, short_ma, long_ma), interval)
 
+fig = cached_figure(("backtest", ticker, period, interval, short_ma, long_ma, tuple(rules.values()),
+                     result[["Strategy", "BuyHold"]]),
+                    lambda: backtest_chart(ticker, period, result, buys, sells))
 st.plotly_chart(fig, use_container_width=True)
 
 # Explanation
 st.markdown("🟢 **Green markers** indicate Buy signals. 🔴 **Red markers** indicate Sell signals.")
+if exits:
+    st.markdown("**Exits taken:** " + ", ".join(f"{name} `{count}`" for name, count in exits.items()))
+
+perf.panel()
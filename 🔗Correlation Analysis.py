@@ -0,0 +1,120 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+from analytics import perf
+from analytics.cache import cached
+from analytics.charts import cached_figure, downsample
+from analytics.correlation import calendar_returns, cluster_order, coarsen, correlation_analysis, rolling_correlation
+from analytics.risk import ROLLING_WINDOWS
+from analytics.screener import read_universe
+from analytics.store import get_store, load_many
+
+st.set_page_config(page_title="🔗 Correlation Analysis", layout="wide")
+st.title("🔗 Correlation Analysis")
+perf.page("Correlation Analysis")
+
+# Heatmap of the correlation matrix in clustered order, block-averaged
+# down to screen resolution for large universes
+def correlation_heatmap(period, matrix):
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(), x=list(matrix.columns), y=list(matrix.index),
+        zmin=-1, zmax=1, colorscale="RdBu", reversescale=True, colorbar=dict(title="Correlation")
+    ))
+    fig.update_layout(
+        title=f"Return Correlations, Clustered ({period})",
+        template="plotly_white",
+        height=700,
+        yaxis=dict(autorange="reversed", showticklabels=len(matrix) <= 60),
+        xaxis=dict(showticklabels=len(matrix) <= 60)
+    )
+    return fig
+
+# Rolling correlation of one asset against the others picked
+def rolling_chart(target, window, table):
+    fig = go.Figure()
+    lines = downsample(table)
+    for column in lines.columns:
+        fig.add_trace(go.Scatter(x=lines.index, y=lines[column], mode='lines', name=column))
+    fig.update_layout(
+        title=f"{window}-Bar Rolling Correlation with {target}",
+        xaxis_title="Date",
+        yaxis_title="Correlation",
+        yaxis=dict(range=[-1, 1]),
+        template="plotly_white"
+    )
+    return fig
+
+source = st.radio("Assets", ["Selected Assets", "Universe File"], horizontal=True)
+if source == "Universe File":
+    upload = st.file_uploader("Universe File (CSV with a Symbol column, or one ticker per line)", type=["csv", "txt"])
+    if upload is None:
+        st.info("Upload a universe file to correlate it.")
+        st.stop()
+    tickers = read_universe(upload)
+else:
+    tickers = st.session_state.get("selected_assets", [])
+if len(tickers) < 2:
+    st.warning("⚠️ Select at least two assets on the Dashboard, or upload a universe file.")
+    st.stop()
+
+col1, col2 = st.columns(2)
+period = col1.selectbox("Select Time Period", ['6mo', '1y', '2y', '5y'], index=2)
+top_k = col2.slider("Pairs to List", 5, 50, 10)
+
+# Load Data
+@perf.timed(category="data")
+def load_data(tickers, period):
+    frames, errors = load_many(tickers, period, columns=["Close"])
+    return {t: f['Close'] for t, f in frames.items() if len(f) > 2}, errors
+
+closes, errors = load_data(tickers, period)
+if errors:
+    with st.expander(f"⚠ {len(errors)} assets skipped"):
+        st.write({t: str(e) for t, e in errors.items()})
+if len(closes) < 2:
+    st.error("❌ Not enough data to compare assets.")
+    st.stop()
+
+# One returns matrix on a shared calendar; the matrix, top pairs and
+# clustering are cached together until any of the assets gets new bars
+returns = calendar_returns(closes)
+assets = tuple(returns.columns)
+versions = tuple(get_store().loaded_version(t) for t in assets)
+
+def analyze():
+    matrix, most, least = correlation_analysis(returns, k=top_k)
+    order = cluster_order(matrix)
+    return matrix.loc[order, order], most, least
+
+with perf.span("correlation", rows=returns.size):
+    matrix, most, least = cached((assets, versions, "correlation", (period, top_k)), analyze)
+st.caption(f"{len(assets):,} assets, {len(returns):,} shared bars, "
+           f"{len(assets) * (len(assets) - 1) // 2:,} pairs")
+
+view = coarsen(matrix)
+fig = cached_figure(("correlation", period, view), lambda: correlation_heatmap(period, view))
+st.plotly_chart(fig, use_container_width=True)
+if len(view) < len(matrix):
+    st.caption(f"Each cell averages a block of about {len(matrix) / len(view):.0f} × {len(matrix) / len(view):.0f} assets.")
+
+col1, col2 = st.columns(2)
+col1.markdown("### 🔺 Most Correlated Pairs")
+col1.dataframe(most.style.format({"Correlation": "{:.3f}"}), hide_index=True)
+col2.markdown("### 🔻 Least Correlated Pairs")
+col2.dataframe(least.style.format({"Correlation": "{:.3f}"}), hide_index=True)
+
+# Rolling correlation against one asset, for the assets most related to it by default
+st.subheader("📈 Rolling Correlation")
+col1, col2 = st.columns(2)
+target = col1.selectbox("Asset", assets)
+window = col2.selectbox("Rolling Window (bars)", ROLLING_WINDOWS, index=1)
+related = matrix[target].drop(target).abs().sort_values(ascending=False)
+others = st.multiselect("Compare With", [a for a in assets if a != target], default=list(related.index[:5]))
+if others:
+    with perf.span("rolling correlation", rows=len(returns) * len(others)):
+        table = rolling_correlation(returns[[target] + others], target, window)
+    fig = cached_figure(("rolling correlation", target, window, table),
+                        lambda: rolling_chart(target, window, table))
+    st.plotly_chart(fig, use_container_width=True)
+
+perf.panel()